@@ -12,7 +12,6 @@ from contextlib import redirect_stdout
 
 
 # os.system("pip install -i https://pypi.org/simple fab-ad==1.0.7")
-# sys.path.append("/Users/saket/Documents/workdir/harvard_courses/cs107a/git/team32/src")
 
 from fab_ad.fab_ad_tensor import *
 from fab_ad.fab_ad_session import *
@@ -139,4 +139,25 @@ newtonRaphson(x0)
 
 """,
 
+"Newton and Broyden root finding":
+"""import numpy as np
+
+from fab_ad.fab_ad_math import exp
+from fab_ad.fab_ad_roots import newton, broyden
+
+# value and Jacobian come from one forward pass per iteration
+result = newton(lambda x: x * x * x - x * x + 2, -20.0)
+print(result)
+
+# square system solved from several starting points in one vectorized batch
+def system(x, y):
+    return [x * x + y * y - 4, exp(x) + y - 1]
+
+starts = np.array([[1.0, -1.7], [-1.8, 0.8]])
+print(newton(system, starts))
+# Broyden's method computes the exact Jacobian once and then uses rank-1 updates
+print(broyden(system, starts))
+
+""",
+
 }
\ No newline at end of file
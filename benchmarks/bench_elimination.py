@@ -0,0 +1,52 @@
+# bench_elimination.py
+# Compares the multiply-adds and run time of the full Jacobian computed by vertex
+# elimination (Markowitz, forward and reverse orders) with pure vector forward and
+# reverse mode, on a graph whose inputs funnel through a narrow chain before fanning out.
+#
+# usage: PYTHONPATH=src python benchmarks/bench_elimination.py [--inputs N] [--outputs N] [--depth N] [--repeat N]
+
+import argparse
+import time
+
+from fab_ad.fab_ad_tensor import FabTensor, AdMode
+from fab_ad.fab_ad_session import fab_ad_session
+from fab_ad.fab_ad_diff import auto_diff
+from fab_ad.fab_ad_math import sin, tanh, log
+from fab_ad.fab_ad_elimination import mixed_jacobian
+
+
+def build(n_inputs, n_outputs, depth):
+    fab_ad_session.initialize(num_inputs=n_inputs)
+    inputs = [FabTensor(value=0.1 * (idx + 1), identifier=f"x{idx}") for idx in range(n_inputs)]
+    hidden = sum(inputs[1:], inputs[0] * 1.5)
+    for _ in range(depth):
+        hidden = tanh(hidden) * 0.9 + sin(hidden) * 0.1
+    return [log(hidden * hidden + idx) * inputs[idx % n_inputs] for idx in range(1, n_outputs + 1)]
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--inputs", type=int, default=32)
+    parser.add_argument("--outputs", type=int, default=32)
+    parser.add_argument("--depth", type=int, default=16)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+    outputs = build(args.inputs, args.outputs, args.depth)
+    for order in ("markowitz", "forward", "reverse"):
+        result = mixed_jacobian(outputs, order=order)
+        elapsed = timed(lambda: mixed_jacobian(outputs, order=order), args.repeat)
+        print(f"elimination {order:9s}: {result.n_multiply_adds:8d} multiply-adds, {elapsed * 1e3:8.3f} ms")
+    reverse = timed(lambda: auto_diff(outputs, mode=AdMode.REVERSE), args.repeat)
+    print(f"pure forward mode    : {result.forward_multiply_adds:8d} multiply-adds")
+    print(f"pure reverse mode    : {result.reverse_multiply_adds:8d} multiply-adds, {reverse * 1e3:8.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
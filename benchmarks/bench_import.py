@@ -0,0 +1,57 @@
+# bench_import.py
+# Measures the start-up cost of `import fab_ad` in a fresh interpreter.
+#
+# usage: python benchmarks/bench_import.py [--repeat N]
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+_SRC = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+_SNIPPETS = {
+    "python (baseline)": "pass",
+    "import fab_ad": "import fab_ad",
+    "fab_ad.FabTensor": "import fab_ad; fab_ad.FabTensor",
+    "fab_ad.sin": "import fab_ad; fab_ad.sin",
+    "fab_ad.auto_diff": "import fab_ad; fab_ad.auto_diff",
+}
+
+
+def time_snippet(snippet: str, repeat: int) -> float:
+    """returns median wall time in ms of running `snippet` in a new interpreter
+
+    Parameters
+    ----------
+    snippet : str
+        python source passed to `python -c`
+    repeat : int
+        number of interpreter launches
+
+    Returns
+    -------
+    float
+        median wall time in milliseconds
+    """
+    env = dict(os.environ, PYTHONPATH=_SRC + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", snippet], check=True, env=env)
+        timings.append((time.perf_counter() - start) * 1e3)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+    for label, snippet in _SNIPPETS.items():
+        print(f"{label:<20} {time_snippet(snippet, args.repeat):8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
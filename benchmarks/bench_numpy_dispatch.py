@@ -0,0 +1,58 @@
+# bench_numpy_dispatch.py
+# Compares differentiating existing NumPy code on an object array of scalar
+# FabTensors with the same code on one vector valued FabTensor, which NumPy
+# dispatches to fab_ad primitives through __array_ufunc__/__array_function__.
+#
+# usage: PYTHONPATH=src python benchmarks/bench_numpy_dispatch.py [--size N] [--repeat N]
+
+import argparse
+import time
+
+import numpy as np
+
+from fab_ad.fab_ad_tensor import FabTensor
+from fab_ad.fab_ad_session import fab_ad_session
+
+
+def numpy_code(x, w):
+    # unchanged NumPy code, written without knowledge of fab_ad; object arrays only
+    # support ufuncs that map to Python operators, so the code sticks to arithmetic
+    return np.sum(w * np.square(x) + x ** 3 / (x + 1.0))
+
+
+def object_array(values, w):
+    fab_ad_session.initialize(num_inputs=len(values))
+    x = np.array([FabTensor(value=float(value), identifier=f"x{idx}") for idx, value in enumerate(values)],
+                 dtype=object)
+    return numpy_code(x, w).derivative
+
+
+def vector_tensor(values, w):
+    fab_ad_session.initialize(num_inputs=1)
+    x = FabTensor(value=values, identifier="x")
+    return numpy_code(x, w).derivative
+
+
+def timed(func, repeat, *args):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func(*args)
+    return (time.perf_counter() - start) / repeat, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    values = np.linspace(0.1, 1.0, args.size)
+    w = np.linspace(1.0, 2.0, args.size)
+    object_time, _ = timed(object_array, args.repeat, values, w)
+    vector_time, _ = timed(vector_tensor, args.repeat, values, w)
+    print(f"object array of FabTensors : {object_time * 1e3:8.3f} ms")
+    print(f"vector valued FabTensor    : {vector_time * 1e3:8.3f} ms")
+    print(f"speedup                    : {object_time / vector_time:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+# bench_parallel.py
+# Scaling of the data-parallel gradient of a least squares objective on one host: wall time
+# with 1, 2, 4, ... worker processes and both all-reduce algorithms, against the serial
+# stream_gradient over the same shards.
+#
+# usage: PYTHONPATH=src python benchmarks/bench_parallel.py [--shards N] [--shard-size N] [--params N] [--max-workers N]
+
+import argparse
+import os
+import time
+
+import numpy as np
+
+from fab_ad.fab_ad_parallel import parallel_gradient
+from fab_ad.fab_ad_stream import stream_gradient
+
+
+def make_shards(n_shards, shard_size, n_params, seed=0):
+    rng = np.random.default_rng(seed)
+    weights = rng.normal(size=n_params)
+    shards = []
+    for _ in range(n_shards):
+        features = rng.normal(size=(shard_size, n_params))
+        shards.append((features, features @ weights + rng.normal(0, 0.1, shard_size)))
+    return shards
+
+
+def least_squares(params, shard):
+    features, targets = shard
+    total = 0
+    for row, target in zip(features, targets):
+        prediction = 0
+        for param, feature in zip(params, row):
+            prediction = prediction + param * feature
+        total = total + (prediction - target) ** 2
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--shards", type=int, default=32)
+    parser.add_argument("--shard-size", type=int, default=64)
+    parser.add_argument("--params", type=int, default=8)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+    shards = make_shards(args.shards, args.shard_size, args.params)
+    x = np.zeros(args.params)
+    start = time.perf_counter()
+    serial = stream_gradient(least_squares, x, shards)
+    serial_time = time.perf_counter() - start
+    print(f"serial stream_gradient: {serial_time * 1e3:9.1f} ms")
+    n_workers = 1
+    while n_workers <= args.max_workers:
+        for reduction in ("ring", "tree"):
+            start = time.perf_counter()
+            result = parallel_gradient(least_squares, x, shards, n_workers=n_workers, reduction=reduction)
+            elapsed = time.perf_counter() - start
+            assert np.allclose(result.gradient, serial.gradient)
+            print(f"{n_workers:3d} workers, {reduction:4s}: {elapsed * 1e3:9.1f} ms, speedup {serial_time / elapsed:5.2f}x,"
+                  f" slowest worker {max(result.worker_seconds) * 1e3:9.1f} ms")
+        n_workers *= 2
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+# bench_simplify.py
+# Compares graph size and differentiation time of templated formulas with and
+# without trace-time simplification.
+#
+# usage: PYTHONPATH=src python benchmarks/bench_simplify.py [--terms N] [--repeat N]
+
+import argparse
+import sys
+import time
+
+from fab_ad.fab_ad_tensor import FabTensor, AdMode
+from fab_ad.fab_ad_session import fab_ad_session
+from fab_ad.fab_ad_diff import auto_diff
+from fab_ad.fab_ad_math import sin
+
+
+def templated_formula(x, y, n_terms):
+    # coefficients as produced by a formula template where most of them are trivial
+    z = 0 * x
+    for k in range(n_terms):
+        scale = 1 if k % 3 else 0
+        shift = 0 if k % 2 else 1
+        z = z + ((x * scale + shift) * 2 * 0.5) ** 1 * sin(y) + 0
+    return z
+
+
+def run(simplify, n_terms, repeat):
+    build, backward, n_nodes = 0.0, 0.0, 0
+    for _ in range(repeat):
+        fab_ad_session.initialize(num_inputs=2)
+        fab_ad_session.simplify = simplify
+        x = FabTensor(value=1.5, identifier="x")
+        y = FabTensor(value=0.5, identifier="y")
+        start = time.perf_counter()
+        z = templated_formula(x, y, n_terms)
+        build += time.perf_counter() - start
+        n_nodes = len(fab_ad_session.all_tensors)
+        start = time.perf_counter()
+        auto_diff(z, mode=AdMode.REVERSE)
+        backward += time.perf_counter() - start
+    fab_ad_session.simplify = True
+    return n_nodes, build / repeat * 1e3, backward / repeat * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--terms", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    sys.setrecursionlimit(100000)
+    print(f"{'simplify':<10}{'nodes':>8}{'build ms':>12}{'reverse ms':>12}")
+    for simplify in (False, True):
+        n_nodes, build, backward = run(simplify, args.terms, args.repeat)
+        print(f"{str(simplify):<10}{n_nodes:>8}{build:>12.2f}{backward:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
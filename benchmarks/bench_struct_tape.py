@@ -0,0 +1,59 @@
+# bench_struct_tape.py
+# Compares the reverse sweep over FabTensor.source lists with the sweep over the
+# struct-of-arrays StructTape, on a wide (balanced sum) and a deep (chain) graph.
+#
+# usage: PYTHONPATH=src python benchmarks/bench_struct_tape.py [--size N] [--repeat N]
+
+import argparse
+import time
+
+from fab_ad.fab_ad_tensor import FabTensor
+from fab_ad.fab_ad_session import fab_ad_session
+from fab_ad.fab_ad_tape import StructTape
+from fab_ad.fab_ad_diff import reverse_mode_gradient_util
+from fab_ad.fab_ad_math import sin, exp
+
+
+def wide(x, y, size):
+    terms = [sin(x * k) * y + exp(y * 0.001 * k) * x for k in range(size)]
+    while len(terms) > 1:
+        terms = [sum(terms[idx:idx + 2]) for idx in range(0, len(terms), 2)]
+    return terms[0]
+
+
+def deep(x, y, size):
+    z = x
+    for _ in range(size):
+        z = sin(z) * y + x
+    return z
+
+
+def run(graph, struct_tape, size, repeat):
+    fab_ad_session.initialize(num_inputs=2)
+    fab_ad_session.struct_tape = StructTape() if struct_tape else None
+    x = FabTensor(value=0.3, identifier="x")
+    y = FabTensor(value=0.9, identifier="y")
+    z = graph(x, y, size)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fab_ad_session.zero_grad()
+        reverse_mode_gradient_util(z)
+    elapsed = (time.perf_counter() - start) / repeat
+    fab_ad_session.struct_tape = None
+    return elapsed, len(fab_ad_session.all_tensors)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=4096)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+    for graph in (wide, deep):
+        objects, n_nodes = run(graph, False, args.size, args.repeat)
+        arrays, _ = run(graph, True, args.size, args.repeat)
+        print(f"{graph.__name__:5s} ({n_nodes} nodes): source lists {objects * 1e3:8.3f} ms,"
+              f" struct tape {arrays * 1e3:8.3f} ms, speedup {objects / arrays:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
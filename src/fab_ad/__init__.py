@@ -0,0 +1,87 @@
+"""Fab-AD: automatic differentiation with forward and reverse mode.
+
+The public API is resolved lazily through module ``__getattr__`` so that
+``import fab_ad`` stays cheap; a submodule (and numpy) is only imported the
+first time one of its names is accessed.
+"""
+import importlib
+
+__version__ = "0.1.0"
+
+# public name -> submodule that defines it
+_LAZY_ATTRS = {
+    "AdMode": "fab_ad_tensor",
+    "FabTensor": "fab_ad_tensor",
+    "FabConstant": "fab_ad_tensor",
+    "constant": "fab_ad_tensor",
+    "FabAdSession": "fab_ad_session",
+    "AutoDiffOutput": "fab_ad_diff",
+    "auto_diff": "fab_ad_diff",
+    "forward_mode_gradient": "fab_ad_diff",
+    "reverse_mode_gradient": "fab_ad_diff",
+    "generate_source": "fab_ad_codegen",
+    "compile_gradient": "fab_ad_codegen",
+    "export_module": "fab_ad_codegen",
+    "minimize": "fab_ad_optimize",
+    "find_root": "fab_ad_roots",
+    "implicit_root": "fab_ad_roots",
+    "stream_gradient": "fab_ad_stream",
+    "parallel_gradient": "fab_ad_parallel",
+    "auto_diff_async": "fab_ad_async",
+    "GradientExecutor": "fab_ad_async",
+    "check_grad": "fab_ad_check",
+    "graph_stats": "fab_ad_graph",
+    "activity": "fab_ad_graph",
+    "mixed_jacobian": "fab_ad_elimination",
+    "primitive": "fab_ad_primitive",
+}
+_LAZY_ATTRS.update({
+    name: "fab_ad_math" for name in (
+        "sin", "cos", "tan", "cosec", "sec", "cot", "arcsin", "arccos", "arctan", "arccosec", "arcsec", "arccot",
+        "exp", "sinh", "cosh", "tanh", "cosech", "sech", "coth", "logistic", "log", "sqrt", "reduce_sum",
+        "absolute", "maximum", "minimum", "where", "clip", "relu", "stop_gradient",
+    )
+})
+
+# public submodule alias -> submodule
+_LAZY_MODULES = {
+    "codegen": "fab_ad_codegen",
+    "optimize": "fab_ad_optimize",
+    "roots": "fab_ad_roots",
+    "stream": "fab_ad_stream",
+    "graph": "fab_ad_graph",
+    "linalg": "fab_ad_linalg",
+    "elimination": "fab_ad_elimination",
+    "parallel": "fab_ad_parallel",
+}
+
+__all__ = sorted(list(_LAZY_ATTRS) + list(_LAZY_MODULES))
+
+
+def __getattr__(name: str):
+    """imports the submodule defining `name` on first access
+
+    Parameters
+    ----------
+    name : str
+        attribute requested on the package
+
+    Returns
+    -------
+    object
+        the public object or submodule bound to `name`
+    """
+    if name in _LAZY_ATTRS:
+        module = importlib.import_module(f".{_LAZY_ATTRS[name]}", __name__)
+        value = getattr(module, name)
+    elif name in _LAZY_MODULES:
+        value = importlib.import_module(f".{_LAZY_MODULES[name]}", __name__)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    # cache on the package so that __getattr__ is not hit again
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
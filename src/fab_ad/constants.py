@@ -6,6 +6,10 @@ from enum import Enum
 _ALLOWED_NUMERICS = (int, float, numbers.Integral, numbers.Number, np.ndarray)
 _ALLOWED_ITERABLES = (list, np.ndarray)
 _SPECIAL_FUNCTIONS = "sin, cos, tan, cosec, sec, cot, arcsin, arccos, arctan, arccosec, arcsec, arccot," \
-                     " exp, sinh, cosh, tanh, cosech, sech, coth, logistic, log, sqrt"
+                     " exp, sinh, cosh, tanh, cosech, sech, coth, logistic, log, sqrt, stop_gradient"
 _MAX_INDEPENDENT_VARS = 10
 _GLOBAL_COUNTER = 0
+_MAX_POOLED_CONSTANTS = 1024
+_INITIAL_TAPE_CAPACITY = 64
+# estimated bytes of one (tensor, partial) entry of FabTensor.source: list slot, tuple and float
+_EDGE_BYTES = 96
@@ -0,0 +1,195 @@
+import asyncio
+import concurrent.futures
+import functools
+import threading
+import weakref
+from typing import Callable, Iterable
+
+import numpy as np
+
+from .fab_ad_tensor import FabTensor
+from .fab_ad_session import fab_ad_session
+from .fab_ad_diff import AutoDiffOutput, auto_diff
+
+
+def _evaluate(fn: Callable, x: np.ndarray, mode, cancel: threading.Event, settings: dict) -> AutoDiffOutput:
+    """traces `fn` at `x` and differentiates it on an isolated session of the calling thread,
+    configured with the `settings` of the session that requested the evaluation
+    """
+    with fab_ad_session.isolated(num_inputs=max(len(x), 1), settings=settings):
+        fab_ad_session.cancel_event = cancel
+        inputs = [FabTensor(value=value, identifier=f"x{idx}") for idx, value in enumerate(x)]
+        output = fn(*inputs)
+        if not isinstance(output, (FabTensor, list)):
+            raise TypeError(f"Function must return a FabTensor or a list of FabTensors, not object of type {type(output)}")
+        result = auto_diff(output, mode=mode)
+    return result
+
+
+def _release(loop: asyncio.AbstractEventLoop, semaphore: asyncio.Semaphore, future: concurrent.futures.Future) -> None:
+    """releases `semaphore` on `loop` once the evaluation `future` has finished or was cancelled
+    """
+    try:
+        loop.call_soon_threadsafe(semaphore.release)
+    except RuntimeError:
+        # the loop was closed meanwhile, and its semaphore with it
+        pass
+
+
+class GradientExecutor:
+    def __init__(self, executor: concurrent.futures.ThreadPoolExecutor = None, max_workers: int = None,
+                 max_concurrency: int = None):
+        """init method
+
+        Gradient evaluations are offloaded to `executor` so that they do not block the event
+        loop. Each one runs on the worker thread's own isolated session, configured with the
+        settings (simplify, cse, dtype, memory budget, ...) of the session of the thread that
+        awaits it.
+
+        Parameters
+        ----------
+        executor : concurrent.futures.ThreadPoolExecutor, optional
+            thread pool running the evaluations, by default a thread pool owned by this object;
+            sessions and cancellation are per thread, so process pools are not supported
+        max_workers : int, optional
+            number of threads of the owned thread pool, by default the ThreadPoolExecutor default
+        max_concurrency : int, optional
+            maximum number of evaluations in flight per event loop, by default unlimited
+        """
+        if max_concurrency is not None and max_concurrency < 1:
+            raise ValueError(f"max_concurrency must be a positive integer or None, not {max_concurrency}")
+        if executor is not None and not isinstance(executor, concurrent.futures.ThreadPoolExecutor):
+            raise TypeError(f"executor must be a concurrent.futures.ThreadPoolExecutor, not object of type {type(executor)}")
+        self._owns_executor = executor is None
+        self.executor = executor if executor is not None else concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="fab_ad")
+        self.max_concurrency = max_concurrency
+        # asyncio semaphores are bound to the loop they are used in
+        self._semaphores = weakref.WeakKeyDictionary()
+
+    def _semaphore(self):
+        """returns the semaphore limiting concurrency on the running event loop, None if unlimited
+        """
+        if self.max_concurrency is None:
+            return None
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+        return semaphore
+
+    async def auto_diff(self, fn: Callable, x: Iterable, mode=None) -> AutoDiffOutput:
+        """awaitable value and gradient of `fn` at `x`
+
+        Cancelling the awaiting task cancels an evaluation that has not started yet, and makes
+        a running one stop at the next tensor it records. Its slot of `max_concurrency` is only
+        freed once the evaluation has actually stopped.
+
+        Parameters
+        ----------
+        fn : callable
+            function taking one FabTensor per coordinate of `x`, returning a FabTensor or a
+            list of FabTensors
+        x : array
+            point at which `fn` is differentiated
+        mode : AdMode, optional
+            AD mode passed to `auto_diff`, by default None
+
+        Returns
+        -------
+        AutoDiffOutput
+            value and gradient of `fn` at `x`
+        """
+        x = list(np.asarray(x, dtype=float).ravel())
+        semaphore = self._semaphore()
+        if semaphore is not None:
+            await semaphore.acquire()
+        cancel = threading.Event()
+        try:
+            future = self.executor.submit(_evaluate, fn, x, mode, cancel, fab_ad_session.settings())
+        except BaseException:
+            if semaphore is not None:
+                semaphore.release()
+            raise
+        if semaphore is not None:
+            future.add_done_callback(functools.partial(_release, asyncio.get_running_loop(), semaphore))
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            cancel.set()
+            raise
+
+    def shutdown(self, wait: bool = True) -> None:
+        """shuts down the thread pool owned by this object
+
+        Parameters
+        ----------
+        wait : bool, optional
+            wait for running evaluations to finish, by default True
+        """
+        if self._owns_executor:
+            self.executor.shutdown(wait=wait)
+
+
+# executor used by `auto_diff_async` when none is given, created on first use
+_default_executor = None
+_default_lock = threading.Lock()
+
+
+def configure(max_workers: int = None, max_concurrency: int = None) -> GradientExecutor:
+    """replaces the default executor of `auto_diff_async`
+
+    Parameters
+    ----------
+    max_workers : int, optional
+        number of worker threads, by default the ThreadPoolExecutor default
+    max_concurrency : int, optional
+        maximum number of evaluations in flight per event loop, by default unlimited
+
+    Returns
+    -------
+    GradientExecutor
+        the new default executor
+    """
+    global _default_executor
+    with _default_lock:
+        previous = _default_executor
+        _default_executor = GradientExecutor(max_workers=max_workers, max_concurrency=max_concurrency)
+    if previous is not None:
+        previous.shutdown(wait=False)
+    return _default_executor
+
+
+def _get_default_executor() -> GradientExecutor:
+    """returns the default executor, creating it on first use
+    """
+    global _default_executor
+    with _default_lock:
+        if _default_executor is None:
+            _default_executor = GradientExecutor()
+        return _default_executor
+
+
+async def auto_diff_async(fn: Callable, x: Iterable, mode=None, executor: GradientExecutor = None) -> AutoDiffOutput:
+    """awaitable value and gradient of `fn` at `x`, evaluated off the event loop
+
+    Parameters
+    ----------
+    fn : callable
+        function taking one FabTensor per coordinate of `x`, returning a FabTensor or a list
+        of FabTensors
+    x : array
+        point at which `fn` is differentiated
+    mode : AdMode, optional
+        AD mode passed to `auto_diff`, by default None
+    executor : GradientExecutor, optional
+        executor to run on, by default the one set up by `configure`
+
+    Returns
+    -------
+    AutoDiffOutput
+        value and gradient of `fn` at `x`
+    """
+    if executor is None:
+        executor = _get_default_executor()
+    return await executor.auto_diff(fn, x, mode=mode)
@@ -0,0 +1,194 @@
+import concurrent.futures
+import numbers
+from typing import Callable, Iterable
+
+import numpy as np
+
+from .fab_ad_tensor import FabTensor, AdMode, constant
+from .fab_ad_session import fab_ad_session
+from .fab_ad_diff import auto_diff
+
+
+class GradCheckResult:
+    def __init__(self, value: np.ndarray, numerical: np.ndarray, gradients: dict, errors: dict, passed: dict,
+                 rtol: float, atol: float):
+        """init method
+
+        Parameters
+        ----------
+        value : number or array
+            function value at the checked point
+        numerical : array
+            central difference gradient, shape (n,) or (m, n) for m outputs
+        gradients : dict
+            AD mode name -> gradient of the same shape as `numerical`
+        errors : dict
+            AD mode name -> absolute error per coordinate
+        passed : dict
+            AD mode name -> whether every coordinate is within tolerance
+        rtol : float
+            relative tolerance used
+        atol : float
+            absolute tolerance used
+        """
+        self.value = value
+        self.numerical = numerical
+        self.gradients = gradients
+        self.errors = errors
+        self.passed = passed
+        self.success = all(passed.values())
+        self.rtol = rtol
+        self.atol = atol
+
+    def max_error(self, mode: str) -> float:
+        """largest absolute error of the gradient computed in `mode`
+        """
+        return float(np.max(self.errors[mode])) if np.size(self.errors[mode]) else 0.0
+
+    def __str__(self) -> str:
+        """Represents the GradCheckResult as a string, with the worst coordinates per mode
+
+        Returns
+        -------
+        str
+            GradCheckResult as a string
+        """
+        verbatim = f"Gradient check {'passed' if self.success else 'failed'} (rtol={self.rtol}, atol={self.atol})\n"
+        for mode, errors in self.errors.items():
+            verbatim += f"{mode}: {'passed' if self.passed[mode] else 'failed'}, max error {self.max_error(mode)}\n"
+            flat = np.ravel(errors)
+            for idx in np.argsort(flat)[::-1][:5]:
+                coordinate = [int(axis) for axis in np.unravel_index(idx, np.shape(errors))]
+                label = f"x{coordinate[0]}" if len(coordinate) == 1 else f"f{coordinate[0]} w.r.t x{coordinate[1]}"
+                verbatim += f"    {label}: ad {np.ravel(self.gradients[mode])[idx]}" \
+                            f" numerical {np.ravel(self.numerical)[idx]} error {flat[idx]}\n"
+        return verbatim
+
+
+def _stack_outputs(outputs, n_points: int) -> np.ndarray:
+    """returns the values of `outputs` as an (n_points, m) array
+    """
+    if isinstance(outputs, (FabTensor, numbers.Number)):
+        outputs = [outputs]
+    values = [output.value if isinstance(output, FabTensor) else output for output in outputs]
+    return np.stack([np.broadcast_to(np.asarray(value, dtype=float), (n_points,)) for value in values], axis=1)
+
+
+def batched_values(fn: Callable, points: np.ndarray) -> np.ndarray:
+    """evaluates `fn` on all `points` at once
+
+    Every coordinate is passed as one constant holding that coordinate of all the points, so
+    the whole batch is evaluated by NumPy without recording a graph.
+
+    Parameters
+    ----------
+    fn : callable
+        function taking n FabTensors and returning a FabTensor or a list of FabTensors
+    points : array
+        points of shape (n_points, n)
+
+    Returns
+    -------
+    array
+        values of shape (n_points, m)
+    """
+    n_points, n = points.shape
+    return _stack_outputs(fn(*[constant(points[:, idx]) for idx in range(n)]), n_points)
+
+
+def _point_values(fn: Callable, points: np.ndarray) -> np.ndarray:
+    """evaluates `fn` point by point, used when `fn` cannot take a batch
+    """
+    return np.concatenate([_stack_outputs(fn(*[constant(float(value)) for value in point]), 1)
+                           for point in points])
+
+
+def _numerical_gradient(fn: Callable, x: np.ndarray, eps: float, vectorized: bool, processes: int) -> np.ndarray:
+    """central difference gradient of `fn` at `x`, shape (m, n)
+    """
+    n = len(x)
+    steps = eps * np.maximum(1.0, np.abs(x))
+    # rows 0..n-1 step forward, rows n..2n-1 step backward along each coordinate
+    points = np.tile(x, (2 * n, 1))
+    points[np.arange(n), np.arange(n)] += steps
+    points[n + np.arange(n), np.arange(n)] -= steps
+    if vectorized:
+        values = batched_values(fn, points)
+    elif processes is not None and processes > 1:
+        chunks = np.array_split(points, processes)
+        with concurrent.futures.ProcessPoolExecutor(max_workers=processes) as executor:
+            values = np.concatenate(list(executor.map(_point_values, [fn] * len(chunks), chunks)))
+    else:
+        values = _point_values(fn, points)
+    return ((values[:n] - values[n:]) / (2 * steps[:, None])).T
+
+
+def _ad_gradient(fn: Callable, x: np.ndarray, mode: AdMode):
+    """value and gradient of `fn` at `x` in AD `mode`, on an isolated session, gradient of shape (m, n)
+    """
+    n = len(x)
+    with fab_ad_session.isolated(num_inputs=n):
+        inputs = [FabTensor(value=float(value), identifier=f"x{idx}") for idx, value in enumerate(x)]
+        output = fn(*inputs)
+        outputs = output if isinstance(output, list) else [output]
+        value = [tensor.value if isinstance(tensor, FabTensor) else tensor for tensor in outputs]
+        gradient = np.zeros((len(outputs), n))
+        for row, tensor in enumerate(outputs):
+            if isinstance(tensor, FabTensor) and tensor.op != "const":
+                gradient[row] = np.ravel(auto_diff(tensor, mode=mode).gradient)[:n]
+    return value, gradient
+
+
+def check_grad(fn: Callable, x: Iterable, eps: float = 1e-6, rtol: float = 1e-5, atol: float = 1e-7,
+               modes: Iterable = (AdMode.FORWARD, AdMode.REVERSE), vectorized: bool = True,
+               processes: int = None) -> GradCheckResult:
+    """compares forward and reverse mode gradients of `fn` with central differences
+
+    The 2n perturbed points are built as one array and, by default, evaluated in a single
+    vectorized call of `fn` on constant inputs. Functions that cannot run on a batch, e.g.
+    because of Python control flow on values, can be evaluated point by point with
+    ``vectorized=False``, optionally spread over `processes` worker processes (`fn` must then
+    be picklable).
+
+    Parameters
+    ----------
+    fn : callable
+        function taking one FabTensor per coordinate of `x`, returning a FabTensor or a list of
+        FabTensors
+    x : array
+        point at which the gradient is checked
+    eps : float, optional
+        relative finite difference step, by default 1e-6
+    rtol : float, optional
+        relative tolerance, by default 1e-5
+    atol : float, optional
+        absolute tolerance, by default 1e-7
+    modes : iterable, optional
+        AD modes to check, by default forward and reverse
+    vectorized : bool, optional
+        evaluate all perturbed points in one call of `fn`, by default True
+    processes : int, optional
+        number of worker processes for point by point evaluation, by default None (serial)
+
+    Returns
+    -------
+    GradCheckResult
+        gradients, per coordinate errors and the verdict per mode
+    """
+    x = np.asarray(x, dtype=float).ravel()
+    numerical = _numerical_gradient(fn, x, eps, vectorized, processes)
+    gradients, errors, passed = {}, {}, {}
+    value = None
+    for mode in modes:
+        value, gradient = _ad_gradient(fn, x, mode)
+        error = np.abs(gradient - numerical)
+        gradients[mode.value], errors[mode.value] = gradient, error
+        passed[mode.value] = bool(np.all(error <= atol + rtol * np.abs(numerical)))
+    if numerical.shape[0] == 1:
+        # single output: per coordinate vectors rather than 1 x n matrices
+        numerical = numerical[0]
+        gradients = {mode: gradient[0] for mode, gradient in gradients.items()}
+        errors = {mode: error[0] for mode, error in errors.items()}
+        value = value[0] if value is not None else None
+    return GradCheckResult(value=value, numerical=numerical, gradients=gradients, errors=errors, passed=passed,
+                           rtol=rtol, atol=atol)
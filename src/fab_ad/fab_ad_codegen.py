@@ -0,0 +1,457 @@
+import hashlib
+import importlib.util
+import numbers
+import os
+from typing import Callable, Iterable, List, Union
+
+import numpy as np
+
+from .fab_ad_tensor import FabTensor, identity_operand, is_annihilated
+from .fab_ad_session import fab_ad_session
+from .fab_ad_primitive import op_name
+
+
+# primitive -> (value template, partial templates w.r.t each operand, default trailing operands)
+# templates mirror the rules implemented in fab_ad_tensor and fab_ad_math
+_OP_TEMPLATES = {
+    "add": ("{0} + {1}", ("1", "1"), ()),
+    "sub": ("{0} - {1}", ("1", "-1"), ()),
+    "mul": ("{0} * {1}", ("{1}", "{0}"), ()),
+    "pow": ("{0} ** {1}", ("{1} * {0} ** ({1} - 1)", "{out} * np.log({0})"), ()),
+    "sin": ("np.sin({0})", ("np.cos({0})",), ()),
+    "cos": ("np.cos({0})", ("-np.sin({0})",), ()),
+    "tan": ("np.tan({0})", ("1 / np.cos({0}) ** 2",), ()),
+    "arcsin": ("np.arcsin({0})", ("1 / (1 - {0} ** 2) ** 0.5",), ()),
+    "arccos": ("np.arccos({0})", ("-1 / (1 - {0} ** 2) ** 0.5",), ()),
+    "arctan": ("np.arctan({0})", ("1 / (1 + {0} ** 2)",), ()),
+    "sinh": ("np.sinh({0})", ("np.cosh({0})",), ()),
+    "cosh": ("np.cosh({0})", ("np.sinh({0})",), ()),
+    "tanh": ("np.tanh({0})", ("1 / np.cosh({0}) ** 2",), ()),
+    "log": ("np.log({0})", ("1.0 / ({0} * np.log({1}))",), (np.e,)),
+    "sum": ("np.sum({0})", ("np.ones_like({0})",), ()),
+    "absolute": ("np.abs({0})", ("np.sign({0})",), ()),
+    "maximum": ("np.maximum({0}, {1})", ("np.where({0} > {1}, 1.0, np.where({0} == {1}, 0.5, 0.0))",
+                                         "np.where({0} < {1}, 1.0, np.where({0} == {1}, 0.5, 0.0))"), ()),
+    "minimum": ("np.minimum({0}, {1})", ("np.where({0} < {1}, 1.0, np.where({0} == {1}, 0.5, 0.0))",
+                                         "np.where({0} > {1}, 1.0, np.where({0} == {1}, 0.5, 0.0))"), ()),
+    "where": ("np.where({0}, {1}, {2})", ("0.0", "np.where({0}, 1.0, 0.0)", "np.where({0}, 0.0, 1.0)"), ()),
+    "clip": ("np.minimum(np.maximum({0}, {1}), {2})",
+             ("np.where(({0} < {1}) | ({0} > {2}), 0.0, 1.0)", "np.where(({0} < {1}) & ({0} <= {2}), 1.0, 0.0)",
+              "np.where({0} > {2}, 1.0, 0.0)"), ()),
+    "relu": ("np.maximum({0}, 0)", ("np.where({0} > 0, 1.0, 0.0)",), ()),
+}
+
+_HEADER = '''"""Generated by fab_ad.fab_ad_codegen -- do not edit.
+
+{doc}
+"""
+import numpy as np
+
+
+'''
+
+# compiled functions keyed by the hash of their source
+_COMPILED_CACHE = {}
+
+
+def _literal(value) -> str:
+    """returns python source for a constant
+
+    Parameters
+    ----------
+    value : number or np.ndarray
+
+    Returns
+    -------
+    str
+        python expression evaluating to `value`
+    """
+    if isinstance(value, FabTensor):
+        value = value.value
+    if isinstance(value, np.ndarray):
+        if value.ndim == 0:
+            return _literal(value.item())
+        return f"np.array({value.tolist()!r})"
+    if isinstance(value, (bool, np.bool_)):
+        return repr(bool(value))
+    if isinstance(value, numbers.Integral):
+        source = repr(int(value))
+    elif isinstance(value, numbers.Real):
+        source = repr(float(value))
+    elif isinstance(value, numbers.Complex):
+        source = repr(complex(value))
+    else:
+        raise TypeError(f"Cannot generate code for constant of type {type(value)}")
+    if not np.all(np.isfinite(value)):
+        source = f"float({source!r})"
+    return f"({source})" if source.startswith("-") else source
+
+
+def _variable_names(inputs: List[FabTensor]) -> List[str]:
+    """returns argument names for the generated function, reusing identifiers when possible
+
+    Parameters
+    ----------
+    inputs : list of FabTensor
+
+    Returns
+    -------
+    list of str
+        one valid and unique python identifier per input
+    """
+    names = []
+    for idx, tensor in enumerate(inputs):
+        name = tensor.identifier
+        if not name.isidentifier() or name in names or name in ("np", "value", "gradient"):
+            name = f"x{idx}"
+        names.append(name)
+    return names
+
+
+def _topological_order(outputs: List[FabTensor]) -> List[FabTensor]:
+    """returns every tensor reachable from `outputs`, operands before results
+
+    Parameters
+    ----------
+    outputs : list of FabTensor
+
+    Returns
+    -------
+    list of FabTensor
+        tensors in topological order
+    """
+    order, visited = [], set()
+    for output in outputs:
+        stack = [(output, False)]
+        while stack:
+            tensor, expanded = stack.pop()
+            if expanded:
+                order.append(tensor)
+                continue
+            if id(tensor) in visited:
+                continue
+            visited.add(id(tensor))
+            stack.append((tensor, True))
+            for operand in reversed(tensor.operands):
+                if isinstance(operand, FabTensor) and id(operand) not in visited:
+                    stack.append((operand, False))
+    return order
+
+
+class _Emitter(object):
+
+    def __init__(self) -> None:
+        """init method
+        """
+        self.statements = []
+        # expression -> variable already holding it (common-subexpression elimination)
+        self.expressions = {}
+        self.counter = 0
+
+    def assign(self, expression: str, prefix: str = "v", reuse: bool = True) -> str:
+        """emits `name = expression` and returns the name
+
+        Parameters
+        ----------
+        expression : str
+        prefix : str, optional
+            prefix of the new variable name, by default "v"
+        reuse : bool, optional
+            return an existing variable if it already holds `expression`, by default True
+
+        Returns
+        -------
+        str
+            variable name holding `expression`
+        """
+        if reuse and _is_atom(expression):
+            return expression
+        if reuse and expression in self.expressions:
+            return self.expressions[expression]
+        name = f"{prefix}{self.counter}"
+        self.counter += 1
+        self.statements.append((name, expression))
+        if reuse:
+            self.expressions[expression] = name
+        return name
+
+    def product(self, adjoint: str, partial: str) -> str:
+        """emits the contribution `adjoint * partial`, skipping multiplications by one
+
+        Parameters
+        ----------
+        adjoint : str
+        partial : str
+
+        Returns
+        -------
+        str
+            expression or variable holding the product, None if it is identically zero
+        """
+        if _literal_value(partial) == 0 or _literal_value(adjoint) == 0:
+            return None
+        if _literal_value(partial) == 1:
+            return adjoint
+        if _literal_value(adjoint) == 1:
+            return partial
+        if _literal_value(partial) == -1:
+            return self.assign(f"-{adjoint}")
+        if _literal_value(adjoint) == -1:
+            return self.assign(f"-{partial}")
+        return self.assign(f"{adjoint} * {partial}")
+
+    def render(self, returned: str) -> List[str]:
+        """returns source lines of all statements needed by `returned` (dead-code removal)
+
+        Parameters
+        ----------
+        returned : str
+            expression of the return statement
+
+        Returns
+        -------
+        list of str
+            lines of the function body
+        """
+        used = set(_names_in(returned))
+        lines = []
+        for name, expression in reversed(self.statements):
+            if name in used:
+                used.update(_names_in(expression))
+                lines.append(f"    {name} = {expression}")
+        lines.reverse()
+        lines.append(f"    return {returned}")
+        return lines
+
+
+def _literal_value(expression: str):
+    """returns the number written in `expression`, None if it is not a numeric literal
+    """
+    if expression.isidentifier():
+        return None
+    try:
+        return float(expression.replace("(", "").replace(")", ""))
+    except ValueError:
+        return None
+
+
+def _is_atom(expression: str) -> bool:
+    """whether `expression` is a bare name or numeric literal that needs no variable
+    """
+    return expression.isidentifier() or _literal_value(expression) is not None
+
+
+def _tuple(items: List[str]) -> str:
+    """returns python source of a tuple holding `items`
+    """
+    if len(items) == 1:
+        return f"({items[0]},)"
+    return f"({', '.join(items)})"
+
+
+def _names_in(expression: str) -> List[str]:
+    """returns the identifier tokens appearing in `expression`
+    """
+    token, tokens = "", []
+    for char in expression + " ":
+        if char.isalnum() or char == "_":
+            token += char
+        else:
+            if token and token.isidentifier():
+                tokens.append(token)
+            token = ""
+    return tokens
+
+
+def generate_source(output: Union[FabTensor, Iterable[FabTensor]], inputs: Iterable[FabTensor] = None,
+                    name: str = "value_and_grad") -> str:
+    """generates straight-line numpy source computing value and gradient of a traced computation
+
+    The generated function takes one argument per input and returns ``(value, gradients)``
+    where ``gradients`` holds one entry per input. For a list of outputs it returns a tuple
+    of values and a tuple of gradient tuples. Subexpressions shared by several nodes are
+    computed once, nodes independent of the inputs are folded into constants and
+    statements not contributing to the result are dropped.
+
+    Parameters
+    ----------
+    output : FabTensor or list of FabTensor
+        traced computation
+    inputs : list of FabTensor, optional
+        independent variables, by default the session's source tensors the output depends on
+    name : str, optional
+        name of the generated function, by default "value_and_grad"
+
+    Returns
+    -------
+    str
+        source of a python module defining the function
+    """
+    outputs = list(output) if isinstance(output, (list, tuple)) else [output]
+    for tensor in outputs:
+        if not isinstance(tensor, FabTensor):
+            raise TypeError(f"Code can be generated for FabTensor or List of FabTensor, not object of type {type(tensor)}")
+    order = _topological_order(outputs)
+    if inputs is None:
+        reachable = {id(tensor) for tensor in order}
+        inputs = [tensor for tensor in fab_ad_session.src_tensors
+                  if id(tensor) in reachable and np.any(tensor.derivative)]
+    inputs = list(inputs)
+    arg_names = _variable_names(inputs)
+
+    emitter = _Emitter()
+    names = {id(tensor): arg_name for tensor, arg_name in zip(inputs, arg_names)}
+    active = set(names)
+    aliases = {}
+
+    def operand_source(operand) -> str:
+        if isinstance(operand, FabTensor):
+            return names[id(operand)]
+        return _literal(operand)
+
+    # forward sweep
+    for tensor in order:
+        if id(tensor) in names:
+            continue
+        # operands that do not depend on the inputs take part in simplification as plain values
+        folded = tuple(operand if isinstance(operand, FabTensor) and id(operand) in active else
+                       getattr(operand, "value", operand) for operand in tensor.operands)
+        if tensor.op not in _OP_TEMPLATES and any(isinstance(operand, FabTensor) for operand in folded):
+            raise TypeError(f"Cannot generate code for primitive {op_name(tensor.op)!r}")
+        if tensor.op not in _OP_TEMPLATES or is_annihilated(tensor.op, folded):
+            # leaf or subgraph independent of the inputs: fold into a constant
+            names[id(tensor)] = _literal(tensor.value)
+            continue
+        alias = identity_operand(tensor.op, folded)
+        if alias is not None:
+            # identity such as `x * 1` left in graphs traced without simplification
+            aliases[id(tensor)] = alias
+            names[id(tensor)] = names[id(alias)]
+            active.add(id(tensor))
+            continue
+        value_template, _, defaults = _OP_TEMPLATES[tensor.op]
+        operands = tensor.operands + defaults[len(tensor.operands) - 1:] if defaults else tensor.operands
+        names[id(tensor)] = emitter.assign(value_template.format(*map(operand_source, operands)))
+        active.add(id(tensor))
+
+    # reverse sweep, one per output
+    gradients = []
+    for output_tensor in outputs:
+        pending = {id(output_tensor): ["1.0"]}
+        for tensor in reversed(order):
+            terms = pending.pop(id(tensor), None)
+            if terms is None or id(tensor) not in active or not tensor.operands:
+                if terms is not None:
+                    pending[id(tensor)] = terms
+                continue
+            if id(tensor) in aliases:
+                pending.setdefault(id(aliases[id(tensor)]), []).extend(terms)
+                continue
+            adjoint = terms[0] if len(terms) == 1 else emitter.assign(" + ".join(terms), prefix="g", reuse=False)
+            _, partial_templates, defaults = _OP_TEMPLATES[tensor.op]
+            operands = tensor.operands + defaults[len(tensor.operands) - 1:] if defaults else tensor.operands
+            sources = [operand_source(operand) for operand in operands]
+            for operand, partial_template in zip(operands, partial_templates):
+                if not isinstance(operand, FabTensor) or id(operand) not in active:
+                    continue
+                partial = emitter.assign(partial_template.format(*sources, out=names[id(tensor)]), prefix="t")
+                term = emitter.product(adjoint, partial)
+                if term is not None:
+                    pending.setdefault(id(operand), []).append(term)
+        row = []
+        for tensor in inputs:
+            terms = pending.get(id(tensor), ["0.0"])
+            row.append(terms[0] if len(terms) == 1 else emitter.assign(" + ".join(terms), prefix="g", reuse=False))
+        gradients.append(_tuple(row))
+
+    values = [names[id(tensor)] for tensor in outputs]
+    if isinstance(output, (list, tuple)):
+        returned = f"{_tuple(values)}, {_tuple(gradients)}"
+    else:
+        returned = f"{values[0]}, {gradients[0]}"
+
+    doc = "\n".join(f"f{idx} = {tensor.identifier}" for idx, tensor in enumerate(outputs))
+    lines = [f"def {name}({', '.join(arg_names)}):"]
+    lines.append(f'    """value and gradient w.r.t ({", ".join(arg_names)})"""')
+    lines.extend(emitter.render(returned))
+    return _HEADER.format(doc=doc) + "\n".join(lines) + "\n"
+
+
+def compile_gradient(output: Union[FabTensor, Iterable[FabTensor]], inputs: Iterable[FabTensor] = None,
+                     name: str = "value_and_grad") -> Callable:
+    """compiles the generated source of `output` into a python function
+
+    Parameters
+    ----------
+    output : FabTensor or list of FabTensor
+        traced computation
+    inputs : list of FabTensor, optional
+        independent variables, by default the session's source tensors the output depends on
+    name : str, optional
+        name of the generated function, by default "value_and_grad"
+
+    Returns
+    -------
+    callable
+        function returning value and gradient without any fab_ad objects involved
+    """
+    source = generate_source(output, inputs=inputs, name=name)
+    key = hashlib.sha1(source.encode()).hexdigest()
+    if key not in _COMPILED_CACHE:
+        namespace = {}
+        exec(compile(source, f"<fab_ad_codegen {key[:8]}>", "exec"), namespace)
+        _COMPILED_CACHE[key] = namespace[name]
+    return _COMPILED_CACHE[key]
+
+
+def export_module(output: Union[FabTensor, Iterable[FabTensor]], path: str, inputs: Iterable[FabTensor] = None,
+                  name: str = "value_and_grad") -> str:
+    """writes the generated source of `output` to an importable `.py` module
+
+    The file is only rewritten when its content changes, so that the interpreter's bytecode
+    cache stays valid across runs.
+
+    Parameters
+    ----------
+    output : FabTensor or list of FabTensor
+        traced computation
+    path : str
+        destination file, should end with ".py"
+    inputs : list of FabTensor, optional
+        independent variables, by default the session's source tensors the output depends on
+    name : str, optional
+        name of the generated function, by default "value_and_grad"
+
+    Returns
+    -------
+    str
+        path of the written module
+    """
+    source = generate_source(output, inputs=inputs, name=name)
+    if os.path.exists(path):
+        with open(path) as fh:
+            if fh.read() == source:
+                return path
+    with open(path, "w") as fh:
+        fh.write(source)
+    return path
+
+
+def load_module(path: str):
+    """imports a module written by `export_module`
+
+    Parameters
+    ----------
+    path : str
+        path of the generated module
+
+    Returns
+    -------
+    module
+        the imported module
+    """
+    module_name = os.path.splitext(os.path.basename(path))[0]
+    spec = importlib.util.spec_from_file_location(module_name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
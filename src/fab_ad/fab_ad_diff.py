@@ -2,12 +2,14 @@ import numbers
 import numpy as np
 from typing import Union, Iterable
 
-from fab_ad_tensor import FabTensor, AdMode
-from fab_ad_session import fab_ad_session
+from .fab_ad_tensor import FabTensor, AdMode
+from .fab_ad_session import fab_ad_session
+from .fab_ad_graph import activity
 
 
 class AutoDiffOutput:
-    def __init__(self, value: Union[numbers.Number, Iterable], gradient: Union[numbers.Number, Iterable]):
+    def __init__(self, value: Union[numbers.Number, Iterable], gradient: Union[numbers.Number, Iterable],
+                 outputs: Union[FabTensor, list] = None, inputs: list = None):
         """init method
 
         Parameters
@@ -16,46 +18,72 @@ class AutoDiffOutput:
             intial function value
         gradient : array
             gradient w.r.t all seed vectors
+        outputs : FabTensor or list of FabTensor, optional
+            differentiated tensors, used to format the output
+        inputs : list of FabTensor, optional
+            independent variables the gradient is taken w.r.t, used to format the output; the
+            list is referenced, not copied
         """
         self.value = value
         self.gradient = gradient
+        self._outputs = outputs
+        self._inputs = inputs
+        self._n_inputs = None if inputs is None else len(inputs)
 
     def __str__(self) -> str:
         """Represents the AutoDiffOutput as a string
 
+        Formatted on demand from the tensors captured when the output was computed, so that
+        it does not depend on the state of the session at the time of printing.
+
         Returns
         -------
         str
             AutoDiffOutput as a string
         """
+        if self._inputs is not None:
+            names = [tensor.identifier for tensor in self._inputs[:self._n_inputs]]
+        else:
+            names = [f"x{idx}" for idx in range(len(self.gradient) if np.ndim(self.gradient) else 1)]
         verbatim = ""
-        if len(fab_ad_session.dest_tensors) > 1:
-            for idx, tensor in enumerate(fab_ad_session.dest_tensors):
-                if len(fab_ad_session.src_tensors) == 1:
-                    gradient_str = "\n".join([f"Function {idx} Gradient w.r.t {src_tensor.identifier} = {self.gradient[idx]}" for src_tensor_id, src_tensor in enumerate(fab_ad_session.src_tensors)])
+        if isinstance(self._outputs, list) and len(self._outputs) > 1:
+            for idx, tensor in enumerate(self._outputs):
+                if len(names) == 1:
+                    gradient_str = "\n".join([f"Function {idx} Gradient w.r.t {name} = {self.gradient[idx]}" for name in names])
                 else:
-                    gradient_str = "\n".join([f"Function {idx} Gradient w.r.t {src_tensor.identifier} = {self.gradient[idx][src_tensor_id]}" for src_tensor_id, src_tensor in enumerate(fab_ad_session.src_tensors)])
+                    gradient_str = "\n".join([f"Function {idx} Gradient w.r.t {name} = {self.gradient[idx][name_id]}" for name_id, name in enumerate(names)])
                 verbatim += f"Function {idx}: Value: {tensor.value}\n{gradient_str}\n"
         else:
-            if len(fab_ad_session.src_tensors) == 1:
-                gradient_str = "\n".join(
-                    [f"Gradient w.r.t {src_tensor.identifier} = {self.gradient}" for src_tensor_id, src_tensor in
-                     enumerate(fab_ad_session.src_tensors)])
+            if len(names) == 1:
+                gradient_str = "\n".join([f"Gradient w.r.t {name} = {self.gradient}" for name in names])
             else:
-                gradient_str = "\n".join(
-                    [f"Gradient w.r.t {src_tensor.identifier} = {self.gradient[src_tensor_id]}" for
-                     src_tensor_id, src_tensor in enumerate(fab_ad_session.src_tensors)])
+                gradient_str = "\n".join([f"Gradient w.r.t {name} = {self.gradient[name_id]}" for name_id, name in enumerate(names)])
             verbatim += f"Function 0: Value: {self.value}\n{gradient_str}\n"
 
         return verbatim
 
 
-def auto_diff(output: Union[Iterable, FabTensor], mode=None) -> AutoDiffOutput:
+def _buffers(out: tuple) -> tuple:
+    """checks that `out` is a (values, jacobian) pair of arrays
+    """
+    if not isinstance(out, tuple) or len(out) != 2 or not all(isinstance(buffer, np.ndarray) for buffer in out):
+        raise TypeError(f"out must be a (values, jacobian) tuple of arrays, not {out!r}")
+    return out
+
+
+def auto_diff(output: Union[Iterable, FabTensor], mode=None, inputs: Iterable[FabTensor] = None,
+              out: tuple = None) -> AutoDiffOutput:
     """returns gradient in either forward or reverse mode
 
         Parameters
         ----------
         output : FabTensor
+        inputs : list of FabTensor, optional
+            reverse mode only: independent variables to differentiate w.r.t, by default all
+            of the session's source tensors
+        out : tuple, optional
+            (values, jacobian) arrays of the shapes of the result's value and gradient, filled
+            in place and returned in the result instead of newly allocated arrays
 
         Returns
         -------
@@ -63,33 +91,50 @@ def auto_diff(output: Union[Iterable, FabTensor], mode=None) -> AutoDiffOutput:
             returns gradient in either forward or reverse mode
         
     """
-    fab_ad_session.dest_tensors = []
+    if inputs is not None and mode != AdMode.REVERSE:
+        raise ValueError("inputs can only be selected in reverse mode")
     if mode == AdMode.FORWARD:
-        result = forward_mode_gradient(output)
+        result = forward_mode_gradient(output, out=out)
         return result
     elif mode == AdMode.REVERSE:
-        result = reverse_mode_gradient(output)
+        result = reverse_mode_gradient(output, inputs=inputs, out=out)
         return result
     elif mode is None:
         n_input_nodes = fab_ad_session.global_tensor_count
         n_output_nodes = len(output) if type(output) is list else 1
         # TODO: improve heuristic for to identify mode
         if n_input_nodes > n_output_nodes:
-            result = forward_mode_gradient(output)
+            result = forward_mode_gradient(output, out=out)
             return result
         else:
-            result = forward_mode_gradient(output)
+            result = forward_mode_gradient(output, out=out)
             return result
     else:
         raise Exception(f"Invalid AD mode: {mode}!")
 
 
-def forward_mode_gradient(output: Union[Iterable, FabTensor]) -> AutoDiffOutput:
+def _forward_row(tensor: FabTensor, n_seeds: int) -> Union[numbers.Number, np.ndarray]:
+    """derivative of `tensor` w.r.t the first `n_seeds` seed vectors, a view of its derivative
+    """
+    if tensor.op == "const":
+        # constants share a single zero row, broadcast it to the shape of a recorded derivative
+        gradient = np.broadcast_to(tensor.derivative, (n_seeds,) + np.shape(tensor.value))
+    else:
+        gradient = tensor.derivative[:n_seeds]
+    return gradient[0] if len(gradient) == 1 else gradient
+
+
+def forward_mode_gradient(output: Union[Iterable, FabTensor], out: tuple = None) -> AutoDiffOutput:
     """returns forward_mode_gradient
 
+        The gradient of a single output is a read-only view of its derivative, nothing is
+        copied; with `out`, values and gradients are written into the given arrays.
+
         Parameters
         ----------
         output : FabTensor
+        out : tuple, optional
+            (values, jacobian) arrays filled in place
 
         Returns
         -------
@@ -97,41 +142,90 @@ def forward_mode_gradient(output: Union[Iterable, FabTensor]) -> AutoDiffOutput:
             returns gradient in forward mode
         
     """
+    n_seeds = fab_ad_session.global_tensor_count + 1
     if isinstance(output, FabTensor):
-        fab_ad_session.dest_tensors.append(output)
-        gradient = output.derivative[:fab_ad_session.global_tensor_count + 1]
-        if len(gradient) == 1:
-            gradient = gradient[0]
+        value, gradient = output.value, _forward_row(output, n_seeds)
+        if out is not None:
+            value, gradient = _buffers(out)
+            value[...] = output.value
+            gradient[...] = _forward_row(output, n_seeds)
+        elif isinstance(gradient, np.ndarray):
+            gradient.flags.writeable = False
+        fab_ad_session._dest_tensors = (output,)
         return AutoDiffOutput(
-            value=output.value,
+            value=value,
             gradient=gradient,
+            outputs=output,
+            inputs=fab_ad_session.src_tensors,
         )
     elif isinstance(output, list):
-        value = []
-        gradient = []
         for tensor in output:
-            assert isinstance(tensor, FabTensor)
-            fab_ad_session.dest_tensors.append(tensor)
-            _gradient = tensor.derivative[:fab_ad_session.global_tensor_count + 1]
-            if len(_gradient) == 1:
-                _gradient = _gradient[0]
-            value.append(tensor.value)
-            gradient.append(_gradient)
+            if not isinstance(tensor, FabTensor):
+                raise TypeError(f"Gradient can be computed on either List of FabTensor or FabTensor, not List of {type(tensor)}")
+        if out is not None:
+            value, gradient = _buffers(out)
+            for idx, tensor in enumerate(output):
+                value[idx] = tensor.value
+                gradient[idx] = _forward_row(tensor, n_seeds)
+        else:
+            value = np.array([tensor.value for tensor in output])
+            gradient = np.array([_forward_row(tensor, n_seeds) for tensor in output])
+        fab_ad_session._dest_tensors = output
         return AutoDiffOutput(
-            value=np.array(value),
-            gradient=np.array(gradient)
+            value=value,
+            gradient=gradient,
+            outputs=output,
+            inputs=fab_ad_session.src_tensors,
         )
     else:
         raise TypeError(f"Gradient can be computed on either List of FabTensor or FabTensor, not object of type {type(output)}")
 
 
-def reverse_mode_gradient_util(tensor, path_value=1):
+def _tape_order(tensor: FabTensor) -> Iterable[FabTensor]:
+    """returns the recorded tensors `tensor` may depend on, from `tensor` backwards
+
+    Tensors are recorded in creation order, so walking the tape backwards from `tensor`
+    visits every tensor after all the tensors that use it.
+
+    Parameters
+    ----------
+    tensor : FabTensor
+
+    Returns
+    -------
+    iterable
+        tensors in reverse topological order
+    """
+    tape = fab_ad_session.all_tensors
+    if tensor.tape_id is not None and tensor.tape_id < len(tape) and tape[tensor.tape_id] is tensor:
+        return (tape[idx] for idx in range(tensor.tape_id, -1, -1))
+    # tensor recorded by an earlier session: order its ancestors explicitly
+    order, visited, stack = [], set(), [(tensor, False)]
+    while stack:
+        node, expanded = stack.pop()
+        if expanded:
+            order.append(node)
+        elif id(node) not in visited:
+            visited.add(id(node))
+            stack.append((node, True))
+            stack.extend((source_tensor, False) for source_tensor, _ in node.source)
+    return reversed(order)
+
+
+def reverse_mode_gradient_util(tensor, path_value=1, active: set = None):
     """util for reverse_mode_gradient
 
+        Seeds the adjoint of `tensor` with `path_value` and accumulates adjoints of all
+        tensors it depends on in a single sweep over the tape, over the session's
+        `StructTape` arrays when it records one.
+
         Parameters
         ----------
         tensor : FabTensor
         path_value : gradient for specific path value
+        active : set, optional
+            ids of the tensors found by `fab_ad_graph.activity`; adjoints are only propagated
+            into these, by default into every tensor
 
         Returns
         -------
@@ -139,21 +233,81 @@ def reverse_mode_gradient_util(tensor, path_value=1):
             returns gradient util in reverse mode
         
     """
-    for source_tensor, local_gradient in tensor.source:
-        new_path_value = path_value * local_gradient
-        # print(f"Adding gradient {new_path_value} to tensor {source_tensor}")
-        source_tensor.gradient += new_path_value
-        reverse_mode_gradient_util(source_tensor, new_path_value)
+    if tensor.adjoint_slot is not None and tensor.adjoint_slot[0] is not fab_ad_session.adjoints:
+        # tensor recorded by an earlier session keeps its adjoints in that session's store
+        tensor.adjoint_slot[0].fill(0)
+    tape = fab_ad_session.struct_tape
+    if active is None and tape is not None and tape.valid and tensor.adjoint_slot is not None \
+            and tensor.adjoint_slot[0] is fab_ad_session.adjoints and np.ndim(path_value) == 0:
+        # scalar graph mirrored in the struct-of-arrays tape: adjoint rows are tape ids
+        tape.backward(tensor.tape_id, path_value, fab_ad_session.adjoints.buffers[()])
+        return
+    tensor.accumulate_gradient(path_value)
+    for node in _tape_order(tensor):
+        if not node.source:
+            continue
+        store, shape, row = node.adjoint_slot
+        adjoint = store.buffers[shape][row]
+        if not (adjoint.any() if shape else adjoint):
+            continue
+        for source_tensor, local_gradient in node.source:
+            if active is not None and id(source_tensor) not in active:
+                # not varied by the requested inputs: its adjoint is never read
+                continue
+            source_store, source_shape, source_row = source_tensor.adjoint_slot
+            # linear algebra primitives record their vector-Jacobian product instead of a partial
+            contribution = local_gradient(adjoint) if callable(local_gradient) else adjoint * local_gradient
+            if source_shape or isinstance(contribution, np.ndarray):
+                source_store.accumulate(source_shape, source_row, contribution)
+            else:
+                # scalar fast path: in-place update of one buffer element
+                source_store.buffers[source_shape][source_row] += contribution
+
+
+def _input_gradients(inputs: list, out: np.ndarray = None) -> Union[numbers.Number, Iterable]:
+    """returns a copy of the reverse mode gradients of `inputs`, written into `out` if given
+    """
+    if out is not None:
+        if len(inputs) > 1:
+            for idx, input_tensor in enumerate(inputs):
+                out[idx] = input_tensor.gradient
+        else:
+            out[...] = inputs[0].gradient
+        return out
+    if len(inputs) > 1:
+        gradients = [input_tensor.gradient for input_tensor in inputs]
+        if len({np.shape(gradient) for gradient in gradients}) > 1:
+            # inputs of different shapes, e.g. a matrix and a vector
+            return [np.copy(gradient) for gradient in gradients]
+        return np.array(gradients)
+    return np.copy(inputs[0].gradient)
 
 
-def reverse_mode_gradient(output: Union[Iterable, FabTensor]) -> AutoDiffOutput:
-    for tensor in fab_ad_session.all_tensors:
-        tensor.zero_grad()
+def _active_ids(output: FabTensor, inputs: list) -> Union[set, None]:
+    """ids of the tensors on a path from `inputs` to `output`, None to sweep every tensor
+    """
+    if inputs is fab_ad_session.src_tensors:
+        return None
+    return {id(tensor) for tensor in activity(output, inputs)}
+
+
+def reverse_mode_gradient(output: Union[Iterable, FabTensor], inputs: Iterable[FabTensor] = None,
+                          out: tuple = None) -> AutoDiffOutput:
     """returns reverse_mode_gradient
 
+        When `inputs` is given, an activity analysis restricts the sweep to the tensors on a
+        path from `inputs` to the output, so branches that only depend on other variables
+        are not accumulated.
+
         Parameters
         ----------
         output : FabTensor
+        inputs : list of FabTensor, optional
+            independent variables to differentiate w.r.t, by default all of the session's
+            source tensors
+        out : tuple, optional
+            (values, jacobian) arrays filled in place instead of copying the adjoints into
+            new arrays
 
         Returns
         -------
@@ -161,28 +315,41 @@ def reverse_mode_gradient(output: Union[Iterable, FabTensor]) -> AutoDiffOutput:
             returns gradient in reverse mode
         
     """
+    inputs = fab_ad_session.src_tensors if inputs is None else list(inputs)
+    values, jacobian = (None, None) if out is None else _buffers(out)
     if isinstance(output, FabTensor):
-        reverse_mode_gradient_util(output, path_value=1)
-        fab_ad_session.dest_tensors.append(output)
+        fab_ad_session.zero_grad()
+        reverse_mode_gradient_util(output, path_value=1, active=_active_ids(output, inputs))
+        value = output.value
+        if values is not None:
+            values[...] = value
+            value = values
+        fab_ad_session._dest_tensors = (output,)
         return AutoDiffOutput(
-            value=output.value,
-            gradient=np.array([input_tensor.gradient for input_tensor in fab_ad_session.src_tensors]) if len(fab_ad_session.src_tensors) > 1 else fab_ad_session.src_tensors[0].gradient
+            value=value,
+            gradient=_input_gradients(inputs, out=jacobian),
+            outputs=output,
+            inputs=inputs,
         )
     elif isinstance(output, list):
-        value = []
-        gradient = []
-        for output_tensor in output:
-            fab_ad_session.dest_tensors.append(output_tensor)
-            reverse_mode_gradient_util(output_tensor, path_value=1)
-            value.append(output_tensor.value)
-            gradient.append(
-                np.array([input_tensor.gradient for input_tensor in fab_ad_session.src_tensors]) if len(
-                    fab_ad_session.src_tensors) > 1 else fab_ad_session.src_tensors[0].gradient
-            )
+        value = [] if values is None else values
+        gradient = [] if jacobian is None else jacobian
+        for idx, output_tensor in enumerate(output):
+            fab_ad_session.zero_grad()
+            reverse_mode_gradient_util(output_tensor, path_value=1, active=_active_ids(output_tensor, inputs))
+            if values is None:
+                value.append(output_tensor.value)
+                gradient.append(_input_gradients(inputs))
+            else:
+                value[idx] = output_tensor.value
+                # with a single input the row is a scalar, not a view that can be written into
+                _input_gradients(inputs, out=jacobian[idx:idx + 1] if len(inputs) == 1 else jacobian[idx])
+        fab_ad_session._dest_tensors = output
         return AutoDiffOutput(
             value=value,
-            gradient=gradient
+            gradient=gradient,
+            outputs=output,
+            inputs=inputs,
         )
     else:
         raise TypeError(f"Gradient can be computed on either List of FabTensor or FabTensor, not object of type {type(output)}")
-
@@ -0,0 +1,202 @@
+import heapq
+from typing import Iterable, Union
+
+import numpy as np
+
+from .fab_ad_tensor import FabTensor
+from .fab_ad_session import fab_ad_session
+from .fab_ad_graph import _as_outputs, topological_order
+
+
+class JacobianResult:
+    def __init__(self, jacobian: np.ndarray, order: str, n_eliminated: int, n_multiply_adds: int,
+                 forward_multiply_adds: int, reverse_multiply_adds: int):
+        """init method
+
+        Parameters
+        ----------
+        jacobian : array
+            Jacobian of shape (outputs, inputs)
+        order : str
+            elimination order used
+        n_eliminated : int
+            number of intermediate vertices eliminated
+        n_multiply_adds : int
+            multiply-adds spent by the elimination
+        forward_multiply_adds : int
+            multiply-adds of vector forward mode on the same graph, one per edge and input
+        reverse_multiply_adds : int
+            multiply-adds of vector reverse mode on the same graph, one per edge and output
+        """
+        self.jacobian = jacobian
+        self.order = order
+        self.n_eliminated = n_eliminated
+        self.n_multiply_adds = n_multiply_adds
+        self.forward_multiply_adds = forward_multiply_adds
+        self.reverse_multiply_adds = reverse_multiply_adds
+
+    def __str__(self) -> str:
+        """Represents the JacobianResult as a string
+
+        Returns
+        -------
+        str
+            JacobianResult as a string
+        """
+        return f"Jacobian:\n{self.jacobian}\nOrder: {self.order}\nEliminated vertices: {self.n_eliminated}" \
+               f"\nMultiply-adds: {self.n_multiply_adds} (forward mode {self.forward_multiply_adds}," \
+               f" reverse mode {self.reverse_multiply_adds})\n"
+
+
+class LinearizedGraph:
+    def __init__(self, outputs: list):
+        """linearized computational graph of scalar `outputs`, edges weighted by local partials
+
+        Every output gets a sink vertex without successors, so that outputs used by other
+        outputs can be eliminated like any intermediate.
+
+        Parameters
+        ----------
+        outputs : list of FabTensor
+            scalar tensors whose graph is linearized
+        """
+        self.nodes = topological_order(outputs)
+        self.index = {id(node): idx for idx, node in enumerate(self.nodes)}
+        # vertex -> {neighbour: local partial}
+        self.preds = [{} for _ in self.nodes]
+        self.succs = [{} for _ in self.nodes]
+        for vertex, node in enumerate(self.nodes):
+            if np.ndim(node.value) != 0:
+                raise ValueError(f"Vertex elimination supports scalar graphs only, {node.identifier} has shape"
+                                 f" {np.shape(node.value)}")
+            for source_tensor, partial in node.source:
+                if callable(partial) or np.ndim(partial) != 0:
+                    raise ValueError(f"Vertex elimination supports scalar partials only, not those of {node.op}")
+                # operands used twice, e.g. x * x, give a single edge
+                self._add(self.index[id(source_tensor)], vertex, float(partial))
+        self.n_edges = sum(len(preds) for preds in self.preds)
+        # output vertex -> its sink, repeated outputs share one
+        sinks = {}
+        for output in outputs:
+            vertex = self.index[id(output)]
+            if vertex in sinks:
+                continue
+            sinks[vertex] = vertex
+            if not self.preds[vertex] or self.succs[vertex]:
+                # independent variable or consumed by another output
+                self.preds.append({})
+                self.succs.append({})
+                sinks[vertex] = len(self.preds) - 1
+                self._add(vertex, sinks[vertex], 1.0)
+        self.sinks = [sinks[self.index[id(output)]] for output in outputs]
+        sinks = set(self.sinks)
+        self.intermediates = [vertex for vertex in range(len(self.nodes)) if self.preds[vertex] and vertex not in sinks]
+
+    def _add(self, source: int, target: int, partial: float) -> None:
+        """adds `partial` to the weight of the edge from `source` to `target`
+        """
+        weight = self.preds[target].get(source, 0.0) + partial
+        self.preds[target][source] = weight
+        self.succs[source][target] = weight
+
+    def markowitz_degree(self, vertex: int) -> int:
+        """multiply-adds needed to eliminate `vertex`, the product of its in and out degrees
+        """
+        return len(self.preds[vertex]) * len(self.succs[vertex])
+
+    def eliminate(self, vertex: int) -> int:
+        """eliminates `vertex`, connecting each predecessor to each successor by the chain rule
+
+        Parameters
+        ----------
+        vertex : int
+
+        Returns
+        -------
+        int
+            multiply-adds spent
+        """
+        preds, succs = self.preds[vertex], self.succs[vertex]
+        for source in preds:
+            del self.succs[source][vertex]
+        for target in succs:
+            del self.preds[target][vertex]
+        for source, into in preds.items():
+            for target, out in succs.items():
+                self._add(source, target, into * out)
+        cost = len(preds) * len(succs)
+        self.preds[vertex], self.succs[vertex] = {}, {}
+        return cost
+
+
+def _eliminate_markowitz(graph: LinearizedGraph) -> int:
+    """eliminates the intermediates cheapest first, re-ranking neighbours after every step
+    """
+    pending = set(graph.intermediates)
+    heap = [(graph.markowitz_degree(vertex), vertex) for vertex in pending]
+    heapq.heapify(heap)
+    n_multiply_adds = 0
+    while heap:
+        degree, vertex = heapq.heappop(heap)
+        if vertex not in pending or degree != graph.markowitz_degree(vertex):
+            # eliminated already or stale rank, the current one was pushed when it changed
+            continue
+        neighbours = set(graph.preds[vertex]) | set(graph.succs[vertex])
+        n_multiply_adds += graph.eliminate(vertex)
+        pending.discard(vertex)
+        for neighbour in neighbours & pending:
+            heapq.heappush(heap, (graph.markowitz_degree(neighbour), neighbour))
+    return n_multiply_adds
+
+
+_ORDERS = {
+    "markowitz": _eliminate_markowitz,
+    # topological order, the elimination counterpart of forward mode
+    "forward": lambda graph: sum(graph.eliminate(vertex) for vertex in graph.intermediates),
+    # reverse topological order, the elimination counterpart of reverse mode
+    "reverse": lambda graph: sum(graph.eliminate(vertex) for vertex in reversed(graph.intermediates)),
+}
+
+
+def mixed_jacobian(output: Union[FabTensor, Iterable], inputs: Iterable[FabTensor] = None,
+                   order: str = "markowitz") -> JacobianResult:
+    """Jacobian of `output` w.r.t `inputs` by vertex elimination on the recorded graph
+
+    Intermediate vertices of the linearized graph are eliminated one at a time, each
+    predecessor being connected to each successor by the product of the local partials, until
+    only edges from the inputs to the outputs remain: these are the Jacobian entries. The
+    Markowitz order eliminates the vertex with the fewest predecessor-successor pairs first,
+    which preaccumulates chains and narrow subgraphs before they fan out, and typically needs
+    fewer multiply-adds than either pure forward or pure reverse mode.
+
+    Parameters
+    ----------
+    output : FabTensor or list of FabTensor
+        scalar outputs
+    inputs : list of FabTensor, optional
+        independent variables, by default the session's source tensors
+    order : str, optional
+        one of "markowitz", "forward" or "reverse", by default "markowitz"
+
+    Returns
+    -------
+    JacobianResult
+        Jacobian of shape (outputs, inputs) and the multiply-add counts of the elimination and
+        of both pure modes
+    """
+    if order not in _ORDERS:
+        raise ValueError(f"Invalid elimination order: {order}! Choose one of {sorted(_ORDERS)}")
+    outputs = _as_outputs(output)
+    inputs = list(fab_ad_session.src_tensors if inputs is None else inputs)
+    graph = LinearizedGraph(outputs)
+    n_edges = graph.n_edges
+    n_multiply_adds = _ORDERS[order](graph)
+    jacobian = np.zeros((len(outputs), len(inputs)))
+    for row, sink in enumerate(graph.sinks):
+        for column, tensor in enumerate(inputs):
+            vertex = graph.index.get(id(tensor))
+            if vertex is not None:
+                jacobian[row, column] = graph.preds[sink].get(vertex, 0.0)
+    return JacobianResult(jacobian=jacobian, order=order, n_eliminated=len(graph.intermediates),
+                          n_multiply_adds=n_multiply_adds, forward_multiply_adds=n_edges * len(inputs),
+                          reverse_multiply_adds=n_edges * len(outputs))
@@ -0,0 +1,249 @@
+import collections
+import json
+from typing import Iterable, Union
+
+from .fab_ad_tensor import FabTensor
+from .fab_ad_primitive import op_name
+
+
+def _as_outputs(output: Union[FabTensor, Iterable]) -> list:
+    """returns `output` as a list of FabTensors
+    """
+    outputs = [output] if isinstance(output, FabTensor) else list(output)
+    for tensor in outputs:
+        if not isinstance(tensor, FabTensor):
+            raise TypeError(f"Graph can be walked from FabTensor or List of FabTensor, not object of type {type(tensor)}")
+    return outputs
+
+
+def topological_order(output: Union[FabTensor, Iterable]) -> list:
+    """returns every tensor `output` depends on, each after all of its sources
+
+    Parameters
+    ----------
+    output : FabTensor or list of FabTensor
+
+    Returns
+    -------
+    list
+        tensors of the graph in topological order, leaves first
+    """
+    order, visited = [], set()
+    for root in _as_outputs(output):
+        stack = [(root, False)]
+        while stack:
+            node, expanded = stack.pop()
+            if expanded:
+                order.append(node)
+            elif id(node) not in visited:
+                visited.add(id(node))
+                stack.append((node, True))
+                stack.extend((source_tensor, False) for source_tensor, _ in reversed(node.source))
+    return order
+
+
+def activity(output: Union[FabTensor, Iterable], inputs: Iterable[FabTensor]) -> list:
+    """returns the tensors that lie on a path from `inputs` to `output`
+
+    Only these active tensors can carry a nonzero derivative of `output` w.r.t `inputs`;
+    the others are either not varied by `inputs` or not useful to `output`.
+
+    Parameters
+    ----------
+    output : FabTensor or list of FabTensor
+    inputs : list of FabTensor
+        independent variables of interest
+
+    Returns
+    -------
+    list
+        active tensors in topological order, leaves first
+    """
+    varied = {id(tensor) for tensor in inputs}
+    active = []
+    for node in topological_order(output):
+        if id(node) in varied or any(id(source_tensor) in varied for source_tensor, _ in node.source):
+            varied.add(id(node))
+            active.append(node)
+    return active
+
+
+class GraphStats:
+    def __init__(self, output: Union[FabTensor, Iterable]):
+        """structural statistics of the graph recorded for `output`
+
+        Parameters
+        ----------
+        output : FabTensor or list of FabTensor
+            tensors whose graph is analysed
+        """
+        self.outputs = _as_outputs(output)
+        self.nodes = topological_order(self.outputs)
+        index = {id(node): idx for idx, node in enumerate(self.nodes)}
+        # edge fan-out: x * x counts two edges out of x
+        fan_out = [0] * len(self.nodes)
+        consumers = [set() for _ in self.nodes]
+        # longest path from a leaf, in edges
+        levels = [0] * len(self.nodes)
+        self.n_edges = 0
+        for idx, node in enumerate(self.nodes):
+            for source_tensor, _ in node.source:
+                parent = index[id(source_tensor)]
+                fan_out[parent] += 1
+                consumers[parent].add(idx)
+                levels[idx] = max(levels[idx], levels[parent] + 1)
+                self.n_edges += 1
+        self.fan_out = fan_out
+        self.levels = levels
+        self.op_counts = collections.Counter(op_name(node.op) for node in self.nodes)
+        self.depth_histogram = collections.Counter(node.depth for node in self.nodes)
+        self.level_histogram = collections.Counter(levels)
+        self.fan_in_histogram = collections.Counter(len(node.source) for node in self.nodes)
+        self.fan_out_histogram = collections.Counter(fan_out)
+        # interior nodes consumed by more than one node, i.e. subexpressions reused by reference
+        self.n_shared = sum(1 for idx, node in enumerate(self.nodes) if node.source and len(consumers[idx]) > 1)
+        self.critical_path_length = max((levels[index[id(tensor)]] for tensor in self.outputs), default=0)
+
+    @property
+    def n_nodes(self) -> int:
+        """number of tensors in the graph
+        """
+        return len(self.nodes)
+
+    def critical_path(self) -> list:
+        """returns the tensors of a longest path from a leaf to an output
+
+        Returns
+        -------
+        list
+            tensors from the leaf to the output
+        """
+        index = {id(node): idx for idx, node in enumerate(self.nodes)}
+        if not self.nodes:
+            return []
+        node = max(self.outputs, key=lambda tensor: self.levels[index[id(tensor)]])
+        path = [node]
+        while node.source:
+            node = max((source_tensor for source_tensor, _ in node.source),
+                       key=lambda tensor: self.levels[index[id(tensor)]])
+            path.append(node)
+        return path[::-1]
+
+    def as_dict(self) -> dict:
+        """returns the statistics as a JSON serializable dict
+        """
+        def histogram(counter):
+            return {str(key): counter[key] for key in sorted(counter)}
+
+        return {
+            "n_nodes": self.n_nodes,
+            "n_edges": self.n_edges,
+            "n_outputs": len(self.outputs),
+            "op_counts": dict(self.op_counts.most_common()),
+            "depth_histogram": histogram(self.depth_histogram),
+            "level_histogram": histogram(self.level_histogram),
+            "fan_in_histogram": histogram(self.fan_in_histogram),
+            "fan_out_histogram": histogram(self.fan_out_histogram),
+            "n_shared": self.n_shared,
+            "critical_path_length": self.critical_path_length,
+        }
+
+    def __str__(self) -> str:
+        """Represents the GraphStats as a string
+
+        Returns
+        -------
+        str
+            GraphStats as a string
+        """
+        ops = ", ".join(f"{op}: {count}" for op, count in self.op_counts.most_common())
+        return f"Nodes: {self.n_nodes}\nEdges: {self.n_edges}\nOps: {ops}\nShared subexpressions: {self.n_shared}" \
+               f"\nCritical path length: {self.critical_path_length}" \
+               f"\nFan-in: {dict(sorted(self.fan_in_histogram.items()))}" \
+               f"\nFan-out: {dict(sorted(self.fan_out_histogram.items()))}\n"
+
+
+def graph_stats(output: Union[FabTensor, Iterable]) -> GraphStats:
+    """structural statistics of the graph recorded for `output`
+
+    Parameters
+    ----------
+    output : FabTensor or list of FabTensor
+
+    Returns
+    -------
+    GraphStats
+        op counts, depth, level, fan-in and fan-out histograms, shared subexpressions and
+        critical path length
+    """
+    return GraphStats(output)
+
+
+def _label(node: FabTensor, max_length: int = 32) -> str:
+    """short label of a node for exported graphs
+    """
+    if node.source:
+        return op_name(node.op)
+    identifier = str(node.identifier)
+    return identifier if len(identifier) <= max_length else identifier[:max_length - 3] + "..."
+
+
+def to_dot(output: Union[FabTensor, Iterable], name: str = "fab_ad") -> str:
+    """exports the graph recorded for `output` in Graphviz DOT format
+
+    Parameters
+    ----------
+    output : FabTensor or list of FabTensor
+    name : str, optional
+        name of the digraph, by default "fab_ad"
+
+    Returns
+    -------
+    str
+        DOT source, edges point from sources to the tensors computed from them
+    """
+    stats = GraphStats(output)
+    outputs = {id(tensor) for tensor in stats.outputs}
+    index = {id(node): idx for idx, node in enumerate(stats.nodes)}
+    lines = [f"digraph {json.dumps(name)} {{", "    rankdir=BT;"]
+    for idx, node in enumerate(stats.nodes):
+        shape = "doublecircle" if id(node) in outputs else ("box" if not node.source else "ellipse")
+        lines.append(f"    n{idx} [label={json.dumps(_label(node))}, shape={shape}];")
+    for idx, node in enumerate(stats.nodes):
+        for source_tensor, _ in node.source:
+            lines.append(f"    n{index[id(source_tensor)]} -> n{idx};")
+    lines.append("}")
+    return "\n".join(lines) + "\n"
+
+
+def to_json(output: Union[FabTensor, Iterable], indent: int = None) -> str:
+    """exports the graph recorded for `output` and its statistics as JSON
+
+    Parameters
+    ----------
+    output : FabTensor or list of FabTensor
+    indent : int, optional
+        indentation passed to json.dumps, by default None (compact)
+
+    Returns
+    -------
+    str
+        JSON object with "nodes" (id, op, label, depth, level, fan_out, sources), "outputs"
+        (node ids) and "stats"
+    """
+    stats = GraphStats(output)
+    index = {id(node): idx for idx, node in enumerate(stats.nodes)}
+    nodes = [{
+        "id": idx,
+        "op": op_name(node.op),
+        "label": _label(node),
+        "depth": node.depth,
+        "level": stats.levels[idx],
+        "fan_out": stats.fan_out[idx],
+        "sources": [index[id(source_tensor)] for source_tensor, _ in node.source],
+    } for idx, node in enumerate(stats.nodes)]
+    return json.dumps({
+        "nodes": nodes,
+        "outputs": [index[id(tensor)] for tensor in stats.outputs],
+        "stats": stats.as_dict(),
+    }, indent=indent)
@@ -0,0 +1,255 @@
+from typing import Callable, Union
+
+import numpy as np
+
+from .fab_ad_tensor import FabTensor, constant, traced
+
+
+def _is_active(operand) -> bool:
+    """whether `operand` is a FabTensor carrying a derivative, i.e. not a constant
+    """
+    return isinstance(operand, FabTensor) and operand.op != "const"
+
+
+def _value(operand) -> np.ndarray:
+    """value of `operand` as a float array
+    """
+    return np.asarray(operand.value if isinstance(operand, FabTensor) else operand, dtype=float)
+
+
+def _name(operand) -> str:
+    """identifier of `operand`, the shape of constant arrays which may be too large to print
+    """
+    if isinstance(operand, FabTensor) and operand.op != "const":
+        return operand.identifier
+    return f"<{'x'.join(map(str, np.shape(_value(operand)))) or 'scalar'} array>"
+
+
+def _square(value: np.ndarray, name: str) -> np.ndarray:
+    """checks that `value` is a square matrix
+    """
+    if value.ndim != 2 or value.shape[0] != value.shape[1]:
+        raise ValueError(f"{name} expects a square matrix, got an array of shape {value.shape}")
+    return value
+
+
+def _tangent(operand, shape: tuple) -> np.ndarray:
+    """derivative of `operand` w.r.t every seed vector, of shape (k,) + `shape`
+    """
+    derivative = np.asarray(operand.derivative, dtype=float)
+    return np.broadcast_to(derivative, derivative.shape[:1] + shape)
+
+
+def _solve_many(matrix: np.ndarray, rhs: np.ndarray) -> np.ndarray:
+    """solves ``matrix @ x = rhs[i]`` for every leading index i with a single LAPACK call
+    """
+    stacked = np.moveaxis(rhs, 0, 1)
+    shape = stacked.shape
+    solution = np.linalg.solve(matrix, stacked.reshape(shape[0], -1)).reshape(shape)
+    return np.moveaxis(solution, 1, 0)
+
+
+def _shared_vjp(compute: Callable) -> Callable:
+    """memoizes `compute(adjoint)` for the last adjoint it was called with
+
+    The operands of a node are visited with the same adjoint array in one reverse sweep, so
+    work common to their vector-Jacobian products (e.g. the extra solve of `solve`) is done once.
+    """
+    last = [None, None]
+
+    def cached(adjoint):
+        if last[0] is not adjoint:
+            last[0], last[1] = adjoint, compute(adjoint)
+        return last[1]
+    return cached
+
+
+def _result(name: str, operands: tuple, value, derivative, vjps: tuple) -> FabTensor:
+    """builds the result of a linear algebra primitive
+
+    Parameters
+    ----------
+    name : str
+        name used in the identifier
+    operands : tuple
+        operands of the primitive
+    value : number or np.ndarray
+        value of the result
+    derivative : np.ndarray
+        derivative of the result w.r.t every seed vector
+    vjps : tuple
+        vector-Jacobian product w.r.t each operand, mapping the adjoint of the result to the
+        adjoint contribution of the operand; only used for active operands
+
+    Returns
+    -------
+    FabTensor
+        result whose sources carry the vector-Jacobian products as partials
+    """
+    active = [(operand, vjp) for operand, vjp in zip(operands, vjps) if _is_active(operand)]
+    return FabTensor(
+        value=value,
+        derivative=derivative,
+        identifier=f"{name}({', '.join(map(_name, operands))})",
+        mode=active[0][0].mode,
+        source=active,
+        depth=max(operand.depth for operand, _ in active) + 1,
+    )
+
+
+@traced("solve")
+def solve(a: Union[FabTensor, np.ndarray], b: Union[FabTensor, np.ndarray]) -> FabTensor:
+    """solution of the linear system ``a @ x = b`` with updated value and derivative
+
+    The tangent is ``solve(a, db - da @ x)`` and the adjoint of `b` is ``solve(a.T, x_bar)``,
+    from which the adjoint of `a` is ``-b_bar @ x.T``: the reverse sweep costs one extra
+    solve however large the system.
+
+    Parameters
+    ----------
+    a : FabTensor or array
+        square matrix of shape (n, n)
+    b : FabTensor or array
+        right hand side of shape (n,) or (n, m)
+
+    Returns
+    -------
+    FabTensor
+        x of the shape of `b` with updated value and derivative
+    """
+    a_value, b_value = _square(_value(a), "solve"), _value(b)
+    if b_value.ndim not in (1, 2) or b_value.shape[0] != a_value.shape[0]:
+        raise ValueError(f"solve expects a right hand side of shape ({a_value.shape[0]},) or "
+                         f"({a_value.shape[0]}, m), got an array of shape {b_value.shape}")
+    x = np.linalg.solve(a_value, b_value)
+    if not _is_active(a) and not _is_active(b):
+        return constant(x)
+    rhs = 0.0
+    if _is_active(b):
+        rhs = rhs + _tangent(b, b_value.shape)
+    if _is_active(a):
+        rhs = rhs - _tangent(a, a_value.shape) @ x
+    derivative = _solve_many(a_value, rhs)
+    b_adjoint = _shared_vjp(lambda adjoint: np.linalg.solve(a_value.T, adjoint))
+    a_vjp = (lambda adjoint: -np.outer(b_adjoint(adjoint), x)) if x.ndim == 1 else \
+        (lambda adjoint: -b_adjoint(adjoint) @ x.T)
+    return _result("solve", (a, b), x, derivative, (a_vjp, b_adjoint))
+
+
+@traced("inv")
+def inv(a: Union[FabTensor, np.ndarray]) -> FabTensor:
+    """inverse of a square matrix with updated value and derivative
+
+    Prefer `solve` to multiplying by the inverse.
+
+    Parameters
+    ----------
+    a : FabTensor or array
+        square matrix of shape (n, n)
+
+    Returns
+    -------
+    FabTensor
+        inverse of `a` with updated value and derivative
+    """
+    a_value = _square(_value(a), "inv")
+    inverse = np.linalg.inv(a_value)
+    if not _is_active(a):
+        return constant(inverse)
+    derivative = -inverse @ _tangent(a, a_value.shape) @ inverse
+    return _result("inv", (a,), inverse, derivative, (lambda adjoint: -inverse.T @ adjoint @ inverse.T,))
+
+
+@traced("det")
+def det(a: Union[FabTensor, np.ndarray]) -> FabTensor:
+    """determinant of a square matrix with updated value and derivative
+
+    Uses Jacobi's formula ``d det(a) = det(a) tr(inv(a) da)``, so the derivative requires a
+    nonsingular matrix.
+
+    Parameters
+    ----------
+    a : FabTensor or array
+        square matrix of shape (n, n)
+
+    Returns
+    -------
+    FabTensor
+        determinant of `a` with updated value and derivative
+    """
+    a_value = _square(_value(a), "det")
+    determinant = np.linalg.det(a_value)
+    if not _is_active(a):
+        return constant(determinant)
+    # d det(a) / da = det(a) inv(a).T
+    partial = determinant * np.linalg.inv(a_value).T
+    derivative = np.tensordot(_tangent(a, a_value.shape), partial, axes=2)
+    return _result("det", (a,), determinant, derivative, (lambda adjoint: adjoint * partial,))
+
+
+@traced("logdet")
+def logdet(a: Union[FabTensor, np.ndarray]) -> FabTensor:
+    """logarithm of the absolute determinant of a square matrix with updated value and derivative
+
+    The value is computed with ``np.linalg.slogdet``, so it does not overflow for large
+    matrices; the derivative w.r.t `a` is ``inv(a).T``.
+
+    Parameters
+    ----------
+    a : FabTensor or array
+        nonsingular square matrix of shape (n, n)
+
+    Returns
+    -------
+    FabTensor
+        ``log|det(a)|`` with updated value and derivative
+    """
+    a_value = _square(_value(a), "logdet")
+    sign, value = np.linalg.slogdet(a_value)
+    if sign == 0:
+        raise ValueError("logdet is undefined for a singular matrix")
+    if not _is_active(a):
+        return constant(value)
+    partial = np.linalg.inv(a_value).T
+    derivative = np.tensordot(_tangent(a, a_value.shape), partial, axes=2)
+    return _result("logdet", (a,), value, derivative, (lambda adjoint: adjoint * partial,))
+
+
+def _phi(matrix: np.ndarray) -> np.ndarray:
+    """lower triangle of the last two axes of `matrix` with the diagonal halved
+    """
+    lower = np.tril(matrix)
+    return lower - 0.5 * (np.eye(matrix.shape[-1]) * matrix)
+
+
+@traced("cholesky")
+def cholesky(a: Union[FabTensor, np.ndarray]) -> FabTensor:
+    """lower triangular Cholesky factor of a symmetric positive definite matrix with updated value and derivative
+
+    `a` is taken to be symmetric: its tangent is symmetrized, ``dl = l phi(inv(l) da inv(l).T)``
+    with ``phi`` the lower triangle with halved diagonal, and the adjoint of `a` is the
+    symmetric part of ``inv(l).T phi(l.T l_bar) inv(l)``.
+
+    Parameters
+    ----------
+    a : FabTensor or array
+        symmetric positive definite matrix of shape (n, n)
+
+    Returns
+    -------
+    FabTensor
+        l such that ``l @ l.T == a``, with updated value and derivative
+    """
+    a_value = _square(_value(a), "cholesky")
+    factor = np.linalg.cholesky(a_value)
+    if not _is_active(a):
+        return constant(factor)
+    factor_inv = np.linalg.inv(factor)
+    tangent = _tangent(a, a_value.shape)
+    tangent = 0.5 * (tangent + np.swapaxes(tangent, -1, -2))
+    derivative = factor @ _phi(factor_inv @ tangent @ factor_inv.T)
+
+    def a_vjp(adjoint):
+        adjoint = factor_inv.T @ _phi(factor.T @ adjoint) @ factor_inv
+        return 0.5 * (adjoint + adjoint.T)
+    return _result("cholesky", (a,), factor, derivative, (a_vjp,))
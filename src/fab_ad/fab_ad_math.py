@@ -1,15 +1,12 @@
-import math
 import numbers
-import os
-import sys
 from typing import Union
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 import numpy as np
-from fab_ad_tensor import FabTensor
-from constants import _ALLOWED_NUMERICS, _SPECIAL_FUNCTIONS
+from .fab_ad_tensor import FabTensor, constant, traced
+from .constants import _ALLOWED_NUMERICS, _SPECIAL_FUNCTIONS
 
 
+@traced("sin")
 def sin(tensor: Union[FabTensor, numbers.Number, np.ndarray]) -> FabTensor:
     """sin of tensor with updated value and derivative
 
@@ -32,11 +29,12 @@ def sin(tensor: Union[FabTensor, numbers.Number, np.ndarray]) -> FabTensor:
                 (tensor, np.cos(tensor.value))
             ], depth=tensor.depth + 1)
     elif isinstance(tensor, _ALLOWED_NUMERICS):
-        return FabTensor(value=np.sin(tensor), derivative = 0, identifier="sin(input)")
+        return constant(np.sin(tensor))
     else:
         raise TypeError(f"Methods {_SPECIAL_FUNCTIONS} can be used on FabTensor objects and {_ALLOWED_NUMERICS} only!")
 
 
+@traced("cos")
 def cos(tensor: Union[FabTensor, numbers.Number, np.ndarray]) -> FabTensor:
     """cos of tensor with updated value and derivative
 
@@ -59,11 +57,12 @@ def cos(tensor: Union[FabTensor, numbers.Number, np.ndarray]) -> FabTensor:
                 (tensor, -np.sin(tensor.value))
             ], depth=tensor.depth + 1)
     elif isinstance(tensor, _ALLOWED_NUMERICS):
-        return FabTensor(value=np.cos(tensor), derivative=0, identifier="cos(input)")
+        return constant(np.cos(tensor))
     else:
         raise TypeError(f"Methods {_SPECIAL_FUNCTIONS} can be used on FabTensor objects and {_ALLOWED_NUMERICS} only!")
 
 
+@traced("tan")
 def tan(tensor: Union[FabTensor, numbers.Number, np.ndarray]) -> FabTensor:
     """tan of tensor with updated value and derivative
 
@@ -86,7 +85,7 @@ def tan(tensor: Union[FabTensor, numbers.Number, np.ndarray]) -> FabTensor:
                 (tensor, (1 / (np.cos(tensor.value) ** 2)))
             ], depth=tensor.depth + 1)
     elif isinstance(tensor, _ALLOWED_NUMERICS):
-        return FabTensor(value=np.tan(tensor), derivative=0, identifier="tan(input)")
+        return constant(np.tan(tensor))
     else:
         raise TypeError(f"Methods {_SPECIAL_FUNCTIONS} can be used on FabTensor objects and {_ALLOWED_NUMERICS} only!")
 
@@ -136,6 +135,7 @@ def cot(tensor: Union[FabTensor, numbers.Number, np.ndarray]) -> FabTensor:
     return 1 / tan(tensor)
 
 
+@traced("arcsin")
 def arcsin(tensor: Union[FabTensor, numbers.Number, np.ndarray]) -> FabTensor:
     """sin inverse of tensor with updated value and derivative
 
@@ -149,7 +149,7 @@ def arcsin(tensor: Union[FabTensor, numbers.Number, np.ndarray]) -> FabTensor:
         sin inverse of tensor with updated value and derivative
     """
     if isinstance(tensor, FabTensor):
-        if not (-1 <= tensor.value <= 1):
+        if not np.all(np.abs(tensor.value) <= 1):
             raise ValueError("Value of tensor out of range for function arcsin!")
         return FabTensor(
             value=np.arcsin(tensor.value),
@@ -161,13 +161,14 @@ def arcsin(tensor: Union[FabTensor, numbers.Number, np.ndarray]) -> FabTensor:
             ], depth=tensor.depth + 1
         )
     elif isinstance(tensor, _ALLOWED_NUMERICS):
-        if not (-1 <= tensor <= 1):
+        if not np.all(np.abs(tensor) <= 1):
             raise ValueError("Value of tensor out of range for function arcsin!")
-        return FabTensor(value=np.arcsin(tensor), derivative = 0, identifier="sin^{-1}(input)")
+        return constant(np.arcsin(tensor))
     else:
         raise TypeError(f"Methods {_SPECIAL_FUNCTIONS} can be used on FabTensor objects and {_ALLOWED_NUMERICS} only!")
 
 
+@traced("arccos")
 def arccos(tensor: Union[FabTensor, numbers.Number, np.ndarray]) -> FabTensor:
     """cos inverse of tensor with updated value and derivative
 
@@ -181,10 +182,10 @@ def arccos(tensor: Union[FabTensor, numbers.Number, np.ndarray]) -> FabTensor:
         cos inverse of tensor with updated value and derivative
     """
     if isinstance(tensor, FabTensor):
-        if not (-1 <= tensor.value <= 1):
+        if not np.all(np.abs(tensor.value) <= 1):
             raise ValueError("Value of tensor out of range for function arccos!")
         return FabTensor(
-            value=np.arcsin(tensor.value),
+            value=np.arccos(tensor.value),
             derivative=(-1 / ((1 - tensor.value ** 2) ** 0.5)) * tensor.derivative,
             identifier=f"cos^{-1}({tensor.identifier})",
             mode=tensor.mode,
@@ -193,13 +194,14 @@ def arccos(tensor: Union[FabTensor, numbers.Number, np.ndarray]) -> FabTensor:
             ], depth=tensor.depth + 1
         )
     elif isinstance(tensor, _ALLOWED_NUMERICS):
-        if not (-1 <= tensor <= 1):
+        if not np.all(np.abs(tensor) <= 1):
             raise ValueError("Value of tensor out of range for function arccos!")
-        return FabTensor(value=np.arccos(tensor), derivative = 0, identifier="cos^{-1}(input)")
+        return constant(np.arccos(tensor))
     else:
         raise TypeError(f"Methods {_SPECIAL_FUNCTIONS} can be used on FabTensor objects and {_ALLOWED_NUMERICS} only!")
 
 
+@traced("arctan")
 def arctan(tensor: Union[FabTensor, numbers.Number, np.ndarray]) -> FabTensor:
     """tan inverse of tensor with updated value and derivative
 
@@ -223,7 +225,7 @@ def arctan(tensor: Union[FabTensor, numbers.Number, np.ndarray]) -> FabTensor:
             ], depth=tensor.depth + 1
         )
     elif isinstance(tensor, _ALLOWED_NUMERICS):
-        return FabTensor(value=np.arctan(tensor), derivative = 0, identifier="tan^{-1}(input)")
+        return constant(np.arctan(tensor))
     else:
         raise TypeError(f"Methods {_SPECIAL_FUNCTIONS} can be used on FabTensor objects and {_ALLOWED_NUMERICS} only!")
 
@@ -290,6 +292,7 @@ def exp(tensor: Union[FabTensor, numbers.Number, np.ndarray], base: numbers.Numb
     return base ** tensor
 
 
+@traced("sinh")
 def sinh(tensor: Union[FabTensor, numbers.Number, np.ndarray]) -> FabTensor:
     """sinh of tensor with updated value and derivative
 
@@ -313,11 +316,12 @@ def sinh(tensor: Union[FabTensor, numbers.Number, np.ndarray]) -> FabTensor:
             ], depth=tensor.depth + 1
         )
     elif isinstance(tensor, _ALLOWED_NUMERICS):
-        return FabTensor(value=np.sinh(tensor), derivative=0, identifier="sinh(input)")
+        return constant(np.sinh(tensor))
     else:
         raise TypeError(f"Methods {_SPECIAL_FUNCTIONS} can be used on FabTensor objects and {_ALLOWED_NUMERICS} only!")
 
 
+@traced("cosh")
 def cosh(tensor: Union[FabTensor, numbers.Number, np.ndarray]) -> FabTensor:
     """cosh of tensor with updated value and derivative
 
@@ -341,11 +345,12 @@ def cosh(tensor: Union[FabTensor, numbers.Number, np.ndarray]) -> FabTensor:
             ], depth=tensor.depth + 1
         )
     elif isinstance(tensor, _ALLOWED_NUMERICS):
-        return FabTensor(value=np.cosh(tensor), derivative=0, identifier="cosh(input)")
+        return constant(np.cosh(tensor))
     else:
         raise TypeError(f"Methods {_SPECIAL_FUNCTIONS} can be used on FabTensor objects and {_ALLOWED_NUMERICS} only!")
 
 
+@traced("tanh")
 def tanh(tensor: Union[FabTensor, numbers.Number, np.ndarray]) -> FabTensor:
     """tanh of tensor with updated value and derivative
 
@@ -356,7 +361,7 @@ def tanh(tensor: Union[FabTensor, numbers.Number, np.ndarray]) -> FabTensor:
     Returns
     -------
     FabTensor
-        cosh of tensor with updated value and derivative
+        tanh of tensor with updated value and derivative
     """
     if isinstance(tensor, FabTensor):
         return FabTensor(
@@ -369,7 +374,7 @@ def tanh(tensor: Union[FabTensor, numbers.Number, np.ndarray]) -> FabTensor:
             ], depth=tensor.depth + 1
         )
     elif isinstance(tensor, _ALLOWED_NUMERICS):
-        return FabTensor(value=np.cosh(tensor), derivative=0, identifier="tanh(input)")
+        return constant(np.tanh(tensor))
     else:
         raise TypeError(f"Methods {_SPECIAL_FUNCTIONS} can be used on FabTensor objects and {_ALLOWED_NUMERICS} only!")
 
@@ -435,11 +440,12 @@ def logistic(tensor: Union[FabTensor, numbers.Number, np.ndarray]) -> FabTensor:
     if isinstance(tensor, FabTensor):
         return 1 / (1 + exp(-tensor))
     elif isinstance(tensor, _ALLOWED_NUMERICS):
-        return FabTensor(value=1 / (1 + np.exp(-tensor)), derivative=0, identifier=f"logistic({tensor})")
+        return constant(1 / (1 + np.exp(-tensor)))
     else:
         raise TypeError(f"Methods {_SPECIAL_FUNCTIONS} can be used on FabTensor objects and {_ALLOWED_NUMERICS} only!")
 
 
+@traced("log")
 def log(tensor: Union[FabTensor, numbers.Number, np.ndarray], base: numbers.Number = np.e) -> FabTensor:
     """natural logarithm of tensor with updated value and derivative
 
@@ -454,7 +460,7 @@ def log(tensor: Union[FabTensor, numbers.Number, np.ndarray], base: numbers.Numb
         natural log of tensor with updated value and derivative
     """
     if isinstance(tensor, FabTensor):
-        if tensor.value < 0:
+        if np.any(tensor.value < 0):
             raise ValueError("Cannot compute logarithm for FabTensor with negative value!")
         return FabTensor(
             value=np.log(tensor.value),
@@ -466,9 +472,9 @@ def log(tensor: Union[FabTensor, numbers.Number, np.ndarray], base: numbers.Numb
             ], depth=tensor.depth + 1
         )
     elif isinstance(tensor, _ALLOWED_NUMERICS):
-        if tensor < 0.0:
+        if np.any(tensor < 0.0):
             raise ValueError("Value of tensor out of range for function log!")
-        return FabTensor(value=np.log(tensor), derivative=0, identifier="log(input)")
+        return constant(np.log(tensor))
     else:
         raise TypeError(f"Methods {_SPECIAL_FUNCTIONS} can be used on FabTensor objects and {_ALLOWED_NUMERICS} only!")
 
@@ -486,3 +492,277 @@ def sqrt(tensor: Union[FabTensor, numbers.Number, np.ndarray]) -> FabTensor:
         square root of tensor with updated value and derivative
     """
     return tensor ** 0.5
+
+
+@traced("sum")
+def reduce_sum(tensor: Union[FabTensor, numbers.Number, np.ndarray]) -> FabTensor:
+    """sum of all elements of tensor with updated value and derivative
+
+    Parameters
+    ----------
+    tensor : FabTensor
+
+    Returns
+    -------
+    FabTensor
+        scalar sum of the elements of tensor with updated value and derivative
+    """
+    if isinstance(tensor, FabTensor):
+        if np.ndim(tensor.value) == 0:
+            return tensor
+        derivative = np.asarray(tensor.derivative)
+        return FabTensor(
+            value=np.sum(tensor.value),
+            derivative=derivative.reshape(derivative.shape[0], -1).sum(axis=1),
+            identifier=f"sum({tensor.identifier})",
+            mode=tensor.mode,
+            source=[
+                (tensor, np.ones_like(tensor.value, dtype=float)),
+            ], depth=tensor.depth + 1
+        )
+    elif isinstance(tensor, _ALLOWED_NUMERICS):
+        return constant(np.sum(tensor))
+    else:
+        raise TypeError(f"Methods {_SPECIAL_FUNCTIONS} can be used on FabTensor objects and {_ALLOWED_NUMERICS} only!")
+
+
+def _broadcast_derivative(operand, shape: tuple):
+    """derivative of `operand` broadcast to a result of the given value shape
+
+    Derivatives keep the seed vectors on the first axis, so the value axes are aligned behind
+    it before broadcasting; plain numbers have a zero derivative.
+    """
+    if not isinstance(operand, FabTensor):
+        return 0.0
+    derivative = np.asarray(operand.derivative)
+    value_shape = derivative.shape[1:]
+    derivative = derivative.reshape(derivative.shape[:1] + (1,) * (len(shape) - len(value_shape)) + value_shape)
+    return np.broadcast_to(derivative, derivative.shape[:1] + tuple(shape))
+
+
+def _piecewise(name: str, operands: tuple, value, partials: tuple) -> FabTensor:
+    """builds the result of a piecewise primitive from its value and local partials
+
+    Parameters
+    ----------
+    name : str
+        name used in the identifier
+    operands : tuple
+        operands the partials belong to, numbers and constants have no partial
+    value : number or np.ndarray
+        elementwise result
+    partials : tuple
+        local partial of the result w.r.t each operand, broadcast to the shape of `value`
+
+    Returns
+    -------
+    FabTensor
+        result carrying the derivative and source entries of its tensor operands
+    """
+    shape = np.shape(value)
+    # a constant operand, e.g. from `stop_gradient`, takes part as a plain value so that no edge points to it
+    operands = tuple(operand.value if isinstance(operand, FabTensor) and operand.op == "const" else operand
+                     for operand in operands)
+    tensors = [(operand, partial) for operand, partial in zip(operands, partials) if isinstance(operand, FabTensor)]
+    derivative = sum(_broadcast_derivative(operand, shape) * partial for operand, partial in tensors)
+    names = ", ".join(operand.identifier if isinstance(operand, FabTensor) else str(operand) for operand in operands)
+    return FabTensor(
+        value=value,
+        derivative=derivative,
+        identifier=f"{name}({names})",
+        mode=tensors[0][0].mode,
+        source=[(operand, partial) for operand, partial in tensors],
+        depth=max(operand.depth for operand, _ in tensors) + 1,
+    )
+
+
+def _value(operand):
+    """value of a FabTensor, the operand itself otherwise
+    """
+    return operand.value if isinstance(operand, FabTensor) else operand
+
+
+@traced("absolute")
+def absolute(tensor: Union[FabTensor, numbers.Number, np.ndarray]) -> FabTensor:
+    """absolute value of tensor with updated value and derivative
+
+    The subgradient at 0 is 0.
+
+    Parameters
+    ----------
+    tensor : FabTensor
+
+    Returns
+    -------
+    FabTensor
+        elementwise absolute value of tensor with updated value and derivative
+    """
+    if isinstance(tensor, FabTensor):
+        return _piecewise("abs", (tensor,), np.abs(tensor.value), (np.sign(tensor.value),))
+    elif isinstance(tensor, _ALLOWED_NUMERICS):
+        return constant(np.abs(tensor))
+    else:
+        raise TypeError(f"Methods {_SPECIAL_FUNCTIONS} can be used on FabTensor objects and {_ALLOWED_NUMERICS} only!")
+
+
+def _select_partials(first, second, first_wins) -> tuple:
+    """partials of an elementwise selection between two operands, split evenly at ties
+    """
+    first, second = np.asarray(first), np.asarray(second)
+    tie = np.asarray(first == second)
+    partial = np.where(first_wins, 1.0, np.where(tie, 0.5, 0.0))
+    shape = np.broadcast_shapes(first.shape, second.shape)
+    return np.broadcast_to(partial, shape), np.broadcast_to(1.0 - partial, shape)
+
+
+@traced("maximum")
+def maximum(x: Union[FabTensor, numbers.Number, np.ndarray], y: Union[FabTensor, numbers.Number, np.ndarray]) -> FabTensor:
+    """elementwise maximum of two tensors with updated value and derivative
+
+    Where both operands are equal, each receives half of the gradient.
+
+    Parameters
+    ----------
+    x : FabTensor
+    y : FabTensor or number
+
+    Returns
+    -------
+    FabTensor
+        elementwise maximum with updated value and derivative
+    """
+    x_value, y_value = _value(x), _value(y)
+    if not isinstance(x, FabTensor) and not isinstance(y, FabTensor):
+        return constant(np.maximum(x_value, y_value))
+    partials = _select_partials(x_value, y_value, np.asarray(x_value > y_value))
+    return _piecewise("maximum", (x, y), np.maximum(x_value, y_value), partials)
+
+
+@traced("minimum")
+def minimum(x: Union[FabTensor, numbers.Number, np.ndarray], y: Union[FabTensor, numbers.Number, np.ndarray]) -> FabTensor:
+    """elementwise minimum of two tensors with updated value and derivative
+
+    Where both operands are equal, each receives half of the gradient.
+
+    Parameters
+    ----------
+    x : FabTensor
+    y : FabTensor or number
+
+    Returns
+    -------
+    FabTensor
+        elementwise minimum with updated value and derivative
+    """
+    x_value, y_value = _value(x), _value(y)
+    if not isinstance(x, FabTensor) and not isinstance(y, FabTensor):
+        return constant(np.minimum(x_value, y_value))
+    partials = _select_partials(x_value, y_value, np.asarray(x_value < y_value))
+    return _piecewise("minimum", (x, y), np.minimum(x_value, y_value), partials)
+
+
+@traced("where")
+def where(condition: Union[np.ndarray, bool], x: Union[FabTensor, numbers.Number, np.ndarray],
+          y: Union[FabTensor, numbers.Number, np.ndarray]) -> FabTensor:
+    """elementwise selection between two tensors with updated value and derivative
+
+    Unlike a Python ``if``, both branches are evaluated for every element, so a batch taking
+    different branches is differentiated in one pass; the gradient flows only into the
+    selected branch.
+
+    Parameters
+    ----------
+    condition : array of bool
+        where True the result is taken from `x`, elsewhere from `y`, e.g. ``x > 0``
+    x : FabTensor or number
+    y : FabTensor or number
+
+    Returns
+    -------
+    FabTensor
+        elementwise selection with updated value and derivative
+    """
+    condition = np.asarray(_value(condition), dtype=bool)
+    value = np.where(condition, _value(x), _value(y))
+    if not isinstance(x, FabTensor) and not isinstance(y, FabTensor):
+        return constant(value)
+    selected = np.broadcast_to(condition, np.shape(value)).astype(float)
+    return _piecewise("where", (x, y), value, (selected, 1.0 - selected))
+
+
+@traced("clip")
+def clip(tensor: Union[FabTensor, numbers.Number, np.ndarray], lower: Union[FabTensor, numbers.Number, np.ndarray],
+         upper: Union[FabTensor, numbers.Number, np.ndarray]) -> FabTensor:
+    """tensor limited to [lower, upper] elementwise, with updated value and derivative
+
+    The gradient passes through where ``lower <= tensor <= upper`` and goes to the violated
+    bound elsewhere. Bounds with ``lower > upper`` are rejected.
+
+    Parameters
+    ----------
+    tensor : FabTensor
+    lower : FabTensor or number
+    upper : FabTensor or number
+
+    Returns
+    -------
+    FabTensor
+        clipped tensor with updated value and derivative
+    """
+    values = [_value(operand) for operand in (tensor, lower, upper)]
+    if np.any(np.asarray(values[1] > values[2])):
+        raise ValueError("Lower bound of clip must not be greater than its upper bound!")
+    value = np.minimum(np.maximum(*values[:2]), values[2])
+    if not any(isinstance(operand, FabTensor) for operand in (tensor, lower, upper)):
+        return constant(value)
+    above = np.broadcast_to(np.asarray(values[0] > values[2]), np.shape(value))
+    below = np.broadcast_to(np.asarray(values[0] < values[1]), np.shape(value)) & ~above
+    inside = ~(above | below)
+    return _piecewise("clip", (tensor, lower, upper), value,
+                      (inside.astype(float), below.astype(float), above.astype(float)))
+
+
+@traced("relu")
+def relu(tensor: Union[FabTensor, numbers.Number, np.ndarray]) -> FabTensor:
+    """rectified linear unit of tensor with updated value and derivative
+
+    The subgradient at 0 is 0.
+
+    Parameters
+    ----------
+    tensor : FabTensor
+
+    Returns
+    -------
+    FabTensor
+        ``max(tensor, 0)`` elementwise with updated value and derivative
+    """
+    if isinstance(tensor, FabTensor):
+        return _piecewise("relu", (tensor,), np.maximum(tensor.value, 0), (np.asarray(tensor.value > 0, dtype=float),))
+    elif isinstance(tensor, _ALLOWED_NUMERICS):
+        return constant(np.maximum(tensor, 0))
+    else:
+        raise TypeError(f"Methods {_SPECIAL_FUNCTIONS} can be used on FabTensor objects and {_ALLOWED_NUMERICS} only!")
+
+
+def stop_gradient(tensor: Union[FabTensor, numbers.Number, np.ndarray]) -> FabTensor:
+    """value of tensor as a constant, through which no derivative or gradient flows
+
+    Operations on the result fold into constants, so values only used for scaling, logging
+    or control flow carry no derivative arrays and record no graph edges.
+
+    Parameters
+    ----------
+    tensor : FabTensor
+
+    Returns
+    -------
+    FabConstant
+        constant holding the value of tensor
+    """
+    if isinstance(tensor, FabTensor):
+        return constant(tensor.value)
+    elif isinstance(tensor, _ALLOWED_NUMERICS):
+        return constant(tensor)
+    else:
+        raise TypeError(f"Methods {_SPECIAL_FUNCTIONS} can be used on FabTensor objects and {_ALLOWED_NUMERICS} only!")
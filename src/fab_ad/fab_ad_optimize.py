@@ -0,0 +1,382 @@
+import time
+from collections import deque
+from typing import Callable, Iterable, Tuple
+
+import numpy as np
+
+from .fab_ad_tensor import FabTensor
+from .fab_ad_session import fab_ad_session
+from .fab_ad_codegen import compile_gradient
+
+
+class OptimizeResult:
+    def __init__(self, x: np.ndarray, fun: float, grad: np.ndarray, success: bool, message: str,
+                 n_iterations: int, n_evaluations: int, timings: dict):
+        """init method
+
+        Parameters
+        ----------
+        x : array
+            final point
+        fun : float
+            objective value at `x`
+        grad : array
+            gradient at `x`
+        success : bool
+            whether the convergence criterion was met
+        message : str
+            reason for termination
+        n_iterations : int
+            number of iterations performed
+        n_evaluations : int
+            number of objective and gradient evaluations
+        timings : dict
+            seconds spent per phase: "record", "evaluate" and "update"
+        """
+        self.x = x
+        self.fun = fun
+        self.grad = grad
+        self.success = success
+        self.message = message
+        self.n_iterations = n_iterations
+        self.n_evaluations = n_evaluations
+        self.timings = timings
+
+    def __str__(self) -> str:
+        """Represents the OptimizeResult as a string
+
+        Returns
+        -------
+        str
+            OptimizeResult as a string
+        """
+        timings = ", ".join(f"{phase}: {seconds * 1e3:.3f} ms" for phase, seconds in self.timings.items())
+        return f"{self.message}\nx: {self.x}\nValue: {self.fun}\nIterations: {self.n_iterations}" \
+               f"\nEvaluations: {self.n_evaluations}\nTimings: {timings}\n"
+
+
+class RecordedObjective:
+    def __init__(self, fn: Callable, x0: Iterable):
+        """records `fn` once at `x0` and compiles the recorded graph for replay
+
+        `fn` is called with one scalar `FabTensor` per coordinate of `x0` on an isolated
+        session, so the caller's session is left untouched. Replaying evaluates straight-line
+        numpy code, which means Python control flow inside `fn` is frozen at the branch
+        taken at `x0`.
+
+        Parameters
+        ----------
+        fn : callable
+            objective taking `len(x0)` FabTensors and returning a scalar FabTensor
+        x0 : array
+            point at which the objective is recorded
+        """
+        start = time.perf_counter()
+        x0 = np.asarray(x0, dtype=float).ravel()
+        with fab_ad_session.isolated(num_inputs=len(x0)):
+            inputs = [FabTensor(value=float(value), identifier=f"x{idx}") for idx, value in enumerate(x0)]
+            output = fn(*inputs)
+            if not isinstance(output, FabTensor):
+                raise TypeError(f"Objective must return a FabTensor, not object of type {type(output)}")
+            self._value_and_grad = compile_gradient(output, inputs=inputs)
+        self.n_evaluations = 0
+        self.timings = {"record": time.perf_counter() - start, "evaluate": 0.0}
+
+    def __call__(self, x: np.ndarray) -> Tuple[float, np.ndarray]:
+        """value and gradient of the recorded objective at `x`
+
+        Parameters
+        ----------
+        x : array
+
+        Returns
+        -------
+        tuple
+            (value, gradient)
+        """
+        start = time.perf_counter()
+        value, gradient = self._value_and_grad(*x)
+        self.n_evaluations += 1
+        self.timings["evaluate"] += time.perf_counter() - start
+        return float(value), np.array(gradient, dtype=float)
+
+
+def _result(objective: RecordedObjective, x, value, gradient, success, message, n_iterations, start) -> OptimizeResult:
+    """assembles the `OptimizeResult` of a finished run
+    """
+    timings = dict(objective.timings)
+    timings["update"] = max(time.perf_counter() - start - timings["evaluate"], 0.0)
+    return OptimizeResult(x=x, fun=value, grad=gradient, success=success, message=message,
+                          n_iterations=n_iterations, n_evaluations=objective.n_evaluations, timings=timings)
+
+
+def gradient_descent(fn: Callable, x0: Iterable, learn_rate: float = 0.1, n_iter: int = 1000,
+                     tolerance: float = 1e-8) -> OptimizeResult:
+    """minimizes `fn` by gradient descent with a fixed learning rate
+
+    Parameters
+    ----------
+    fn : callable
+        objective taking one scalar FabTensor per coordinate
+    x0 : array
+        starting point
+    learn_rate : float, optional
+        step size, by default 0.1
+    n_iter : int, optional
+        maximum number of iterations, by default 1000
+    tolerance : float, optional
+        stop once every coordinate of a step is at most `tolerance`, by default 1e-8
+
+    Returns
+    -------
+    OptimizeResult
+        final point, value and statistics
+    """
+    return momentum(fn, x0, learn_rate=learn_rate, beta=0.0, n_iter=n_iter, tolerance=tolerance)
+
+
+def momentum(fn: Callable, x0: Iterable, learn_rate: float = 0.1, beta: float = 0.9, n_iter: int = 1000,
+             tolerance: float = 1e-8) -> OptimizeResult:
+    """minimizes `fn` by gradient descent with heavy-ball momentum
+
+    Parameters
+    ----------
+    fn : callable
+        objective taking one scalar FabTensor per coordinate
+    x0 : array
+        starting point
+    learn_rate : float, optional
+        step size, by default 0.1
+    beta : float, optional
+        momentum coefficient, by default 0.9
+    n_iter : int, optional
+        maximum number of iterations, by default 1000
+    tolerance : float, optional
+        stop once every coordinate of a step is at most `tolerance`, by default 1e-8
+
+    Returns
+    -------
+    OptimizeResult
+        final point, value and statistics
+    """
+    objective = RecordedObjective(fn, x0)
+    start = time.perf_counter()
+    x = np.asarray(x0, dtype=float).ravel().copy()
+    velocity = np.zeros_like(x)
+    value, gradient = objective(x)
+    for iteration in range(1, n_iter + 1):
+        velocity = beta * velocity - learn_rate * gradient
+        x += velocity
+        value, gradient = objective(x)
+        if np.all(np.abs(velocity) <= tolerance):
+            return _result(objective, x, value, gradient, True, "Step size below tolerance", iteration, start)
+    return _result(objective, x, value, gradient, False, "Maximum number of iterations reached", n_iter, start)
+
+
+def adam(fn: Callable, x0: Iterable, learn_rate: float = 0.01, beta1: float = 0.9, beta2: float = 0.999,
+         epsilon: float = 1e-8, n_iter: int = 5000, tolerance: float = 1e-8) -> OptimizeResult:
+    """minimizes `fn` with the Adam update rule
+
+    Parameters
+    ----------
+    fn : callable
+        objective taking one scalar FabTensor per coordinate
+    x0 : array
+        starting point
+    learn_rate : float, optional
+        step size, by default 0.01
+    beta1 : float, optional
+        decay rate of the first moment, by default 0.9
+    beta2 : float, optional
+        decay rate of the second moment, by default 0.999
+    epsilon : float, optional
+        numerical stabilizer, by default 1e-8
+    n_iter : int, optional
+        maximum number of iterations, by default 5000
+    tolerance : float, optional
+        stop once every coordinate of a step is at most `tolerance`, by default 1e-8
+
+    Returns
+    -------
+    OptimizeResult
+        final point, value and statistics
+    """
+    objective = RecordedObjective(fn, x0)
+    start = time.perf_counter()
+    x = np.asarray(x0, dtype=float).ravel().copy()
+    first_moment = np.zeros_like(x)
+    second_moment = np.zeros_like(x)
+    value, gradient = objective(x)
+    for iteration in range(1, n_iter + 1):
+        first_moment = beta1 * first_moment + (1 - beta1) * gradient
+        second_moment = beta2 * second_moment + (1 - beta2) * gradient ** 2
+        step = learn_rate * (first_moment / (1 - beta1 ** iteration)) / (
+            np.sqrt(second_moment / (1 - beta2 ** iteration)) + epsilon)
+        x -= step
+        value, gradient = objective(x)
+        if np.all(np.abs(step) <= tolerance):
+            return _result(objective, x, value, gradient, True, "Step size below tolerance", iteration, start)
+    return _result(objective, x, value, gradient, False, "Maximum number of iterations reached", n_iter, start)
+
+
+def _wolfe_line_search(objective: RecordedObjective, x: np.ndarray, value: float, gradient: np.ndarray,
+                       direction: np.ndarray, c1: float = 1e-4, c2: float = 0.9, max_steps: int = 20):
+    """finds a step length satisfying the strong Wolfe conditions (Nocedal & Wright, algorithm 3.5)
+
+    Parameters
+    ----------
+    objective : RecordedObjective
+    x : array
+        current point
+    value : float
+        objective value at `x`
+    gradient : array
+        gradient at `x`
+    direction : array
+        descent direction
+    c1 : float, optional
+        sufficient decrease constant, by default 1e-4
+    c2 : float, optional
+        curvature constant, by default 0.9
+    max_steps : int, optional
+        maximum number of trial steps, by default 20
+
+    Returns
+    -------
+    tuple
+        (step, value, gradient) at the accepted point, step is None if the search failed
+    """
+    slope0 = gradient.dot(direction)
+
+    def phi(step):
+        new_value, new_gradient = objective(x + step * direction)
+        return new_value, new_gradient, new_gradient.dot(direction)
+
+    def zoom(low, high, value_low, slope_low, value_high):
+        for _ in range(max_steps):
+            # quadratic interpolation of phi on [low, high], safeguarded by bisection
+            width = high - low
+            curvature = value_high - value_low - slope_low * width
+            step = low - slope_low * width ** 2 / (2 * curvature) if curvature > 0 else low + 0.5 * width
+            if not min(low, high) + 0.1 * abs(width) <= step <= max(low, high) - 0.1 * abs(width):
+                step = low + 0.5 * width
+            new_value, new_gradient, slope = phi(step)
+            if new_value > value + c1 * step * slope0 or new_value >= value_low:
+                high, value_high = step, new_value
+            else:
+                if abs(slope) <= -c2 * slope0:
+                    return step, new_value, new_gradient
+                if slope * (high - low) >= 0:
+                    high, value_high = low, value_low
+                low, value_low, slope_low = step, new_value, slope
+        return None, value, gradient
+
+    previous_step, previous_value, previous_slope = 0.0, value, slope0
+    step = 1.0
+    for trial in range(max_steps):
+        new_value, new_gradient, slope = phi(step)
+        if new_value > value + c1 * step * slope0 or (trial > 0 and new_value >= previous_value):
+            return zoom(previous_step, step, previous_value, previous_slope, new_value)
+        if abs(slope) <= -c2 * slope0:
+            return step, new_value, new_gradient
+        if slope >= 0:
+            return zoom(step, previous_step, new_value, slope, previous_value)
+        previous_step, previous_value, previous_slope = step, new_value, slope
+        step *= 2.0
+    return None, value, gradient
+
+
+def lbfgs(fn: Callable, x0: Iterable, history: int = 10, n_iter: int = 500, gtol: float = 1e-8,
+          c1: float = 1e-4, c2: float = 0.9) -> OptimizeResult:
+    """minimizes `fn` with limited-memory BFGS and a strong Wolfe line search
+
+    Parameters
+    ----------
+    fn : callable
+        objective taking one scalar FabTensor per coordinate
+    x0 : array
+        starting point
+    history : int, optional
+        number of correction pairs kept, by default 10
+    n_iter : int, optional
+        maximum number of iterations, by default 500
+    gtol : float, optional
+        stop once the largest gradient coordinate is at most `gtol`, by default 1e-8
+    c1 : float, optional
+        sufficient decrease constant of the line search, by default 1e-4
+    c2 : float, optional
+        curvature constant of the line search, by default 0.9
+
+    Returns
+    -------
+    OptimizeResult
+        final point, value and statistics
+    """
+    objective = RecordedObjective(fn, x0)
+    start = time.perf_counter()
+    x = np.asarray(x0, dtype=float).ravel().copy()
+    value, gradient = objective(x)
+    corrections = deque(maxlen=history)
+    for iteration in range(n_iter):
+        if np.max(np.abs(gradient)) <= gtol:
+            return _result(objective, x, value, gradient, True, "Gradient below tolerance", iteration, start)
+        # two-loop recursion for the quasi-Newton direction
+        direction = -gradient
+        alphas = []
+        for s, y, rho in reversed(corrections):
+            alpha = rho * s.dot(direction)
+            direction = direction - alpha * y
+            alphas.append(alpha)
+        if corrections:
+            s, y, _ = corrections[-1]
+            direction = direction * (s.dot(y) / y.dot(y))
+        for (s, y, rho), alpha in zip(corrections, reversed(alphas)):
+            beta = rho * y.dot(direction)
+            direction = direction + s * (alpha - beta)
+        if gradient.dot(direction) >= 0:
+            corrections.clear()
+            direction = -gradient
+        step, new_value, new_gradient = _wolfe_line_search(objective, x, value, gradient, direction, c1=c1, c2=c2)
+        if step is None:
+            return _result(objective, x, value, gradient, False, "Line search failed", iteration, start)
+        s = step * direction
+        y = new_gradient - gradient
+        if s.dot(y) > 1e-12:
+            corrections.append((s, y, 1.0 / s.dot(y)))
+        x = x + s
+        value, gradient = new_value, new_gradient
+    success = np.max(np.abs(gradient)) <= gtol
+    return _result(objective, x, value, gradient, success,
+                   "Gradient below tolerance" if success else "Maximum number of iterations reached", n_iter, start)
+
+
+_METHODS = {
+    "gd": gradient_descent,
+    "momentum": momentum,
+    "adam": adam,
+    "lbfgs": lbfgs,
+}
+
+
+def minimize(fn: Callable, x0: Iterable, method: str = "lbfgs", **options) -> OptimizeResult:
+    """minimizes `fn` starting at `x0`
+
+    Parameters
+    ----------
+    fn : callable
+        objective taking one scalar FabTensor per coordinate and returning a scalar FabTensor
+    x0 : array
+        starting point
+    method : str, optional
+        one of "gd", "momentum", "adam" and "lbfgs", by default "lbfgs"
+    options
+        keyword arguments of the chosen method
+
+    Returns
+    -------
+    OptimizeResult
+        final point, value and statistics
+    """
+    if method not in _METHODS:
+        raise ValueError(f"Invalid optimization method: {method}! Choose from {', '.join(_METHODS)}")
+    return _METHODS[method](fn, x0, **options)
@@ -0,0 +1,269 @@
+import functools
+import multiprocessing
+import os
+import queue
+import threading
+import time
+import traceback
+from typing import Callable, Iterable
+
+import numpy as np
+
+from .fab_ad_stream import stream_gradient
+
+
+class ParallelOutput:
+    def __init__(self, value: float, gradient: np.ndarray, n_workers: int, n_shards: int, n_records: int,
+                 reduction: str, worker_seconds: list):
+        """init method
+
+        Parameters
+        ----------
+        value : float
+            objective summed over all shards
+        gradient : array
+            gradient w.r.t the parameters summed over all shards
+        n_workers : int
+            number of worker processes
+        n_shards : int
+            number of shards evaluated
+        n_records : int
+            number of records evaluated, counted with ``len(shard)`` where available
+        reduction : str
+            all-reduce algorithm used, "ring" or "tree"
+        worker_seconds : list
+            time each worker spent differentiating its shards, excluding the all-reduce
+        """
+        self.value = value
+        self.gradient = gradient
+        self.n_workers = n_workers
+        self.n_shards = n_shards
+        self.n_records = n_records
+        self.reduction = reduction
+        self.worker_seconds = worker_seconds
+
+    def __str__(self) -> str:
+        """Represents the ParallelOutput as a string
+
+        Returns
+        -------
+        str
+            ParallelOutput as a string
+        """
+        return f"Value: {self.value}\nGradient: {self.gradient}\nWorkers: {self.n_workers} ({self.reduction}" \
+               f" all-reduce)\nShards: {self.n_shards}\nRecords: {self.n_records}" \
+               f"\nSlowest worker: {max(self.worker_seconds, default=0.0):.3f} s\n"
+
+
+def _receive(conn, timeout: float, rank: int, peer: int):
+    """receives from `peer`, raising TimeoutError if it is slower than `timeout` seconds
+    """
+    if not conn.poll(timeout):
+        raise TimeoutError(f"Worker {rank} waited more than {timeout} s for worker {peer}")
+    return conn.recv()
+
+
+def _exchange(right, left, chunk: np.ndarray, timeout: float, rank: int, peer: int) -> np.ndarray:
+    """sends `chunk` to the right neighbour while receiving from the left one
+
+    Sending on a thread keeps a ring of messages larger than the pipe buffer from deadlocking.
+    """
+    sender = threading.Thread(target=right.send, args=(chunk,), daemon=True)
+    sender.start()
+    received = _receive(left, timeout, rank, peer)
+    sender.join()
+    return received
+
+
+def _ring_allreduce(vector: np.ndarray, rank: int, timeout: float, n_workers: int, right, left) -> np.ndarray:
+    """sums `vector` over all workers with a reduce-scatter followed by an all-gather on a ring
+
+    Every worker sends and receives ``2 (n - 1) / n`` times the size of the vector, whatever
+    the number of workers.
+    """
+    total = np.array(vector, dtype=float)
+    chunks = np.array_split(total, n_workers)
+    peer = (rank - 1) % n_workers
+    for step in range(n_workers - 1):
+        # after the last step this worker holds the full sum of chunk rank + 1
+        send, receive = (rank - step) % n_workers, (rank - step - 1) % n_workers
+        chunks[receive] += _exchange(right, left, chunks[send], timeout, rank, peer)
+    for step in range(n_workers - 1):
+        send, receive = (rank - step + 1) % n_workers, (rank - step) % n_workers
+        chunks[receive][...] = _exchange(right, left, chunks[send], timeout, rank, peer)
+    return total
+
+
+def _tree_allreduce(vector: np.ndarray, rank: int, timeout: float, parent, children: list) -> np.ndarray:
+    """sums `vector` up a binary tree rooted at worker 0 and broadcasts the sum back down
+
+    Takes ``2 log2(n)`` message latencies, fewer than the ring for small vectors.
+    """
+    total = np.array(vector, dtype=float)
+    for child, conn in children:
+        total += _receive(conn, timeout, rank, child)
+    if parent is not None:
+        parent_rank, conn = parent
+        conn.send(total)
+        total = _receive(conn, timeout, rank, parent_rank)
+    for _, conn in children:
+        conn.send(total)
+    return total
+
+
+def _links(reduction: str, n_workers: int, context) -> list:
+    """connects the workers with pipes and returns each worker's all-reduce function
+    """
+    if reduction == "ring":
+        # pipe r carries messages from worker r to worker r + 1
+        pipes = [context.Pipe(duplex=False) for _ in range(n_workers)]
+        return [functools.partial(_ring_allreduce, n_workers=n_workers, right=pipes[rank][1],
+                                  left=pipes[(rank - 1) % n_workers][0]) for rank in range(n_workers)]
+    parents, children = [None] * n_workers, [[] for _ in range(n_workers)]
+    for child in range(1, n_workers):
+        parent_end, child_end = context.Pipe()
+        parents[child] = ((child - 1) // 2, child_end)
+        children[(child - 1) // 2].append((child, parent_end))
+    return [functools.partial(_tree_allreduce, parent=parents[rank], children=children[rank])
+            for rank in range(n_workers)]
+
+
+def _worker(rank: int, loss: Callable, x: np.ndarray, shards: list, mode, allreduce: Callable, events,
+            heartbeat_interval: float, straggler_timeout: float) -> None:
+    """differentiates the worker's shards, all-reduces the result and reports to the coordinator
+
+    Events put on `events` are ``(kind, rank, payload)`` tuples of kind "heartbeat", "done",
+    "timeout" or "error".
+    """
+    stop = threading.Event()
+
+    def beat():
+        while not stop.wait(heartbeat_interval):
+            events.put(("heartbeat", rank, None))
+
+    threading.Thread(target=beat, name="fab_ad-heartbeat", daemon=True).start()
+    try:
+        start = time.perf_counter()
+        local = stream_gradient(loss, x, shards, mode=mode)
+        seconds = time.perf_counter() - start
+        vector = np.concatenate([[local.value, local.n_records], local.gradient])
+        total = allreduce(vector, rank=rank, timeout=straggler_timeout)
+        # every worker holds the sum, worker 0 reports it
+        events.put(("done", rank, (total if rank == 0 else None, seconds)))
+    except TimeoutError as error:
+        events.put(("timeout", rank, str(error)))
+    except BaseException:
+        events.put(("error", rank, traceback.format_exc()))
+    finally:
+        stop.set()
+
+
+def parallel_gradient(loss: Callable, x: Iterable, shards: Iterable, n_workers: int = None, mode=None,
+                      average: bool = False, reduction: str = "ring", heartbeat_interval: float = 0.5,
+                      heartbeat_timeout: float = 10.0, straggler_timeout: float = 60.0, timeout: float = None,
+                      start_method: str = None) -> ParallelOutput:
+    """value and gradient of a sum of per-shard losses, evaluated by data-parallel worker processes
+
+    Shard i is evaluated by worker ``i % n_workers``, which accumulates its shards one at a
+    time like `stream_gradient`. The workers then all-reduce their partial sums among
+    themselves over local pipes, so the coordinator only receives the global result. No
+    service outside the `multiprocessing` module is involved.
+
+    Parameters
+    ----------
+    loss : callable
+        ``loss(params, shard)`` taking the list of parameter FabTensors and one shard, and
+        returning the shard's loss as a scalar FabTensor; must be picklable for start methods
+        other than "fork"
+    x : array
+        parameter values
+    shards : iterable
+        data shards, each sent to one worker
+    n_workers : int, optional
+        number of worker processes, by default the number of CPUs, at most one per shard
+    mode : AdMode, optional
+        AD mode passed to `auto_diff` for every shard, by default None
+    average : bool, optional
+        divide the totals by the number of records, counted with ``len(shard)``, by default False
+    reduction : str, optional
+        all-reduce algorithm, "ring" (bandwidth optimal) or "tree" (latency optimal), by
+        default "ring"
+    heartbeat_interval : float, optional
+        seconds between the heartbeats of a worker, by default 0.5
+    heartbeat_timeout : float, optional
+        a worker silent for longer is considered lost, by default 10.0
+    straggler_timeout : float, optional
+        longest a worker waits for a peer during the all-reduce, by default 60.0
+    timeout : float, optional
+        overall deadline in seconds, by default None (no deadline)
+    start_method : str, optional
+        multiprocessing start method, by default the platform default
+
+    Returns
+    -------
+    ParallelOutput
+        global value and gradient, and evaluation statistics
+
+    Raises
+    ------
+    TimeoutError
+        if a worker stops sending heartbeats, waits too long for a straggler, or the deadline
+        passes
+    RuntimeError
+        if a worker raises or dies
+    """
+    if reduction not in ("ring", "tree"):
+        raise ValueError(f"Invalid reduction: {reduction}! Choose one of ['ring', 'tree']")
+    x = np.asarray(x, dtype=float).ravel()
+    shards = list(shards)
+    if n_workers is None:
+        n_workers = max(1, min(os.cpu_count() or 1, len(shards)))
+    if n_workers < 1:
+        raise ValueError(f"n_workers must be a positive integer, not {n_workers}")
+    context = multiprocessing.get_context(start_method)
+    events = context.Queue()
+    processes = [context.Process(target=_worker, name=f"fab_ad-worker-{rank}", daemon=True, args=(
+        rank, loss, x, shards[rank::n_workers], mode, allreduce, events, heartbeat_interval, straggler_timeout))
+        for rank, allreduce in enumerate(_links(reduction, n_workers, context))]
+    for process in processes:
+        process.start()
+    deadline = None if timeout is None else time.monotonic() + timeout
+    last_seen = [time.monotonic()] * n_workers
+    finished = {}
+    try:
+        while len(finished) < n_workers:
+            try:
+                kind, rank, payload = events.get(timeout=heartbeat_interval)
+            except queue.Empty:
+                pass
+            else:
+                last_seen[rank] = time.monotonic()
+                if kind == "timeout":
+                    raise TimeoutError(payload)
+                if kind == "error":
+                    raise RuntimeError(f"Worker {rank} failed:\n{payload}")
+                if kind == "done":
+                    finished[rank] = payload
+            now = time.monotonic()
+            for rank, process in enumerate(processes):
+                if rank in finished:
+                    continue
+                if process.exitcode not in (None, 0):
+                    raise RuntimeError(f"Worker {rank} exited with code {process.exitcode}")
+                if now - last_seen[rank] > heartbeat_timeout:
+                    raise TimeoutError(f"Worker {rank} sent no heartbeat for {heartbeat_timeout} s")
+            if deadline is not None and now > deadline:
+                raise TimeoutError(f"Parallel gradient evaluation did not finish within {timeout} s")
+    finally:
+        for process in processes:
+            if len(finished) < n_workers and process.is_alive():
+                process.terminate()
+            process.join()
+        events.close()
+    total = finished[0][0]
+    value, n_records, gradient = float(total[0]), int(round(total[1])), total[2:]
+    if average and n_records:
+        value, gradient = value / n_records, gradient / n_records
+    return ParallelOutput(value=value, gradient=gradient, n_workers=n_workers, n_shards=len(shards),
+                          n_records=n_records, reduction=reduction,
+                          worker_seconds=[finished[rank][1] for rank in range(n_workers)])
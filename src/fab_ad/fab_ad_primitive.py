@@ -0,0 +1,170 @@
+import functools
+import itertools
+from typing import Callable
+
+import numpy as np
+
+from .fab_ad_tensor import FabTensor, constant, is_constant, traced
+from .fab_ad_linalg import _result, _tangent
+
+
+# numbers the op keys of primitives, see `Primitive.__init__`
+_PRIMITIVE_IDS = itertools.count()
+
+
+def op_name(op: str) -> str:
+    """name of the primitive traced as `op`, as shown in identifiers and graph exports
+
+    Parameters
+    ----------
+    op : str
+        op of a recorded tensor
+
+    Returns
+    -------
+    str
+        the name given to a user primitive, `op` itself for built-in operations
+    """
+    if op.startswith("primitive:"):
+        return op[len("primitive:"):].rsplit(":", 1)[0]
+    return op
+
+
+def _value(operand):
+    """value of `operand`, operands that are not FabTensors are passed through
+    """
+    return operand.value if isinstance(operand, FabTensor) else operand
+
+
+class Primitive:
+    def __init__(self, fn: Callable, name: str = None):
+        """init method
+
+        Parameters
+        ----------
+        fn : callable
+            function of plain numbers and arrays returning a number or an array
+        name : str, optional
+            name of the primitive in identifiers and graph exports, by default the name of `fn`
+        """
+        functools.update_wrapper(self, fn)
+        self.fn = fn
+        self.name = name or fn.__name__
+        self.jvps = ()
+        self.vjps = ()
+        # a unique op key, so that neither the simplifier nor CSE mistakes the primitive for a
+        # built-in operation or for another primitive of the same name
+        self.op = f"primitive:{self.name}:{next(_PRIMITIVE_IDS)}"
+        self._traced = traced(self.op)(self._apply)
+
+    def defjvp(self, *rules: Callable) -> "Primitive":
+        """defines the forward mode rule w.r.t each positional argument
+
+        ``rule(tangent, ans, *args)`` maps the tangent of its argument to the tangent of the
+        result ``ans = fn(*args)``. The tangent has a leading axis over the seed vectors, so
+        elementwise rules such as ``tangent * np.cos(x)`` broadcast as written.
+
+        Parameters
+        ----------
+        rules : callable
+            one rule per positional argument, None for arguments that are never differentiated
+
+        Returns
+        -------
+        Primitive
+            the primitive itself
+        """
+        self.jvps = rules
+        return self
+
+    def defvjp(self, *rules: Callable) -> "Primitive":
+        """defines the reverse mode rule w.r.t each positional argument
+
+        ``rule(adjoint, ans, *args)`` maps the adjoint of the result ``ans = fn(*args)`` to the
+        adjoint contribution of its argument.
+
+        Parameters
+        ----------
+        rules : callable
+            one rule per positional argument, None for arguments that are never differentiated
+
+        Returns
+        -------
+        Primitive
+            the primitive itself
+        """
+        self.vjps = rules
+        return self
+
+    def _rule(self, rules: tuple, position: int, kind: str) -> Callable:
+        """rule w.r.t the argument at `position`
+        """
+        rule = rules[position] if position < len(rules) else None
+        if rule is None:
+            raise NotImplementedError(f"{self.name} has no {kind} rule for argument {position},"
+                                      f" define one with def{kind}")
+        return rule
+
+    def _vjp(self, position: int, ans, values: list) -> Callable:
+        """vector-Jacobian product w.r.t the argument at `position`, resolved when the sweep reaches it
+        """
+        def vjp(adjoint):
+            return self._rule(self.vjps, position, "vjp")(adjoint, ans, *values)
+        return vjp
+
+    def _apply(self, *args):
+        """evaluates the primitive and records it as a single node
+        """
+        values = [_value(arg) for arg in args]
+        ans = self.fn(*values)
+        if all(is_constant(arg) for arg in args):
+            return constant(ans)
+        derivative = 0.0
+        for position, arg in enumerate(args):
+            if not is_constant(arg):
+                tangent = _tangent(arg, np.shape(arg.value))
+                derivative = derivative + self._rule(self.jvps, position, "jvp")(tangent, ans, *values)
+        derivative = np.broadcast_to(derivative, np.shape(derivative)[:1] + np.shape(ans))
+        vjps = tuple(self._vjp(position, ans, values) for position in range(len(args)))
+        return _result(self.name, args, ans, derivative, vjps)
+
+    def __call__(self, *args):
+        """applies the primitive to numbers, arrays or FabTensors
+
+        Returns
+        -------
+        FabTensor
+            a single graph node whose derivative and gradient come from the rules, a
+            `FabConstant` when no argument depends on an independent variable
+        """
+        return self._traced(*args)
+
+
+def primitive(fn: Callable = None, name: str = None):
+    """decorator making `fn` a fab_ad primitive with user defined derivative rules
+
+    `fn` is evaluated on plain values and recorded as one node, instead of the subgraph of
+    its operations; its derivatives come from the rules given to ``defjvp`` and ``defvjp``::
+
+        @fab_ad.primitive
+        def softplus(x):
+            return np.log1p(np.exp(x))
+
+        softplus.defjvp(lambda tangent, ans, x: tangent / (1 + np.exp(-x)))
+        softplus.defvjp(lambda adjoint, ans, x: adjoint / (1 + np.exp(-x)))
+
+    Parameters
+    ----------
+    fn : callable
+        function of plain numbers and arrays
+    name : str, optional
+        name of the primitive, by default the name of `fn`
+
+    Returns
+    -------
+    Primitive
+        callable primitive, or a decorator when only `name` is given
+    """
+    if fn is None:
+        return lambda fn: Primitive(fn, name=name)
+    return Primitive(fn, name=name)
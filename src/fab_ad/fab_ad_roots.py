@@ -0,0 +1,385 @@
+import numbers
+from typing import Callable, Iterable, Tuple
+
+import numpy as np
+
+from .fab_ad_tensor import FabTensor, constant, is_constant
+from .fab_ad_session import fab_ad_session
+from .fab_ad_diff import reverse_mode_gradient_util
+from .fab_ad_linalg import _result, _shared_vjp
+
+
+class RootResult:
+    def __init__(self, x: np.ndarray, fun: np.ndarray, jac: np.ndarray, converged: np.ndarray, message: str,
+                 n_iterations: int, n_evaluations: int, n_jacobians: int):
+        """init method
+
+        Parameters
+        ----------
+        x : array
+            final point, with the shape of the starting point: scalar, (n,) or (batch, n)
+        fun : array
+            function value at `x`, same shape as `x`
+        jac : array
+            Jacobian (or its Broyden approximation) at `x`, shape (n, n) or (batch, n, n)
+        converged : array
+            whether each starting point met the tolerance
+        message : str
+            reason for termination
+        n_iterations : int
+            number of iterations performed
+        n_evaluations : int
+            number of function evaluations, each covering the whole batch
+        n_jacobians : int
+            number of evaluations that also computed the Jacobian
+        """
+        self.x = x
+        self.fun = fun
+        self.jac = jac
+        self.converged = converged
+        self.success = bool(np.all(converged))
+        self.message = message
+        self.n_iterations = n_iterations
+        self.n_evaluations = n_evaluations
+        self.n_jacobians = n_jacobians
+
+    def __str__(self) -> str:
+        """Represents the RootResult as a string
+
+        Returns
+        -------
+        str
+            RootResult as a string
+        """
+        return f"{self.message}\nx: {self.x}\nValue: {self.fun}\nIterations: {self.n_iterations}" \
+               f"\nEvaluations: {self.n_evaluations}\nJacobian evaluations: {self.n_jacobians}\n"
+
+
+def _as_batch(x0: Iterable) -> Tuple[np.ndarray, int]:
+    """returns `x0` as a (batch, n) float array and the number of dimensions it had
+    """
+    x = np.array(x0, dtype=float)
+    if x.ndim <= 2:
+        return x.reshape(-1, x.shape[-1] if x.ndim else 1), x.ndim
+    raise ValueError(f"Starting points must be a scalar, a vector or a (batch, n) array, not of shape {x.shape}")
+
+
+def _outputs(fn: Callable, inputs: list, n: int) -> list:
+    """calls `fn` and checks that it returns one output per input
+    """
+    outputs = fn(*inputs)
+    if isinstance(outputs, (FabTensor, numbers.Number)):
+        outputs = [outputs]
+    outputs = list(outputs)
+    if len(outputs) != n:
+        raise ValueError(f"Root finding needs a square system, got {len(outputs)} outputs for {n} inputs")
+    for output in outputs:
+        if not isinstance(output, (FabTensor, numbers.Number)):
+            raise TypeError(f"Function must return FabTensors, not object of type {type(output)}")
+    return outputs
+
+
+def evaluate(fn: Callable, x: np.ndarray) -> np.ndarray:
+    """evaluates `fn` on a batch of points without computing derivatives
+
+    The inputs are passed as constants, so every operation folds to a value and nothing is
+    recorded.
+
+    Parameters
+    ----------
+    fn : callable
+        system taking n FabTensors and returning n FabTensors
+    x : array
+        points of shape (batch, n)
+
+    Returns
+    -------
+    array
+        function values of shape (batch, n)
+    """
+    batch, n = x.shape
+    outputs = _outputs(fn, [constant(x[:, idx]) for idx in range(n)], n)
+    values = [output.value if isinstance(output, FabTensor) else output for output in outputs]
+    return np.stack([np.broadcast_to(np.asarray(value, dtype=float), (batch,)) for value in values], axis=1)
+
+
+def value_and_jacobian(fn: Callable, x: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """evaluates `fn` and its Jacobian on a batch of points in one forward pass
+
+    Every input is a vector valued `FabTensor` holding one coordinate of all the points, so
+    a single trace propagates the derivatives w.r.t all n seed vectors for the whole batch.
+    The trace runs on an isolated session, leaving the caller's session untouched.
+
+    Parameters
+    ----------
+    fn : callable
+        system taking n FabTensors and returning n FabTensors
+    x : array
+        points of shape (batch, n)
+
+    Returns
+    -------
+    tuple
+        values of shape (batch, n) and Jacobians of shape (batch, n, n)
+    """
+    batch, n = x.shape
+    with fab_ad_session.isolated(num_inputs=n):
+        inputs = [FabTensor(value=x[:, idx], identifier=f"x{idx}") for idx in range(n)]
+        outputs = _outputs(fn, inputs, n)
+    values = np.empty((batch, n))
+    jacobian = np.empty((batch, n, n))
+    for row, output in enumerate(outputs):
+        if isinstance(output, FabTensor):
+            values[:, row] = np.broadcast_to(np.asarray(output.value, dtype=float), (batch,))
+            # forward mode derivative of a vector valued tensor has shape (seed vectors, batch)
+            derivative = np.asarray(output.derivative, dtype=float)
+            jacobian[:, row, :] = np.broadcast_to(derivative.reshape(derivative.shape[0], -1), (n, batch)).T
+        else:
+            values[:, row] = output
+            jacobian[:, row, :] = 0.0
+    return values, jacobian
+
+
+def _solve(jacobian: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """solves J dx = -F for every point of the batch, least squares for singular Jacobians
+    """
+    try:
+        return np.linalg.solve(jacobian, -values[..., None])[..., 0]
+    except np.linalg.LinAlgError:
+        return np.stack([np.linalg.lstsq(jac, -value, rcond=None)[0] for jac, value in zip(jacobian, values)])
+
+
+def _converged(values: np.ndarray, step: np.ndarray, x: np.ndarray, tolerance: float) -> np.ndarray:
+    """per point convergence test on the residual and the step
+    """
+    small_residual = np.max(np.abs(values), axis=1) <= tolerance
+    small_step = np.max(np.abs(step) / (1.0 + np.abs(x)), axis=1) <= tolerance
+    return small_residual | small_step
+
+
+def _iterate(fn: Callable, x0: Iterable, broyden_updates: bool, tolerance: float, n_iter: int,
+             jacobian_every: int) -> RootResult:
+    """Newton iteration on a batch with exact Jacobians every `jacobian_every` steps
+
+    In between, the Jacobian is either reused unchanged (chord method) or corrected with
+    Broyden's rank-1 update. Points that converged are frozen and no longer updated.
+    """
+    if jacobian_every is not None and jacobian_every < 1:
+        raise ValueError(f"jacobian_every must be a positive integer or None, not {jacobian_every}")
+    x, ndim = _as_batch(x0)
+    values, jacobian = value_and_jacobian(fn, x)
+    n_evaluations, n_jacobians = 1, 1
+    converged = np.max(np.abs(values), axis=1) <= tolerance
+    message = "Maximum number of iterations reached"
+    iteration = 0
+    for iteration in range(1, n_iter + 1):
+        if np.all(converged):
+            iteration -= 1
+            break
+        active = ~converged
+        step = np.zeros_like(x)
+        step[active] = _solve(jacobian[active], values[active])
+        x = x + step
+        if jacobian_every is not None and iteration % jacobian_every == 0:
+            new_values, jacobian = value_and_jacobian(fn, x)
+            n_jacobians += 1
+        else:
+            new_values = evaluate(fn, x)
+            if broyden_updates:
+                # J <- J + (dF - J dx) dx^T / (dx^T dx), only where a step was taken
+                change = new_values - values - np.einsum("bij,bj->bi", jacobian, step)
+                norm = np.einsum("bi,bi->b", step, step)
+                moved = norm > 0
+                jacobian[moved] += np.einsum("bi,bj->bij", change[moved], step[moved]) / norm[moved, None, None]
+        n_evaluations += 1
+        values = new_values
+        converged = converged | _converged(values, step, x, tolerance)
+    if np.all(converged):
+        message = "Converged"
+    if ndim < 2:
+        # drop the batch axis, and the coordinate axes for a scalar starting point
+        x, values, jacobian, converged = x[0], values[0], jacobian[0], converged[0]
+        if ndim == 0:
+            x, values, jacobian = x[0], values[0], jacobian[0, 0]
+    return RootResult(x=x, fun=values, jac=jacobian, converged=converged, message=message,
+                      n_iterations=iteration, n_evaluations=n_evaluations, n_jacobians=n_jacobians)
+
+
+def newton(fn: Callable, x0: Iterable, tolerance: float = 1e-10, n_iter: int = 50,
+           jacobian_every: int = 1) -> RootResult:
+    """finds a root of the square system `fn` with Newton's method
+
+    Parameters
+    ----------
+    fn : callable
+        system taking n FabTensors and returning n FabTensors (or one for n = 1)
+    x0 : array
+        starting point of shape (n,), or a batch of starting points of shape (batch, n)
+        solved together
+    tolerance : float, optional
+        stop once the residual or the relative step of every point is at most `tolerance`,
+        by default 1e-10
+    n_iter : int, optional
+        maximum number of iterations, by default 50
+    jacobian_every : int, optional
+        recompute the Jacobian every `jacobian_every` iterations and reuse it in between,
+        by default 1 (plain Newton)
+
+    Returns
+    -------
+    RootResult
+        roots, residuals and statistics
+    """
+    return _iterate(fn, x0, broyden_updates=False, tolerance=tolerance, n_iter=n_iter,
+                    jacobian_every=jacobian_every)
+
+
+def broyden(fn: Callable, x0: Iterable, tolerance: float = 1e-10, n_iter: int = 100,
+            jacobian_every: int = None) -> RootResult:
+    """finds a root of the square system `fn` with Broyden's method
+
+    The exact Jacobian is computed at the starting point and then corrected with rank-1
+    updates from function values only.
+
+    Parameters
+    ----------
+    fn : callable
+        system taking n FabTensors and returning n FabTensors (or one for n = 1)
+    x0 : array
+        starting point of shape (n,), or a batch of starting points of shape (batch, n)
+        solved together
+    tolerance : float, optional
+        stop once the residual or the relative step of every point is at most `tolerance`,
+        by default 1e-10
+    n_iter : int, optional
+        maximum number of iterations, by default 100
+    jacobian_every : int, optional
+        recompute the exact Jacobian every `jacobian_every` iterations, by default None (never)
+
+    Returns
+    -------
+    RootResult
+        roots, residuals and statistics
+    """
+    return _iterate(fn, x0, broyden_updates=True, tolerance=tolerance, n_iter=n_iter,
+                    jacobian_every=jacobian_every)
+
+
+_METHODS = {
+    "newton": newton,
+    "broyden": broyden,
+}
+
+
+def find_root(fn: Callable, x0: Iterable, method: str = "newton", **options) -> RootResult:
+    """finds a root of the square system `fn`
+
+    Parameters
+    ----------
+    fn : callable
+        system taking n FabTensors and returning n FabTensors (or one for n = 1)
+    x0 : array
+        starting point of shape (n,), or a batch of starting points of shape (batch, n)
+    method : str, optional
+        one of "newton" or "broyden", by default "newton"
+    options : dict
+        keyword arguments of the chosen method
+
+    Returns
+    -------
+    RootResult
+        roots, residuals and statistics
+    """
+    if method not in _METHODS:
+        raise ValueError(f"Invalid root finding method: {method}! Choose one of {sorted(_METHODS)}")
+    return _METHODS[method](fn, x0, **options)
+
+
+def _residual_jacobians(fn: Callable, x: np.ndarray, params: tuple) -> Tuple[np.ndarray, list]:
+    """Jacobians of the residual `fn` w.r.t its n unknowns and w.r.t each active parameter
+
+    The residual is traced once on an isolated session and swept in reverse once per output.
+
+    Parameters
+    ----------
+    fn : callable
+        residual taking n FabTensors followed by the parameters and returning n FabTensors
+    x : array
+        point of shape (n,)
+    params : tuple
+        parameters, only the active ones are differentiated
+
+    Returns
+    -------
+    tuple
+        Jacobian w.r.t the unknowns of shape (n, n) and, for each active parameter, the
+        Jacobian w.r.t it of shape (n,) + parameter shape
+    """
+    n = len(x)
+    active = [not is_constant(param) for param in params]
+    with fab_ad_session.isolated(num_inputs=n + sum(active)):
+        inputs = [FabTensor(value=x[idx], identifier=f"x{idx}") for idx in range(n)]
+        arguments = [FabTensor(value=param.value, identifier=param.identifier) if is_active else
+                     constant(param.value if isinstance(param, FabTensor) else param)
+                     for param, is_active in zip(params, active)]
+        outputs = _outputs(fn, inputs + arguments, n)
+        variables = [argument for argument, is_active in zip(arguments, active) if is_active]
+        x_jacobian = np.zeros((n, n))
+        param_jacobians = [np.zeros((n,) + np.shape(variable.value)) for variable in variables]
+        for row, output in enumerate(outputs):
+            if not isinstance(output, FabTensor) or output.op == "const":
+                continue
+            fab_ad_session.zero_grad()
+            reverse_mode_gradient_util(output, path_value=1)
+            x_jacobian[row] = [tensor.gradient for tensor in inputs]
+            for jacobian, variable in zip(param_jacobians, variables):
+                jacobian[row] = variable.gradient
+    return x_jacobian, param_jacobians
+
+
+def implicit_root(fn: Callable, solution, *params) -> FabTensor:
+    """differentiable root of ``fn(x, *params) = 0`` from a converged solution
+
+    The derivative of the root w.r.t the parameters follows from the implicit function
+    theorem, ``dx = -inv(F_x) F_p dp``, instead of differentiating through the solver's
+    iterations: only the residual at the solution is traced, and the reverse sweep costs one
+    solve with ``F_x.T`` however many iterations the solver took.
+
+    Parameters
+    ----------
+    fn : callable
+        residual taking n FabTensors (the unknowns) followed by `params` and returning n
+        FabTensors (or one for n = 1)
+    solution : number, array or RootResult
+        converged root of shape () or (n,), e.g. found with `find_root` on the parameter values
+    params : FabTensor or number
+        parameters of the residual, scalar or array valued
+
+    Returns
+    -------
+    FabTensor
+        root with the shape of `solution` whose derivative and gradient are w.r.t `params`
+    """
+    x = np.array(solution.x if isinstance(solution, RootResult) else solution, dtype=float)
+    if x.ndim > 1:
+        raise ValueError(f"implicit_root expects a single solution of shape () or (n,), not of shape {x.shape}")
+    if all(is_constant(param) for param in params):
+        return constant(x if x.ndim else float(x))
+    x_jacobian, param_jacobians = _residual_jacobians(fn, x.reshape(-1), params)
+    active = [param for param in params if not is_constant(param)]
+    # forward mode: solve F_x dx = -F_p dp for every seed vector at once
+    rhs = 0.0
+    for param, jacobian in zip(active, param_jacobians):
+        derivative = np.asarray(param.derivative, dtype=float)
+        derivative = np.broadcast_to(derivative, derivative.shape[:1] + np.shape(param.value))
+        rhs = rhs - np.tensordot(jacobian, derivative, axes=(range(1, jacobian.ndim), range(1, derivative.ndim)))
+    derivative = np.linalg.solve(x_jacobian, rhs).T
+    # reverse mode: one transposed solve shared by the vector-Jacobian products of all parameters
+    multiplier = _shared_vjp(lambda adjoint: np.linalg.solve(x_jacobian.T, np.reshape(adjoint, -1)))
+    vjps = tuple((lambda adjoint, jacobian=jacobian: -np.tensordot(multiplier(adjoint), jacobian, axes=1))
+                 for jacobian in param_jacobians)
+    value = x if x.ndim else float(x)
+    result = _result("implicit_root", tuple(active), value, derivative if x.ndim else derivative[:, 0], vjps)
+    result.op = "implicit_root"
+    result.operands = tuple(params)
+    return result
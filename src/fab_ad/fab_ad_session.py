@@ -1,31 +1,313 @@
+import concurrent.futures
+import contextlib
 import numbers
+import threading
+import warnings
 import numpy as np
 from typing import Iterable, Union
 
-from constants import _MAX_INDEPENDENT_VARS
+from .constants import _MAX_INDEPENDENT_VARS, _INITIAL_TAPE_CAPACITY, _EDGE_BYTES
+from .fab_ad_tape import StructTape
 
 
-class FabAdSession(object):
+class AdjointStore(object):
 
-    def __init__(self, num_independent_tensors: int = _MAX_INDEPENDENT_VARS, global_tensor_count: int = -1) -> None:
+    def __init__(self, capacity: int = _INITIAL_TAPE_CAPACITY, dtype=np.float64) -> None:
+        """init method
+
+        Reverse mode adjoints of all recorded tensors live in one contiguous buffer per value
+        shape, addressed by the row a tensor is given when it is recorded. Buffers grow by
+        doubling, so a backward pass over an already recorded tape allocates nothing.
+
+        Parameters
+        ----------
+        capacity : int
+            initial number of rows per shape
+        dtype : type
+            dtype of the adjoint buffers
+        """
+        self.capacity = capacity
+        self.dtype = dtype
+        self.buffers = {}
+        self.sizes = {}
+        # bytes held by all buffers
+        self.nbytes = 0
+
+    def allocate(self, shape: tuple) -> int:
+        """reserves a zeroed row for a tensor whose value has the given shape
+
+        Parameters
+        ----------
+        shape : tuple
+            shape of the tensor value
+
+        Returns
+        -------
+        int
+            row of the tensor in the buffer of its shape
+        """
+        row = self.sizes.get(shape, 0)
+        buffer = self.buffers.get(shape)
+        if buffer is None:
+            buffer = self.buffers[shape] = np.zeros((self.capacity,) + shape, dtype=self.dtype)
+            self.nbytes += buffer.nbytes
+        elif row == len(buffer):
+            grown = np.zeros((2 * len(buffer),) + shape, dtype=self.dtype)
+            grown[:row] = buffer
+            self.nbytes += grown.nbytes - buffer.nbytes
+            buffer = self.buffers[shape] = grown
+        self.sizes[shape] = row + 1
+        return row
+
+    def release(self, shape: tuple, row: int) -> None:
+        """gives back the row last reserved for `shape`, keeping the buffer for later tensors
+
+        Parameters
+        ----------
+        shape : tuple
+            shape of the tensor value
+        row : int
+            row returned by the last call to `allocate` for `shape`
+        """
+        if self.sizes.get(shape) == row + 1:
+            self.sizes[shape] = row
+            self.buffers[shape][row] = 0
+
+    def get(self, shape: tuple, row: int):
+        """returns the adjoint stored at `row`, a view for array valued tensors
+        """
+        return self.buffers[shape][row]
+
+    def set(self, shape: tuple, row: int, value) -> None:
+        """overwrites the adjoint stored at `row`
+        """
+        self.buffers[shape][row] = value
+
+    def accumulate(self, shape: tuple, row: int, value) -> None:
+        """adds `value` in place to the adjoint stored at `row`, summing over broadcast axes
+
+        Parameters
+        ----------
+        shape : tuple
+            shape of the tensor value
+        row : int
+            row of the tensor
+        value : number or array
+            contribution to add
+        """
+        if np.ndim(value) > len(shape):
+            value = np.sum(value, axis=tuple(range(np.ndim(value) - len(shape))))
+        self.buffers[shape][row] += value
+
+    def fill(self, value=0) -> None:
+        """sets every stored adjoint to `value`
+        """
+        for buffer in self.buffers.values():
+            buffer.fill(value)
+
+
+class MemoryStats(object):
+
+    def __init__(self) -> None:
+        """init method
+
+        Running totals of the memory held by the tensors recorded on a session. Value and
+        derivative sizes are exact array sizes; source edges are estimated at a fixed cost per
+        edge plus the size of array partials. Derivatives are counted at the number of seed
+        vectors they were recorded with: the zero padding they get once the session's seed
+        vectors grow is not counted.
+        """
+        self.n_nodes = 0
+        self.n_edges = 0
+        self.value_bytes = 0
+        self.derivative_bytes = 0
+        self.edge_bytes = 0
+        self.identifier_bytes = 0
+
+    @property
+    def total_bytes(self) -> int:
+        """bytes held by values, derivatives, source edges and identifiers
+        """
+        return self.value_bytes + self.derivative_bytes + self.edge_bytes + self.identifier_bytes
+
+    def as_dict(self) -> dict:
+        """returns the counters as a dict, e.g. for logging
+        """
+        return {"n_nodes": self.n_nodes, "n_edges": self.n_edges, "value_bytes": self.value_bytes,
+                "derivative_bytes": self.derivative_bytes, "edge_bytes": self.edge_bytes,
+                "identifier_bytes": self.identifier_bytes, "total_bytes": self.total_bytes}
+
+    def __str__(self) -> str:
+        """Represents the MemoryStats as a string
+
+        Returns
+        -------
+        str
+            MemoryStats as a string
+        """
+        return f"{self.n_nodes} nodes, {self.n_edges} edges: values {self.value_bytes} B, derivatives" \
+               f" {self.derivative_bytes} B, edges {self.edge_bytes} B, identifiers {self.identifier_bytes} B," \
+               f" total {self.total_bytes} B"
+
+
+class SeedWidth(object):
+
+    def __init__(self, width: int) -> None:
+        """init method
+
+        Number of seed vectors of a session, shared with the tensors recorded on it so that
+        they pad their derivatives to the width of their own session, also once another
+        session is current.
+
+        Parameters
+        ----------
+        width : int
+            number of seed vectors
+        """
+        self.width = width
+
+
+class FabAdSession(threading.local):
+
+    def __init__(self, num_independent_tensors: int = _MAX_INDEPENDENT_VARS, global_tensor_count: int = -1,
+                 simplify: bool = True, cse: bool = False, struct_tape: bool = False, dtype=None,
+                 memory_budget: int = None, on_budget_exceeded="raise") -> None:
         """init method
 
         Parameters
         ----------
         num_independent_tensors : int
-            maximum number of seed vectors
+            initial number of seed vectors, doubled whenever more independent variables are created
         global_tensor_count : int
             current number of seed vectors
+        simplify : bool
+            fold constants and eliminate identity and annihilator operations while tracing
+        cse : bool
+            return the existing tensor for structurally identical subexpressions
+        struct_tape : bool
+            also record scalar graphs into a struct-of-arrays `StructTape` that the reverse
+            sweep runs on
+        dtype : data-type, optional
+            floating point precision of values, derivatives and adjoints, e.g. np.float32; by
+            default values keep their own dtype and derivatives and adjoints are float64
+        memory_budget : int, optional
+            maximum number of bytes the recorded graph and its adjoints may hold, by default None
+            (unlimited)
+        on_budget_exceeded : str or callable, optional
+            what to do when a recorded tensor takes the graph over `memory_budget`: "raise" a
+            MemoryError; "spill" to shorten identifiers into compact ``t<tape id>`` names and
+            raise the MemoryError anyway if that is not enough, no numeric data is moved out of
+            memory; or a callable called with the session each time a recorded
+            tensor crosses the budget, i.e. again only after a tensor was recorded under it, for
+            instance because the callback raised `memory_budget`; by default "raise"
+
+        The session is thread local: every thread starts from a session initialized with
+        these arguments, so graphs traced on worker threads do not interfere. Settings changed
+        afterwards, e.g. ``fab_ad_session.cse = True`` or a new `memory_budget`, apply to the
+        current thread only; code tracing on other threads can carry them over with
+        ``isolated(settings=fab_ad_session.settings())``, as `GradientExecutor` does.
         """
-        self.max_num_independent_tensors = num_independent_tensors
+        self.simplify = simplify
+        self.cse = cse
+        # (op, operand keys) -> FabTensor, used when `cse` is set
+        self.interned = {}
+        self.seeds = SeedWidth(num_independent_tensors)
         self.global_tensor_count = global_tensor_count
         self.src_tensors = []
-        self.dest_tensors = []
+        # outputs of the last gradient computation, see `dest_tensors`
+        self._dest_tensors = ()
         self.all_tensors = []
+        self._dtype = self._floating(dtype)
+        self.adjoints = AdjointStore(dtype=self._dtype or np.float64)
+        self.struct_tape = StructTape() if struct_tape else None
+        # set by the async API, checked on every recorded tensor to abandon a cancelled trace
+        self.cancel_event = None
+        self.memory_budget = memory_budget
+        self.on_budget_exceeded = on_budget_exceeded
+        self.memory = MemoryStats()
+        # set once identifiers were spilled into compact names, and once a callback was notified
+        self.compact_identifiers = False
+        self._budget_notified = False
+
+    @property
+    def dest_tensors(self) -> list:
+        """outputs of the last gradient computation, deprecated
+
+        `AutoDiffOutput` keeps its own outputs, so the session no longer needs to track them.
+
+        Returns
+        -------
+        list
+            tensors differentiated by the last call to `auto_diff`
+        """
+        warnings.warn("fab_ad_session.dest_tensors is deprecated and will be removed, use the outputs passed to"
+                      " auto_diff instead", DeprecationWarning, stacklevel=2)
+        return list(self._dest_tensors)
+
+    @dest_tensors.setter
+    def dest_tensors(self, tensors: list) -> None:
+        """setting the outputs of the last gradient computation, deprecated
+
+        Parameters
+        ----------
+        tensors : list of FabTensor
+        """
+        warnings.warn("fab_ad_session.dest_tensors is deprecated and will be removed", DeprecationWarning,
+                      stacklevel=2)
+        self._dest_tensors = tuple(tensors)
+
+    @property
+    def max_num_independent_tensors(self) -> int:
+        """current number of seed vectors, grown by `get_index` as independent variables are created
+        """
+        return self.seeds.width
+
+    @max_num_independent_tensors.setter
+    def max_num_independent_tensors(self, width: int) -> None:
+        self.seeds.width = width
+
+    @staticmethod
+    def _floating(dtype):
+        """returns `dtype` as a NumPy floating point dtype, None stays None
+        """
+        if dtype is None:
+            return None
+        dtype = np.dtype(dtype)
+        if not np.issubdtype(dtype, np.floating):
+            raise ValueError(f"Session dtype must be a floating point type, not {dtype}")
+        return dtype
+
+    @property
+    def dtype(self):
+        """floating point precision policy of the session, None for the default mixed policy
+
+        Returns
+        -------
+        np.dtype or None
+            dtype of values, derivatives and adjoints
+        """
+        return self._dtype
+
+    @dtype.setter
+    def dtype(self, dtype) -> None:
+        """sets the precision policy, allowed only while no tensor is recorded
+
+        Parameters
+        ----------
+        dtype : data-type or None
+            e.g. np.float32 or np.float64
+        """
+        if self.all_tensors:
+            raise ValueError("Cannot change the dtype of a session with recorded tensors, call initialize() first")
+        self._dtype = self._floating(dtype)
+        self.adjoints = AdjointStore(dtype=self._dtype or np.float64)
 
     def get_index(self) -> int:
         """returns new index for independent variable
 
+        The number of seed vectors doubles whenever it is exhausted; derivatives created
+        before are padded with zeros when they are next read, see `FabTensor.derivative`.
+
         Returns
         -------
         int
@@ -33,7 +315,7 @@ class FabAdSession(object):
         """
         self.global_tensor_count += 1
         if self.global_tensor_count >= self.max_num_independent_tensors:
-            raise IndexError("Cannot compute gradient!")
+            self.max_num_independent_tensors = max(2 * self.max_num_independent_tensors, self.global_tensor_count + 1)
         return self.global_tensor_count
 
     def initialize_derivative(self, value: Union[Iterable, ]) -> Iterable:
@@ -49,23 +331,177 @@ class FabAdSession(object):
             returns iterable for initialized derivative
         """
         if isinstance(value, numbers.Number):
-            derivative = np.zeros(self.max_num_independent_tensors)
+            shape = ()
         elif isinstance(value, list) or isinstance(value, np.ndarray):
-            m = len(value)
-            derivative = np.zeros((self.max_num_independent_tensors, m))
+            shape = np.shape(value)
         else:
             raise TypeError(f"Invalid value of type {type(value)}!")
         index = self.get_index()
+        derivative = np.zeros((self.max_num_independent_tensors,) + shape, dtype=self._dtype)
         derivative[index] = 1
         return derivative
 
+    def record(self, tensor) -> int:
+        """adds `tensor` to the tape and reserves its adjoint storage
+
+        Parameters
+        ----------
+        tensor : FabTensor
+
+        Returns
+        -------
+        int
+            tape id of the tensor, i.e. its index in `all_tensors`
+        """
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            raise concurrent.futures.CancelledError("gradient evaluation was cancelled")
+        shape = tensor.value.shape if isinstance(tensor.value, np.ndarray) else ()
+        tensor.tape_id = len(self.all_tensors)
+        tensor.adjoint_slot = (self.adjoints, shape, self.adjoints.allocate(shape))
+        self.all_tensors.append(tensor)
+        memory = self.memory
+        memory.n_nodes += 1
+        value = tensor.value
+        memory.value_bytes += value.nbytes if isinstance(value, np.ndarray) else 8
+        memory.derivative_bytes += tensor.derivative.nbytes
+        for _, partial in tensor.source:
+            memory.n_edges += 1
+            memory.edge_bytes += (_EDGE_BYTES + partial.nbytes) if isinstance(partial, np.ndarray) else _EDGE_BYTES
+        if self.compact_identifiers and tensor.source:
+            tensor.identifier = f"t{tensor.tape_id}"
+        memory.identifier_bytes += len(tensor.identifier)
+        if self.memory_budget is not None and memory.total_bytes + self.adjoints.nbytes > self.memory_budget:
+            try:
+                self._over_budget()
+            except BaseException:
+                # the tensor is not constructed, take it off the tape again
+                self._unrecord(tensor)
+                raise
+        else:
+            # back under the budget, the next crossing notifies a callback again
+            self._budget_notified = False
+        if self.struct_tape is not None:
+            # adjoint rows only coincide with tape ids while every recorded tensor is scalar
+            parents = [(source_tensor.tape_id if source_tensor.adjoint_slot is not None
+                        and source_tensor.adjoint_slot[0] is self.adjoints else None, partial)
+                       for source_tensor, partial in tensor.source]
+            self.struct_tape.append(tensor.value, parents)
+            if shape or tensor.adjoint_slot[2] != tensor.tape_id:
+                self.struct_tape.valid = False
+        return tensor.tape_id
+
+    def _unrecord(self, tensor) -> None:
+        """undoes `record` for the tensor recorded last
+        """
+        self.all_tensors.pop()
+        store, shape, row = tensor.adjoint_slot
+        store.release(shape, row)
+        tensor.tape_id = None
+        tensor.adjoint_slot = None
+        memory = self.memory
+        memory.n_nodes -= 1
+        value = tensor.value
+        memory.value_bytes -= value.nbytes if isinstance(value, np.ndarray) else 8
+        memory.derivative_bytes -= tensor.derivative.nbytes
+        for _, partial in tensor.source:
+            memory.n_edges -= 1
+            memory.edge_bytes -= (_EDGE_BYTES + partial.nbytes) if isinstance(partial, np.ndarray) else _EDGE_BYTES
+        memory.identifier_bytes -= len(tensor.identifier)
+
+    @property
+    def memory_bytes(self) -> int:
+        """bytes held by the recorded graph and its adjoint buffers
+        """
+        return self.memory.total_bytes + self.adjoints.nbytes
+
+    def _over_budget(self) -> None:
+        """applies `on_budget_exceeded` once the recorded graph is over `memory_budget`
+        """
+        action = self.on_budget_exceeded
+        if action == "spill" and not self.compact_identifiers:
+            # identifiers repeat the whole expression and can dwarf the numeric data
+            self.compact_identifiers = True
+            self.memory.identifier_bytes = 0
+            for tensor in self.all_tensors:
+                if tensor.source:
+                    tensor.identifier = f"t{tensor.tape_id}"
+                self.memory.identifier_bytes += len(tensor.identifier)
+            if self.memory_bytes <= self.memory_budget:
+                return
+        elif callable(action):
+            if not self._budget_notified:
+                self._budget_notified = True
+                action(self)
+            return
+        elif action not in ("raise", "spill"):
+            raise ValueError(f"Invalid on_budget_exceeded: {action}! Use 'raise', 'spill' or a callable")
+        raise MemoryError(f"Recorded graph uses {self.memory_bytes} bytes, over the budget of {self.memory_budget}"
+                          f" bytes ({self.memory}, adjoints {self.adjoints.nbytes} B)")
+
+    def zero_grad(self) -> None:
+        """resets the reverse mode gradient of every recorded tensor
+        """
+        self.adjoints.fill(0)
+
     def clear(self) -> None:
         """method for clearing independent variables and their derivatives
         """
         self.global_tensor_count = -1
+        # tensors recorded so far keep padding to the width of the old holder
+        self.seeds = SeedWidth(self.max_num_independent_tensors)
         self.src_tensors = []
+        self._dest_tensors = ()
         self.all_tensors = []
-        self.dest_tensors = []
+        self.interned = {}
+        self.adjoints = AdjointStore(dtype=self._dtype or np.float64)
+        self.memory = MemoryStats()
+        self.compact_identifiers = False
+        self._budget_notified = False
+        if self.struct_tape is not None:
+            self.struct_tape = StructTape()
+
+    def settings(self) -> dict:
+        """returns the tracing settings of the session, e.g. to apply them on another thread
+
+        Returns
+        -------
+        dict
+            simplify, cse, struct_tape, dtype, memory_budget and on_budget_exceeded, as accepted
+            by `isolated`
+        """
+        return {"simplify": self.simplify, "cse": self.cse, "struct_tape": self.struct_tape is not None,
+                "dtype": self.dtype, "memory_budget": self.memory_budget,
+                "on_budget_exceeded": self.on_budget_exceeded}
+
+    @contextlib.contextmanager
+    def isolated(self, num_inputs: int = _MAX_INDEPENDENT_VARS, settings: dict = None):
+        """context manager running a computation on a fresh session and restoring the current one
+
+        Parameters
+        ----------
+        num_inputs : int
+            initial number of seed vectors of the fresh session
+        settings : dict, optional
+            tracing settings of the fresh session as returned by `settings`, by default those
+            of the current session
+
+        Yields
+        ------
+        FabAdSession
+            the session, initialized for `num_inputs` independent variables
+        """
+        saved = dict(self.__dict__)
+        self.initialize(num_inputs)
+        if settings is not None:
+            settings = dict(settings)
+            self.struct_tape = StructTape() if settings.pop("struct_tape") else None
+            for name, value in settings.items():
+                setattr(self, name, value)
+        try:
+            yield self
+        finally:
+            self.__dict__.clear()
+            self.__dict__.update(saved)
 
     def initialize(self, num_inputs=_MAX_INDEPENDENT_VARS):
         self.clear()
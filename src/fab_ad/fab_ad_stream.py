@@ -0,0 +1,152 @@
+import queue
+import threading
+from typing import Callable, Iterable
+
+import numpy as np
+
+from .fab_ad_tensor import FabTensor
+from .fab_ad_session import fab_ad_session
+from .fab_ad_diff import auto_diff
+
+# marks the end of the chunks handed over by the prefetch thread
+_END = object()
+
+
+class StreamOutput:
+    def __init__(self, value: float, gradient: np.ndarray, n_chunks: int, n_records: int, max_tensors: int):
+        """init method
+
+        Parameters
+        ----------
+        value : float
+            objective accumulated over all chunks
+        gradient : array
+            gradient w.r.t the parameters accumulated over all chunks
+        n_chunks : int
+            number of chunks consumed
+        n_records : int
+            number of records consumed, counted with ``len(chunk)`` where available
+        max_tensors : int
+            largest number of tensors recorded for one chunk, i.e. the peak graph size
+        """
+        self.value = value
+        self.gradient = gradient
+        self.n_chunks = n_chunks
+        self.n_records = n_records
+        self.max_tensors = max_tensors
+
+    def __str__(self) -> str:
+        """Represents the StreamOutput as a string
+
+        Returns
+        -------
+        str
+            StreamOutput as a string
+        """
+        return f"Value: {self.value}\nGradient: {self.gradient}\nChunks: {self.n_chunks}" \
+               f"\nRecords: {self.n_records}\nPeak graph size: {self.max_tensors} tensors\n"
+
+
+def _prefetched(chunks: Iterable, stop: threading.Event) -> Iterable:
+    """yields `chunks` while a background thread already pulls the next one
+
+    At most one chunk is buffered ahead. Exceptions raised by the iterator are re-raised in
+    the consuming thread, and the producer stops once `stop` is set.
+    """
+    buffer = queue.Queue(maxsize=1)
+
+    def produce():
+        try:
+            for chunk in chunks:
+                while not stop.is_set():
+                    try:
+                        buffer.put((chunk, None), timeout=0.1)
+                        break
+                    except queue.Full:
+                        continue
+                if stop.is_set():
+                    return
+            item = (_END, None)
+        except BaseException as error:
+            item = (_END, error)
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    producer = threading.Thread(target=produce, name="fab_ad-prefetch", daemon=True)
+    producer.start()
+    try:
+        while True:
+            chunk, error = buffer.get()
+            if error is not None:
+                raise error
+            if chunk is _END:
+                producer.join()
+                return
+            yield chunk
+    finally:
+        # an abandoned producer exits at its next check of `stop`
+        stop.set()
+
+
+def stream_gradient(loss: Callable, x: Iterable, chunks: Iterable, mode=None, average: bool = False,
+                    prefetch: bool = False) -> StreamOutput:
+    """value and gradient of a sum of per-chunk losses over a stream of data chunks
+
+    Each chunk's graph is built and differentiated on an isolated session, added to the running
+    totals and released before the next chunk is read, so peak memory is one chunk's graph
+    whatever the length of the stream. The caller's session is left untouched.
+
+    Parameters
+    ----------
+    loss : callable
+        ``loss(params, chunk)`` taking the list of parameter FabTensors and one chunk, and
+        returning the chunk's loss as a scalar FabTensor
+    x : array
+        parameter values
+    chunks : iterable
+        iterator or generator of data chunks, consumed once
+    mode : AdMode, optional
+        AD mode passed to `auto_diff` for every chunk, by default None
+    average : bool, optional
+        divide the totals by the number of records, counted with ``len(chunk)``, by default False
+    prefetch : bool, optional
+        read the next chunk on a background thread while the current one is differentiated,
+        by default False
+
+    Returns
+    -------
+    StreamOutput
+        accumulated value and gradient, and stream statistics
+    """
+    x = np.asarray(x, dtype=float).ravel()
+    value, gradient = 0.0, np.zeros(len(x))
+    n_chunks, n_records, max_tensors = 0, 0, 0
+    stop = threading.Event()
+    stream = _prefetched(chunks, stop) if prefetch else iter(chunks)
+    try:
+        for chunk in stream:
+            with fab_ad_session.isolated(num_inputs=len(x)):
+                params = [FabTensor(value=float(param), identifier=f"x{idx}") for idx, param in enumerate(x)]
+                output = loss(params, chunk)
+                if not isinstance(output, FabTensor):
+                    raise TypeError(f"Loss must return a FabTensor, not object of type {type(output)}")
+                result = auto_diff(output, mode=mode)
+                max_tensors = max(max_tensors, len(fab_ad_session.all_tensors))
+            value += float(result.value)
+            gradient += np.ravel(result.gradient)[:len(x)]
+            n_chunks += 1
+            n_records += len(chunk) if hasattr(chunk, "__len__") else 1
+            # drop the chunk's graph before the next chunk is built
+            del params, output, result
+    finally:
+        stop.set()
+        if prefetch:
+            stream.close()
+    if average and n_records:
+        value, gradient = value / n_records, gradient / n_records
+    return StreamOutput(value=value, gradient=gradient, n_chunks=n_chunks, n_records=n_records,
+                        max_tensors=max_tensors)
@@ -0,0 +1,148 @@
+import numpy as np
+
+from .constants import _INITIAL_TAPE_CAPACITY
+
+# below this many edges per level the reverse sweep loops over the edges instead of scattering per level
+_MIN_EDGES_PER_LEVEL = 16
+
+
+class StructTape(object):
+
+    def __init__(self, capacity: int = _INITIAL_TAPE_CAPACITY) -> None:
+        """init method
+
+        Struct-of-arrays copy of a scalar graph: node values and levels, and for every edge the
+        child node, the parent node and the local partial, each in one growable contiguous array.
+        Node `i` of the tape is the tensor with tape id `i`; edges are stored in the order their
+        child nodes were recorded.
+
+        Parameters
+        ----------
+        capacity : int
+            initial number of nodes and of edges
+        """
+        self.values = np.zeros(capacity)
+        # longest path from a leaf, every consumer of a node has a larger level
+        self.levels = np.zeros(capacity, dtype=np.int64)
+        self.edge_children = np.zeros(capacity, dtype=np.int64)
+        self.edge_parents = np.zeros(capacity, dtype=np.int64)
+        self.edge_partials = np.zeros(capacity)
+        self.n_nodes = 0
+        self.n_edges = 0
+        # False once a node the arrays cannot represent (array valued, foreign parent) was recorded
+        self.valid = True
+        self._schedule = None
+
+    @staticmethod
+    def _grown(array: np.ndarray, size: int) -> np.ndarray:
+        """returns `array`, or a copy doubled in length if it cannot hold `size` entries
+        """
+        if size <= len(array):
+            return array
+        grown = np.zeros(max(size, 2 * len(array)), dtype=array.dtype)
+        grown[:len(array)] = array
+        return grown
+
+    def append(self, value, parents: list) -> int:
+        """records a node and the edges to the nodes it was computed from
+
+        Parameters
+        ----------
+        value : number
+            value of the node; array values invalidate the tape
+        parents : list
+            (tape id of the parent, local partial) pairs, a tape id of None or a partial that is
+            not a number invalidates the tape
+
+        Returns
+        -------
+        int
+            index of the node
+        """
+        node = self.n_nodes
+        self.values = self._grown(self.values, node + 1)
+        self.levels = self._grown(self.levels, node + 1)
+        if np.ndim(value) != 0:
+            self.valid = False
+        else:
+            self.values[node] = value
+        level = 0
+        n_edges = self.n_edges + len(parents)
+        if parents:
+            self.edge_children = self._grown(self.edge_children, n_edges)
+            self.edge_parents = self._grown(self.edge_parents, n_edges)
+            self.edge_partials = self._grown(self.edge_partials, n_edges)
+        for edge, (parent, partial) in enumerate(parents, self.n_edges):
+            if parent is None or parent >= node or callable(partial) or np.ndim(partial) != 0:
+                self.valid = False
+                continue
+            self.edge_children[edge] = node
+            self.edge_parents[edge] = parent
+            self.edge_partials[edge] = partial
+            level = max(level, self.levels[parent] + 1)
+        self.levels[node] = level
+        self.n_nodes = node + 1
+        self.n_edges = n_edges
+        self._schedule = None
+        return node
+
+    def _level_schedule(self):
+        """returns edge indices sorted by decreasing level of their child, and the segment bounds per level
+        """
+        if self._schedule is None:
+            edge_levels = self.levels[self.edge_children[:self.n_edges]]
+            order = np.argsort(-edge_levels, kind="stable")
+            sorted_levels = edge_levels[order]
+            bounds = np.flatnonzero(np.diff(sorted_levels)) + 1
+            starts = np.concatenate(([0], bounds))
+            stops = np.concatenate((bounds, [self.n_edges]))
+            self._schedule = (self.edge_children[order], self.edge_parents[order], self.edge_partials[order],
+                              sorted_levels[starts] if self.n_edges else sorted_levels, starts, stops)
+        return self._schedule
+
+    def backward(self, output: int, seed: float, adjoints: np.ndarray) -> np.ndarray:
+        """accumulates into `adjoints` the gradient of node `output` seeded with `seed`
+
+        Edges are processed level by level from the top, so the adjoint of a node is complete
+        before it is propagated. Wide graphs scatter a whole level at once with ``np.add.at``;
+        deep and narrow ones run a plain loop over the edges, which are already stored in
+        recording order.
+
+        Parameters
+        ----------
+        output : int
+            index of the differentiated node
+        seed : float
+            adjoint of the output
+        adjoints : np.ndarray
+            adjoint of every node, at least `n_nodes` long
+
+        Returns
+        -------
+        np.ndarray
+            `adjoints`
+        """
+        adjoints[output] += seed
+        top = self.levels[output]
+        if top == 0:
+            return adjoints
+        if self.n_edges < _MIN_EDGES_PER_LEVEL * top:
+            # edges are recorded with nondecreasing child, so walking them backwards visits
+            # every consumer of a node before the node itself
+            n_edges = int(np.searchsorted(self.edge_children[:self.n_edges], output, side="right"))
+            children = self.edge_children[:n_edges].tolist()
+            parents = self.edge_parents[:n_edges].tolist()
+            partials = self.edge_partials[:n_edges].tolist()
+            values = adjoints[:output + 1].tolist()
+            for edge in range(n_edges - 1, -1, -1):
+                adjoint = values[children[edge]]
+                if adjoint:
+                    values[parents[edge]] += adjoint * partials[edge]
+            adjoints[:output + 1] = values
+            return adjoints
+        children, parents, partials, segment_levels, starts, stops = self._level_schedule()
+        for level, start, stop in zip(segment_levels.tolist(), starts.tolist(), stops.tolist()):
+            if level > top:
+                continue
+            np.add.at(adjoints, parents[start:stop], adjoints[children[start:stop]] * partials[start:stop])
+        return adjoints
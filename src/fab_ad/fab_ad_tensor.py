@@ -1,16 +1,14 @@
 from __future__ import annotations
+import functools
 import numbers
-import os
-import sys
+import operator
 import numpy as np
 
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-
 from enum import Enum
 from typing import Iterable, Union
 
-from constants import _ALLOWED_NUMERICS
-from fab_ad_session import fab_ad_session
+from .constants import _ALLOWED_NUMERICS, _MAX_POOLED_CONSTANTS
+from .fab_ad_session import fab_ad_session
 
 
 class AdMode(Enum):
@@ -18,6 +16,234 @@ class AdMode(Enum):
     REVERSE = "reverse"
 
 
+# primitive -> {operand position: constant for which the result equals the other operand}
+_IDENTITIES = {
+    "add": {0: 0, 1: 0},
+    "sub": {1: 0},
+    "mul": {0: 1, 1: 1},
+    "pow": {1: 1},
+}
+# primitive -> {operand position: constant for which the result does not depend on the other operand}
+_ANNIHILATORS = {
+    "mul": {0: 0, 1: 0},
+    "pow": {1: 0},
+}
+
+
+def is_constant(operand) -> bool:
+    """whether `operand` is a number or a `FabTensor` that does not depend on any independent variable
+
+    Parameters
+    ----------
+    operand : FabTensor or number
+
+    Returns
+    -------
+    bool
+        True for structurally constant operands
+    """
+    return not isinstance(operand, FabTensor) or operand.op == "const"
+
+
+def _scalar_constant(operand):
+    """returns the value of a constant scalar operand, None for anything else
+    """
+    if not is_constant(operand):
+        return None
+    value = operand.value if isinstance(operand, FabTensor) else operand
+    if type(value) in (int, float):
+        return value
+    return value if isinstance(value, _ALLOWED_NUMERICS) and np.ndim(value) == 0 else None
+
+
+def identity_operand(op: str, operands: tuple):
+    """returns the operand that `op` applied to `operands` trivially evaluates to
+
+    e.g. ``x`` for ``x + 0``, ``1 * x`` or ``x ** 1``
+
+    Parameters
+    ----------
+    op : str
+        name of the primitive
+    operands : tuple
+        operands in mathematical order
+
+    Returns
+    -------
+    FabTensor or None
+        the operand equal to the result, None if no identity applies
+    """
+    for position, neutral in _IDENTITIES.get(op, {}).items():
+        other = operands[1 - position]
+        if isinstance(other, FabTensor) and not is_constant(other) and _scalar_constant(operands[position]) == neutral:
+            return other
+    return None
+
+
+def is_annihilated(op: str, operands: tuple) -> bool:
+    """whether `op` applied to `operands` is a constant regardless of its tensor operands
+
+    e.g. ``x * 0`` or ``x ** 0``
+
+    Parameters
+    ----------
+    op : str
+        name of the primitive
+    operands : tuple
+        operands in mathematical order
+
+    Returns
+    -------
+    bool
+        True if the result is constant
+    """
+    for position, absorbing in _ANNIHILATORS.get(op, {}).items():
+        if _scalar_constant(operands[position]) == absorbing:
+            return True
+    return all(is_constant(operand) for operand in operands)
+
+
+def _fold_chain(op: str, operands: tuple):
+    """folds chains of scalar constants such as ``(x * 2) * 3`` into ``x * 6``
+
+    Parameters
+    ----------
+    op : str
+        name of the primitive
+    operands : tuple
+        operands in mathematical order
+
+    Returns
+    -------
+    FabTensor or None
+        the folded result, None if no chain applies
+    """
+    if op not in ("add", "sub", "mul") or len(operands) != 2:
+        return None
+    position = 1 if _scalar_constant(operands[1]) is not None else 0
+    constant, tensor = _scalar_constant(operands[position]), operands[1 - position]
+    if constant is None or not isinstance(tensor, FabTensor) or len(tensor.operands) != 2 or (op == "sub" and position == 0):
+        return None
+    inner_position = 1 if _scalar_constant(tensor.operands[1]) is not None else 0
+    inner_constant, inner_tensor = _scalar_constant(tensor.operands[inner_position]), tensor.operands[1 - inner_position]
+    if inner_constant is None or not isinstance(inner_tensor, FabTensor):
+        return None
+    if op == "mul" and tensor.op == "mul":
+        return inner_tensor * (inner_constant * constant)
+    if op in ("add", "sub") and (tensor.op == "add" or (tensor.op == "sub" and inner_position == 1)):
+        offset = inner_constant if tensor.op == "add" else -inner_constant
+        return inner_tensor + (offset + constant if op == "add" else offset - constant)
+    return None
+
+
+# primitive -> python operator evaluating it on plain values
+_OPERATORS = {
+    "add": operator.add,
+    "sub": operator.sub,
+    "mul": operator.mul,
+    "pow": operator.pow,
+}
+
+
+# primitives whose result does not depend on the order of their operands
+_COMMUTATIVE = {"add", "mul"}
+
+
+def _intern_key(op: str, operands: tuple):
+    """returns the key structurally identical applications of `op` share, None if not hashable
+
+    Parameters
+    ----------
+    op : str
+        name of the primitive
+    operands : tuple
+        operands in mathematical order
+
+    Returns
+    -------
+    tuple or None
+        (op, operand keys) where tensors are keyed by identity and constants by value
+    """
+    keys = []
+    for operand in operands:
+        if isinstance(operand, FabTensor):
+            keys.append(("t", id(operand)))
+        elif isinstance(operand, np.ndarray):
+            keys.append(("a", operand.dtype.str, operand.shape, operand.tobytes()))
+        elif isinstance(operand, numbers.Number):
+            keys.append(("c", operand))
+        else:
+            return None
+    if op in _COMMUTATIVE:
+        keys.sort(key=repr)
+    return op, tuple(keys)
+
+
+def traced(op: str, reflected: bool = False):
+    """decorator recording the primitive `op` and its operands on the `FabTensor` it returns
+
+    When `fab_ad_session.simplify` is set, identities (``x + 0``, ``x * 1``, ``x ** 1``) return
+    the operand itself, annihilators (``x * 0``, ``x ** 0``) are folded into a `FabConstant`
+    and chains of scalar constants such
+    as ``(x * 2) * 3`` are collapsed into a single node.
+
+    Operations whose operands are all constant are always evaluated into a `FabConstant`.
+
+    When `fab_ad_session.cse` is set, nodes are interned by (op, operand identities, constants)
+    so that structurally identical subexpressions return the same `FabTensor`.
+
+    Parameters
+    ----------
+    op : str
+        name of the primitive operation, e.g. "add" or "sin"
+    reflected : bool, optional
+        whether the decorated method is a reflected operator (``__radd__`` etc.), in which
+        case the operands are recorded in their mathematical order, by default False
+
+    Returns
+    -------
+    callable
+        decorator for methods and functions that build a new `FabTensor` node
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            # constant operands other than `self` take part as plain values, so that no edge points to them
+            args = args[:1] + tuple(arg.value if isinstance(arg, FabTensor) and arg.op == "const" else arg
+                                    for arg in args[1:])
+            operands = tuple(args[::-1] if reflected else args) + tuple(kwargs.values())
+            if not isinstance(args[0], FabTensor) and not any(isinstance(arg, FabTensor) for arg in args[1:]):
+                return func(*args, **kwargs)
+            if all(is_constant(operand) for operand in operands):
+                # fold operations on constants instead of recording them
+                values = [operand.value if isinstance(operand, FabTensor) else operand for operand in operands]
+                if op in _OPERATORS:
+                    return constant(_OPERATORS[op](*values))
+                return func(*values)
+            simplify = fab_ad_session.simplify and any(is_constant(operand) for operand in operands)
+            if simplify:
+                simplified = identity_operand(op, operands)
+                if simplified is None and is_annihilated(op, operands):
+                    values = [operand.value if isinstance(operand, FabTensor) else operand for operand in operands]
+                    simplified = constant(_OPERATORS[op](*values))
+                if simplified is None:
+                    simplified = _fold_chain(op, operands)
+                if simplified is not None:
+                    return simplified
+            key = _intern_key(op, operands) if fab_ad_session.cse else None
+            if key is not None and key in fab_ad_session.interned:
+                return fab_ad_session.interned[key]
+            result = func(*args, **kwargs)
+            if isinstance(result, FabTensor) and result.source and all(result is not arg for arg in args):
+                result.op = op
+                result.operands = operands
+                if key is not None:
+                    fab_ad_session.interned[key] = result
+            return result
+        return wrapper
+    return decorator
+
+
 class FabTensor(object):
 
     def __init__(self, value: Union[Iterable, numbers.Number], derivative: Union[Iterable, numbers.Number] = None,
@@ -36,6 +262,11 @@ class FabTensor(object):
         self.value = value
         if isinstance(self.value, Iterable):
             self.value = np.array(self.value)
+        dtype = fab_ad_session.dtype
+        if dtype is not None:
+            # precision policy of the session: values and tangents share one floating dtype
+            self.value = self.value.astype(dtype, copy=False) if isinstance(self.value, np.ndarray) \
+                else dtype.type(self.value)
         if derivative is None:
             # derivative w.r.t all independent variables
             derivative = fab_ad_session.initialize_derivative(value)
@@ -43,16 +274,22 @@ class FabTensor(object):
         if self.depth == 0:
             # add tensor to list of source nodes in session
             fab_ad_session.src_tensors.append(self)
-        fab_ad_session.all_tensors.append(self)
         if isinstance(derivative, (int, float, numbers.Integral, numbers.Number)):
             derivative = [derivative]
-        self.derivative = np.array(derivative)
+        # seed vectors of the session and their number when the derivative was computed
+        self._seeds = fab_ad_session.seeds
+        self._seed_width = self._seeds.width
+        self.derivative = np.array(derivative) if dtype is None else np.asarray(derivative, dtype=dtype)
         self.identifier = identifier
 
         assert mode in [AdMode.FORWARD, AdMode.REVERSE]
         self.mode = mode
         self.source = source
-        self._reverse_mode_gradient = 0
+        # tape id and adjoint storage
+        fab_ad_session.record(self)
+        # primitive that produced this tensor and its operands, set by `traced`
+        self.op = "const" if (not source and not np.any(self.derivative)) else "var"
+        self.operands = ()
 
     def __repr__(self) -> str:
         """Represents the FabTensor as a string
@@ -63,7 +300,7 @@ class FabTensor(object):
             FabTensor as a string
         """
         return f"value: {self.value} derivative: {self.derivative}" \
-               f" name: {self.identifier} reverse mode gradient: {self._reverse_mode_gradient}"
+               f" name: {self.identifier} reverse mode gradient: {self.gradient}"
 
     def __str__(self) -> str:
         """Represents the FabTensor as a string
@@ -74,7 +311,7 @@ class FabTensor(object):
             FabTensor as a string
         """
         return f"value: {self.value} derivative: {self.derivative}" \
-               f" name: {self.identifier} reverse mode gradient: {self._reverse_mode_gradient}"
+               f" name: {self.identifier} reverse mode gradient: {self.gradient}"
 
     def __eq__(self, other) -> bool:
         """Checks if value attribute of two `FabTensor` objects are equal.
@@ -219,6 +456,7 @@ class FabTensor(object):
         """
         return -1 * self
 
+    @traced("add")
     def __add__(self, other: Union[numbers.Number, FabTensor]) -> FabTensor:
         """sum of two `FabTensor` objects
 
@@ -254,6 +492,7 @@ class FabTensor(object):
         else:
             raise TypeError(f"addition not supported between types FabTensor and {type(other)}")
 
+    @traced("add", reflected=True)
     def __radd__(self, other: Union[numbers.Number, FabTensor]) -> FabTensor:
         """sum of two `FabTensor` objects
 
@@ -303,6 +542,7 @@ class FabTensor(object):
         """
         return self + other
     
+    @traced("sub")
     def __sub__(self, other: Union[numbers.Number, FabTensor]) -> FabTensor:
         """difference of two `FabTensor` objects
 
@@ -338,6 +578,7 @@ class FabTensor(object):
         else:
             raise TypeError(f"addition not supported between types FabTensor and {type(other)}")
     
+    @traced("sub", reflected=True)
     def __rsub__(self, other: Union[numbers.Number, FabTensor]) -> FabTensor:
         """difference of two `FabTensor` objects
 
@@ -386,6 +627,7 @@ class FabTensor(object):
         """
         return self - other
     
+    @traced("mul")
     def __mul__(self, other: Union[numbers.Number, FabTensor]) -> FabTensor:
         """product of two `FabTensor` objects
 
@@ -410,9 +652,9 @@ class FabTensor(object):
                     (other, self.value),
                 ], depth=self.depth + 1)
         elif isinstance(other, _ALLOWED_NUMERICS):
-            if other == 1:
+            if np.ndim(other) == 0 and other == 1:
                 identifier = self.identifier
-            elif other == -1:
+            elif np.ndim(other) == 0 and other == -1:
                 identifier=f'-{self.identifier}'
             else:
                 identifier = f'{self.identifier} * {other}'
@@ -427,6 +669,7 @@ class FabTensor(object):
         else:
             raise TypeError(f"Cannot multiple FabTensor with object of type {type(other)}")
 
+    @traced("mul", reflected=True)
     def __rmul__(self, other: Union[numbers.Number, FabTensor]) -> FabTensor:
         """product of two `FabTensor` objects
 
@@ -450,9 +693,9 @@ class FabTensor(object):
                     (other, self.value),
                 ], depth=self.depth + 1)
         elif isinstance(other, _ALLOWED_NUMERICS):
-            if other == 1:
+            if np.ndim(other) == 0 and other == 1:
                 identifier = self.identifier
-            elif other == -1:
+            elif np.ndim(other) == 0 and other == -1:
                 identifier=f'-{self.identifier}'
             else:
                 identifier = f'{other} * {self.identifier}'
@@ -528,6 +771,7 @@ class FabTensor(object):
         """
         return self * (other ** (-1))
 
+    @traced("pow")
     def __pow__(self, other: Union[numbers.Number, FabTensor]) -> FabTensor:
         """power of two `FabTensor` objects
 
@@ -557,7 +801,7 @@ class FabTensor(object):
             return FabTensor(
                 value=self.value ** other,
                 derivative=other * (self.value ** (other - 1)) * self.derivative,
-                identifier=f"{self.identifier}^{other}" if other != -1 else f"1 / {self.identifier}",
+                identifier=f"{self.identifier}^{other}" if np.ndim(other) or other != -1 else f"1 / {self.identifier}",
                 mode=self.mode,
                 source=[
                     (self, other * (self.value ** (other - 1)))
@@ -566,6 +810,7 @@ class FabTensor(object):
         else:
             raise TypeError(f"Cannot compute power of FabTensor with object of type {type(other)}")
 
+    @traced("pow", reflected=True)
     def __rpow__(self, other: Union[numbers.Number, FabTensor]) -> FabTensor:
         """power of two `FabTensor` objects
 
@@ -591,6 +836,16 @@ class FabTensor(object):
         else:
             raise TypeError(f"Cannot compute power of object of type {type(other)} with FabTensor")
 
+    def detach(self) -> FabTensor:
+        """returns the value of the tensor as a constant, see `fab_ad_math.stop_gradient`
+
+        Returns
+        -------
+        FabConstant
+            constant holding the value of the tensor
+        """
+        return constant(self.value)
+
     def directional_derivative(self, seed_vector: Union[np.ndarray, Iterable]) -> numbers.Number:
         """directional derivative w.r.t alls seed vectors
 
@@ -606,6 +861,91 @@ class FabTensor(object):
         """
         return np.array(seed_vector).dot(self.derivative)
 
+    def __array_ufunc__(self, ufunc, method: str, *inputs, **kwargs):
+        """routes NumPy ufuncs such as ``np.sin(x)`` or ``array * x`` to fab_ad primitives
+
+        Only plain calls without ``out`` or other keyword arguments are differentiated; for
+        anything else NotImplemented is returned and NumPy raises a TypeError.
+
+        Parameters
+        ----------
+        ufunc : np.ufunc
+            ufunc being applied
+        method : str
+            ufunc method, "__call__" for a plain call
+        inputs : tuple
+            operands, at least one of them a `FabTensor`
+
+        Returns
+        -------
+        FabTensor or bool
+            result of the matching primitive, or NotImplemented
+        """
+        implementation = _ufunc_table().get(ufunc)
+        if method != "__call__" or kwargs or implementation is None:
+            return NotImplemented
+        for operand in inputs:
+            if not isinstance(operand, FabTensor):
+                _check_broadcast(inputs, operand)
+        return implementation(*inputs)
+
+    def __array_function__(self, func, types, args, kwargs):
+        """routes ``np.sum``, ``np.mean``, ``np.dot``, ``np.where``, ``np.clip`` and the ``np.linalg``
+        functions solve, inv, det and cholesky on `FabTensor` operands to fab_ad primitives
+
+        Other array functions keep their default NumPy implementation.
+
+        Parameters
+        ----------
+        func : callable
+            NumPy function being called
+        types : tuple
+            types implementing ``__array_function__`` among the arguments
+        args : tuple
+        kwargs : dict
+
+        Returns
+        -------
+        object
+            result of the fab_ad implementation, or of NumPy's own
+        """
+        implementation = _array_function_table().get(func)
+        if implementation is None:
+            return func._implementation(*args, **kwargs)
+        return implementation(*args, **kwargs)
+
+    @property
+    def derivative(self) -> np.ndarray:
+        """derivative w.r.t all seed vectors
+
+        Seed vectors added to the session after the derivative was computed do not vary the
+        tensor, so once the session has grown the derivative is padded with zeros to its
+        current number of seed vectors on first access.
+
+        Returns
+        -------
+        np.ndarray
+            derivative with the seed vectors along the first axis
+        """
+        derivative = self._derivative
+        width = self._seeds.width
+        if width != self._seed_width:
+            self._seed_width = width
+            if len(derivative) < width:
+                padding = np.zeros((width - len(derivative),) + derivative.shape[1:], dtype=derivative.dtype)
+                derivative = self._derivative = np.concatenate([derivative, padding])
+        return derivative
+
+    @derivative.setter
+    def derivative(self, value: np.ndarray) -> None:
+        """setting the derivative w.r.t all seed vectors
+
+        Parameters
+        ----------
+        value : np.ndarray
+            derivative with the seed vectors along the first axis
+        """
+        self._derivative = value
 
     @property
     def gradient(self) -> numbers.Number:
@@ -614,10 +954,12 @@ class FabTensor(object):
         Returns
         -------
         number
-            returns reverse mode gradient
+            returns reverse mode gradient, a view into the session's adjoint buffer for array values
         """
-        return self._reverse_mode_gradient
-
+        if self.adjoint_slot is None:
+            return 0
+        store, shape, row = self.adjoint_slot
+        return store.get(shape, row)
 
     @gradient.setter
     def gradient(self, value) -> None:
@@ -628,9 +970,257 @@ class FabTensor(object):
         value : np.array or number
             gradient as array or number
         """
-        self._reverse_mode_gradient = value
+        if self.adjoint_slot is not None:
+            store, shape, row = self.adjoint_slot
+            store.set(shape, row, value)
+
+    def accumulate_gradient(self, value) -> None:
+        """adds `value` in place to the reverse mode gradient
+
+        Parameters
+        ----------
+        value : np.array or number
+            contribution to the gradient
+        """
+        if self.adjoint_slot is not None:
+            store, shape, row = self.adjoint_slot
+            store.accumulate(shape, row, value)
 
     def zero_grad(self) -> None:
         """setting reverse mode gradient to zero
         """
-        self._reverse_mode_gradient = 0
+        self.gradient = 0
+
+
+def _check_broadcast(inputs: tuple, array) -> None:
+    """checks that a plain operand of a ufunc does not broadcast a variable `FabTensor` to a larger shape
+
+    Derivatives are stored with the seed vectors on the first axis, so a variable tensor can only be
+    combined elementwise with arrays that broadcast to its own value shape.
+    """
+    shape = np.shape(array)
+    for operand in inputs:
+        if isinstance(operand, FabTensor) and operand.op != "const" and shape:
+            value_shape = np.shape(operand.value)
+            if np.broadcast_shapes(value_shape, shape) != value_shape:
+                raise ValueError(f"Cannot broadcast FabTensor with value of shape {value_shape} against array of"
+                                 f" shape {shape}; create the FabTensor with a value of the broadcast shape")
+
+
+def _binary(name: str, reflected_name: str):
+    """returns a function applying the operator method `name` of whichever operand is a `FabTensor`
+    """
+    def apply(left, right):
+        if isinstance(left, FabTensor):
+            return getattr(left, name)(right)
+        return getattr(right, reflected_name)(left)
+    return apply
+
+
+@functools.lru_cache(maxsize=None)
+def _ufunc_table() -> dict:
+    """ufunc -> fab_ad implementation, built on first use since fab_ad_math imports this module
+    """
+    from . import fab_ad_math
+    return {
+        np.add: _binary("__add__", "__radd__"),
+        np.subtract: _binary("__sub__", "__rsub__"),
+        np.multiply: _binary("__mul__", "__rmul__"),
+        np.true_divide: _binary("__truediv__", "__rtruediv__"),
+        np.power: _binary("__pow__", "__rpow__"),
+        np.equal: _binary("__eq__", "__eq__"),
+        np.not_equal: _binary("__ne__", "__ne__"),
+        np.less: _binary("__lt__", "__gt__"),
+        np.greater: _binary("__gt__", "__lt__"),
+        np.less_equal: _binary("__le__", "__ge__"),
+        np.greater_equal: _binary("__ge__", "__le__"),
+        np.negative: operator.neg,
+        np.positive: lambda tensor: tensor,
+        np.square: lambda tensor: tensor ** 2,
+        np.reciprocal: lambda tensor: tensor ** -1,
+        np.sqrt: fab_ad_math.sqrt,
+        np.exp: fab_ad_math.exp,
+        np.log: fab_ad_math.log,
+        np.sin: fab_ad_math.sin,
+        np.cos: fab_ad_math.cos,
+        np.tan: fab_ad_math.tan,
+        np.arcsin: fab_ad_math.arcsin,
+        np.arccos: fab_ad_math.arccos,
+        np.arctan: fab_ad_math.arctan,
+        np.sinh: fab_ad_math.sinh,
+        np.cosh: fab_ad_math.cosh,
+        np.tanh: fab_ad_math.tanh,
+        np.absolute: fab_ad_math.absolute,
+        np.maximum: fab_ad_math.maximum,
+        np.minimum: fab_ad_math.minimum,
+    }
+
+
+def _reduce_all(tensor, axis=None):
+    """validates that a NumPy reduction spans every element of `tensor`
+    """
+    if axis is not None and not (np.ndim(tensor.value) <= 1 and axis in (0, -1)):
+        raise ValueError(f"Only reductions over all elements of a FabTensor are supported, got axis={axis}")
+    return tensor
+
+
+def _dot(left, right):
+    """dot product of two vectors or scalars, at least one of them a `FabTensor`
+    """
+    from .fab_ad_math import reduce_sum
+    values = [operand.value if isinstance(operand, FabTensor) else operand for operand in (left, right)]
+    if max(np.ndim(value) for value in values) > 1:
+        raise ValueError("np.dot on FabTensor operands supports scalars and vectors only")
+    product = left * right if isinstance(left, FabTensor) else right.__rmul__(left)
+    return reduce_sum(product)
+
+
+@functools.lru_cache(maxsize=None)
+def _array_function_table() -> dict:
+    """NumPy function -> fab_ad implementation
+    """
+    from .fab_ad_math import reduce_sum, where, clip
+    from . import fab_ad_linalg
+    return {
+        np.linalg.solve: fab_ad_linalg.solve,
+        np.linalg.inv: fab_ad_linalg.inv,
+        np.linalg.det: fab_ad_linalg.det,
+        np.linalg.cholesky: fab_ad_linalg.cholesky,
+        np.where: where,
+        np.clip: clip,
+        np.sum: lambda tensor, axis=None: reduce_sum(_reduce_all(tensor, axis)),
+        np.mean: lambda tensor, axis=None: reduce_sum(_reduce_all(tensor, axis)) * (1.0 / np.size(tensor.value)),
+        np.dot: _dot,
+    }
+
+
+class FabConstant(FabTensor):
+
+    # derivative shared by all constants, zero w.r.t every seed vector by broadcasting
+    _ZERO_DERIVATIVE = np.zeros(1)
+    _ZERO_DERIVATIVE.setflags(write=False)
+
+    def __init__(self, value: Union[Iterable, numbers.Number], identifier: str = None):
+        """init method
+
+        Unlike `FabTensor`, a constant is neither an independent variable nor a node of the
+        recorded graph: it is not added to the session's `src_tensors` or `all_tensors`.
+
+        Parameters
+        ----------
+        value : number or array
+            constant value
+        identifier : str, optional
+            expression, by default the value itself
+        """
+        if isinstance(value, Iterable):
+            value = np.array(value)
+        self.value = value
+        self._identifier = identifier
+        self.depth = 0
+        self.mode = AdMode.FORWARD
+        self.source = []
+        self.op = "const"
+        self.operands = ()
+        self.tape_id = None
+        self.adjoint_slot = None
+
+    @property
+    def derivative(self) -> np.ndarray:
+        """zero derivative shared by all constants, broadcast against any number of seed vectors
+        """
+        return FabConstant._ZERO_DERIVATIVE
+
+    @property
+    def identifier(self) -> str:
+        """expression of the constant, formatted from its value on first access
+
+        Formatting is deferred because large array constants (e.g. batched evaluations) are
+        created far more often than they are printed.
+        """
+        if self._identifier is None:
+            self._identifier = str(self.value)
+        return self._identifier
+
+    @identifier.setter
+    def identifier(self, value: str) -> None:
+        self._identifier = value
+
+    def _apply(self, other, operation, reflected: str) -> FabTensor:
+        """applies a binary operation with `self` as left operand
+
+        Parameters
+        ----------
+        other : FabTensor or number
+        operation : callable
+            operation on plain values
+        reflected : str
+            name of the reflected method used when `other` is a variable `FabTensor`
+
+        Returns
+        -------
+        FabTensor
+            a `FabConstant` if `other` is constant, else the node recorded by `other`
+        """
+        if isinstance(other, FabTensor) and other.op != "const":
+            return getattr(other, reflected)(self.value)
+        if isinstance(other, FabTensor):
+            other = other.value
+        elif not isinstance(other, _ALLOWED_NUMERICS):
+            raise TypeError(f"operation not supported between types FabConstant and {type(other)}")
+        return constant(operation(self.value, other))
+
+    def __add__(self, other):
+        return self._apply(other, operator.add, "__radd__")
+
+    def __radd__(self, other):
+        return self._apply(other, lambda a, b: b + a, "__add__")
+
+    def __sub__(self, other):
+        return self._apply(other, operator.sub, "__rsub__")
+
+    def __rsub__(self, other):
+        return self._apply(other, lambda a, b: b - a, "__sub__")
+
+    def __mul__(self, other):
+        return self._apply(other, operator.mul, "__rmul__")
+
+    def __rmul__(self, other):
+        return self._apply(other, lambda a, b: b * a, "__mul__")
+
+    def __pow__(self, other):
+        return self._apply(other, operator.pow, "__rpow__")
+
+    def __rpow__(self, other):
+        return self._apply(other, lambda a, b: b ** a, "__pow__")
+
+
+
+# hashable scalar -> shared FabConstant
+_CONSTANT_POOL = {}
+
+
+def constant(value: Union[Iterable, numbers.Number], identifier: str = None) -> FabConstant:
+    """returns a `FabConstant` holding `value`, shared for common scalar values
+
+    Parameters
+    ----------
+    value : number or array
+        constant value
+    identifier : str, optional
+        expression, by default the value itself
+
+    Returns
+    -------
+    FabConstant
+        constant tensor that never enters the session's source list or graph
+    """
+    if identifier is not None or not isinstance(value, (int, float, np.number)):
+        return FabConstant(value, identifier=identifier)
+    key = (type(value), value)
+    pooled = _CONSTANT_POOL.get(key)
+    if pooled is None:
+        pooled = FabConstant(value)
+        if len(_CONSTANT_POOL) < _MAX_POOLED_CONSTANTS:
+            _CONSTANT_POOL[key] = pooled
+    return pooled
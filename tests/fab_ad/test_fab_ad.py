@@ -2,15 +2,12 @@
 # Created at 2:15 PM 11/22/22 by Saket Joshi
 # This test file contains all the test cases for fab_ad_tensor.py
 
-import sys
-import os
 import numpy as np
 import pytest
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src/fab_ad')))
-from fab_ad_tensor import FabTensor, AdMode
-from fab_ad_session import fab_ad_session
-from fab_ad_diff import auto_diff
-from constants import *
+from fab_ad.fab_ad_tensor import FabTensor, AdMode
+from fab_ad.fab_ad_session import fab_ad_session
+from fab_ad.fab_ad_diff import auto_diff
+from fab_ad.constants import *
 
 
 def test_fabtensor_sanity():
@@ -32,13 +29,13 @@ def test_fabtensor_sanity():
 def test_fabtensor_repr():
     fab_ad_session.initialize(num_inputs=3)
     x = FabTensor(value=3, identifier='x')
-    assert repr(x) == "value: 3 derivative: [1. 0. 0.] name: x reverse mode gradient: 0"
+    assert repr(x) == "value: 3 derivative: [1. 0. 0.] name: x reverse mode gradient: 0.0"
 
 
 def test_fabtensor_str():
     fab_ad_session.initialize(num_inputs=3)
     x = FabTensor(value=3, derivative=0, identifier='x')
-    assert str(x) == "value: 3 derivative: [0] name: x reverse mode gradient: 0"
+    assert str(x) == "value: 3 derivative: [0] name: x reverse mode gradient: 0.0"
 
 
 def test_fabtensor_equal():
@@ -285,5 +282,129 @@ def test_fabtensor_directional_derivative():
     assert z.directional_derivative(seed_vector=[0, 1]) == 3
 
 
+def test_fabtensor_simplify_identities():
+    fab_ad_session.initialize(num_inputs=3)
+    x = FabTensor(value=3, identifier='x')
+    n_tensors = len(fab_ad_session.all_tensors)
+    assert x + 0 is x
+    assert 0 + x is x
+    assert x - 0 is x
+    assert x * 1 is x
+    assert 1 * x is x
+    assert x ** 1 is x
+    assert len(fab_ad_session.all_tensors) == n_tensors
+    # a vector constant broadcasts a scalar tensor and is therefore no identity
+    z = x + np.zeros(3)
+    assert z is not x
+    assert z.value.shape == (3,)
+
+
+def test_fabtensor_simplify_annihilators():
+    fab_ad_session.initialize(num_inputs=3)
+    x = FabTensor(value=3, identifier='x')
+    y = FabTensor(value=-4, identifier='y')
+    z = x * 0
+    assert z.value == 0
+    assert z.source == []
+    assert z.op == "const"
+    assert not np.any(z.derivative)
+    w = z * y + x ** 0
+    assert w.value == 1
+    output = auto_diff(output=w + y, mode=AdMode.REVERSE)
+    assert all(output.gradient == np.array([0, 1]))
+    # operations on constants are folded
+    c = FabTensor(value=2, derivative=0, identifier='c')
+    assert (c * 3 + 1).op == "const"
+    assert (c * 3 + 1).value == 7
+
+
+def test_fabtensor_simplify_constant_chains():
+    fab_ad_session.initialize(num_inputs=3)
+    x = FabTensor(value=3, identifier='x')
+    z = ((x * 2) * 3) * 4
+    assert z.value == 72
+    assert z.derivative[0] == 24
+    assert z.operands == (x, 24)
+    z = ((x + 2) - 5) + 1
+    assert z.value == 1
+    assert z.operands == (x, -2)
+    z = (x * 0.5) * 2
+    assert z is x
+
+
+def test_fabtensor_simplify_disabled():
+    fab_ad_session.initialize(num_inputs=3)
+    fab_ad_session.simplify = False
+    try:
+        x = FabTensor(value=3, identifier='x')
+        z = x * 1
+        assert z is not x
+        assert z.source == [(x, 1)]
+        assert (x * 0).source == [(x, 0)]
+    finally:
+        fab_ad_session.simplify = True
+
+
+def test_fabtensor_cse():
+    fab_ad_session.initialize(num_inputs=3)
+    fab_ad_session.cse = True
+    try:
+        x = FabTensor(value=3, identifier='x')
+        y = FabTensor(value=-4, identifier='y')
+        n_tensors = len(fab_ad_session.all_tensors)
+        z = x * x * x - x * x + 2
+        # x * x is built once and shared
+        assert len(fab_ad_session.all_tensors) == n_tensors + 4
+        assert z.operands[0].operands[1] is z.operands[0].operands[0].operands[0]
+        assert x * y is y * x
+        assert x + 2 is 2 + x
+        assert x - y is not y - x
+        from fab_ad.fab_ad_math import sin, log
+        assert sin(x) is sin(x)
+        assert log(x, 2) is not log(x)
+        output = auto_diff(output=z, mode=AdMode.FORWARD)
+        assert output.value == 20
+        assert output.gradient[0] == 21
+        output = auto_diff(output=z, mode=AdMode.REVERSE)
+        assert output.gradient[0] == 21
+        fab_ad_session.initialize(num_inputs=3)
+        assert fab_ad_session.interned == {}
+    finally:
+        fab_ad_session.cse = False
+
+
+def test_fabtensor_numpy_ufuncs():
+    fab_ad_session.initialize(num_inputs=1)
+    x = FabTensor(value=[0.1, 0.2, 0.3], identifier='x')
+    w = np.array([1.0, 2.0, 3.0])
+    z = w * np.sin(x) + np.exp(x) ** 2 - 1 / np.square(x + 1)
+    assert isinstance(z, FabTensor)
+    expected = w * np.cos(x.value) + 2 * np.exp(2 * x.value) + 2 / (x.value + 1) ** 3
+    assert np.allclose(z.derivative[0], expected)
+    total = np.sum(z)
+    assert total.op == "sum"
+    assert total.value == pytest.approx(np.sum(z.value))
+    assert total.derivative[0] == pytest.approx(np.sum(expected))
+    output = auto_diff(output=total, mode=AdMode.REVERSE)
+    assert np.allclose(output.gradient, expected)
+    assert np.dot(w, x).value == pytest.approx(1.4)
+    assert np.mean(x).derivative[0] == pytest.approx(1.0)
+    assert np.all(np.less(0.15, x) == [False, True, True])
+
+
+def test_fabtensor_numpy_unsupported():
+    fab_ad_session.initialize(num_inputs=1)
+    y = FabTensor(value=2.0, identifier='y')
+    assert np.sum(y) is y
+    assert y.op == "var"
+    assert np.shape(y) == ()
+    with pytest.raises(ValueError):
+        np.ones(3) * y
+    with pytest.raises(TypeError):
+        np.add.reduce(y)
+    with pytest.raises(TypeError):
+        np.add(y, 1.0, out=np.empty(()))
+
+
 if __name__ == "__main__":
     pass
@@ -0,0 +1,163 @@
+import asyncio
+import concurrent.futures
+import threading
+import time
+
+import numpy as np
+import pytest
+
+import fab_ad
+from fab_ad.fab_ad_tensor import FabTensor, AdMode
+from fab_ad.fab_ad_session import fab_ad_session
+from fab_ad.fab_ad_math import sin
+from fab_ad.fab_ad_async import GradientExecutor, auto_diff_async, configure
+
+
+def quadratic(x, y):
+    return x ** 2 + 2 * y ** 2
+
+
+def test_auto_diff_async_isolated_sessions():
+    fab_ad_session.initialize(num_inputs=3)
+    z = FabTensor(value=1.0, identifier="z")
+
+    async def main():
+        points = [[float(k), -float(k)] for k in range(16)]
+        return await asyncio.gather(*(auto_diff_async(quadratic, point) for point in points))
+
+    results = asyncio.run(main())
+    for k, result in enumerate(results):
+        assert result.value == 3 * k ** 2
+        assert np.allclose(result.gradient, [2 * k, -4 * k])
+    assert fab_ad_session.all_tensors == [z]
+    assert fab_ad.auto_diff_async is auto_diff_async
+
+
+def test_concurrency_limit_and_modes():
+    running, peak = [0], [0]
+    lock = threading.Lock()
+
+    def slow(x):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.02)
+        with lock:
+            running[0] -= 1
+        return sin(x) * x
+
+    executor = GradientExecutor(max_workers=8, max_concurrency=2)
+
+    async def main():
+        return await asyncio.gather(*(executor.auto_diff(slow, [0.5], mode=AdMode.REVERSE) for _ in range(6)))
+
+    try:
+        results = asyncio.run(main())
+    finally:
+        executor.shutdown()
+    assert peak[0] == 2
+    assert results[0].gradient == pytest.approx(np.cos(0.5) * 0.5 + np.sin(0.5))
+    with pytest.raises(ValueError):
+        GradientExecutor(max_concurrency=0)
+
+
+def test_cancellation_stops_evaluation():
+    started, finished = threading.Event(), threading.Event()
+
+    def long_running(x):
+        started.set()
+        z = x
+        for _ in range(10 ** 6):
+            z = sin(z)
+            time.sleep(0.001)
+        finished.set()
+        return z
+
+    executor = GradientExecutor(max_workers=1)
+
+    async def main():
+        task = asyncio.ensure_future(executor.auto_diff(long_running, [0.1]))
+        while not started.is_set():
+            await asyncio.sleep(0.005)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        # the worker is free again once the cancelled trace stopped
+        return await executor.auto_diff(quadratic, [1.0, 1.0])
+
+    try:
+        result = asyncio.run(main())
+    finally:
+        executor.shutdown()
+    assert result.value == 3.0
+    assert not finished.is_set()
+
+
+def test_cancelled_evaluation_holds_its_slot():
+    running, peak = [0], [0]
+    lock = threading.Lock()
+    started = threading.Event()
+
+    def stubborn(x):
+        # records nothing while sleeping, so the cancellation only takes effect afterwards
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        started.set()
+        time.sleep(0.1)
+        with lock:
+            running[0] -= 1
+        return x * 2
+
+    executor = GradientExecutor(max_workers=2, max_concurrency=1)
+
+    async def main():
+        task = asyncio.ensure_future(executor.auto_diff(stubborn, [0.1]))
+        while not started.is_set():
+            await asyncio.sleep(0.005)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        return await executor.auto_diff(stubborn, [1.0])
+
+    try:
+        result = asyncio.run(main())
+    finally:
+        executor.shutdown()
+    assert result.gradient == 2.0
+    assert peak[0] == 1
+
+
+def test_process_pools_are_rejected():
+    with concurrent.futures.ProcessPoolExecutor(1) as pool:
+        with pytest.raises(TypeError):
+            GradientExecutor(executor=pool)
+
+
+def test_evaluations_use_the_callers_settings():
+    seen = []
+
+    def observe(x):
+        seen.append((fab_ad_session.cse, fab_ad_session.dtype))
+        return x * x
+
+    executor = GradientExecutor(max_workers=1)
+    fab_ad_session.initialize(num_inputs=1)
+    fab_ad_session.cse = True
+    fab_ad_session.dtype = np.float32
+    try:
+        result = asyncio.run(executor.auto_diff(observe, [3.0]))
+    finally:
+        fab_ad_session.cse = False
+        fab_ad_session.dtype = None
+        executor.shutdown()
+    assert seen == [(True, np.dtype(np.float32))]
+    assert result.gradient == pytest.approx(6.0)
+
+
+def test_configure_replaces_default():
+    executor = configure(max_workers=2, max_concurrency=1)
+    assert executor.max_concurrency == 1
+    result = asyncio.run(auto_diff_async(lambda x: x * 3, [2.0]))
+    assert result.gradient == 3.0
+    configure()
@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+import fab_ad
+from fab_ad.fab_ad_tensor import FabTensor, AdMode
+from fab_ad.fab_ad_session import fab_ad_session
+from fab_ad.fab_ad_math import sin, exp, log
+from fab_ad.fab_ad_check import check_grad, batched_values
+
+
+def chain(*x):
+    z = 0
+    for a, b in zip(x[:-1], x[1:]):
+        z = z + sin(a) * b + exp(0.1 * a)
+    return z
+
+
+def branching(x, y):
+    # Python control flow on values cannot run on a batch
+    if x > 0:
+        return x * y
+    return -x * y
+
+
+def test_batched_values():
+    points = np.array([[1.0, 2.0], [3.0, 4.0], [0.5, 0.25]])
+    values = batched_values(lambda x, y: [x * y, sin(x) + 1], points)
+    assert np.allclose(values, np.stack([points[:, 0] * points[:, 1], np.sin(points[:, 0]) + 1], axis=1))
+
+
+def test_check_grad_large_input():
+    fab_ad_session.initialize(num_inputs=3)
+    z = FabTensor(value=1.0, identifier="z")
+    result = check_grad(chain, np.linspace(-1, 1, 200))
+    assert result.success
+    assert set(result.errors) == {"forward", "reverse"}
+    assert result.errors["forward"].shape == (200,)
+    assert result.max_error("reverse") < 1e-6
+    assert "x" in str(result)
+    assert fab_ad_session.all_tensors == [z]
+    assert fab_ad.check_grad is check_grad
+
+
+def test_check_grad_detects_wrong_gradient():
+    # fab_ad_math.log ignores the base in its value, so its derivative disagrees with it
+    result = check_grad(lambda x: log(x, 2), [3.0])
+    assert not result.success
+    assert result.errors["forward"][0] == pytest.approx(abs(1 / 3 - 1 / (3 * np.log(2))), rel=1e-4)
+    assert "failed" in str(result)
+
+
+def test_check_grad_multiple_outputs_and_point_evaluation():
+    result = check_grad(lambda x, y: [x * y, sin(x) * exp(y)], [0.3, -0.2], modes=[AdMode.REVERSE])
+    assert result.success
+    assert result.numerical.shape == (2, 2)
+    assert set(result.gradients) == {"reverse"}
+    with pytest.raises(ValueError):
+        check_grad(branching, [1.0, 2.0])
+    result = check_grad(branching, [1.0, 2.0], vectorized=False)
+    assert result.success
+    assert np.allclose(result.gradients["forward"], [2.0, 1.0])
+    parallel = check_grad(branching, [-1.0, 2.0], vectorized=False, processes=2)
+    assert parallel.success
+    assert np.allclose(parallel.numerical, [-2.0, 1.0])
@@ -1,10 +1,10 @@
 import numpy as np
 import pytest
 
-from fab_ad_tensor import FabTensor, AdMode
-from fab_ad_session import fab_ad_session
-from fab_ad_diff import auto_diff
-from constants import *
+from fab_ad.fab_ad_tensor import FabTensor, AdMode
+from fab_ad.fab_ad_session import fab_ad_session
+from fab_ad.fab_ad_diff import auto_diff
+from fab_ad.constants import *
 
 
 def test_ad():
@@ -150,5 +150,96 @@ def test_ad():
         auto_diff(None, mode=AdMode.REVERSE)
 
 
+def test_reverse_mode_selected_inputs():
+    fab_ad_session.initialize(num_inputs=3)
+    x = FabTensor(value=2.0, identifier="x")
+    y = FabTensor(value=3.0, identifier="y")
+    w = FabTensor(value=np.array([1.0, 2.0]), identifier="w")
+    branch = y * 4.0
+    z = x * x * branch
+    result = auto_diff(z, mode=AdMode.REVERSE, inputs=[x])
+    assert result.gradient == 2 * 2.0 * 12.0
+    # the branch that only depends on y is not accumulated
+    assert branch.gradient == 0.0 and y.gradient == 0.0
+    result = auto_diff(z, mode=AdMode.REVERSE, inputs=[x, y])
+    assert np.allclose(result.gradient, [48.0, 16.0])
+    assert branch.gradient == 4.0
+    gradients = auto_diff([z, w * 3.0], mode=AdMode.REVERSE, inputs=[w]).gradient
+    assert np.allclose(gradients, [[0.0, 0.0], [3.0, 3.0]])
+    with pytest.raises(ValueError):
+        auto_diff(z, mode=AdMode.FORWARD, inputs=[x])
+
+
+def test_output_buffers_and_lazy_str():
+    fab_ad_session.initialize(num_inputs=2)
+    x = FabTensor(value=3.0, identifier="x")
+    y = FabTensor(value=-4.0, identifier="y")
+    z = x ** 2 + 2 * y ** 2
+    result = auto_diff(z, mode=AdMode.FORWARD)
+    # a single output's gradient is a read-only view of its derivative
+    assert np.shares_memory(result.gradient, z.derivative)
+    assert not result.gradient.flags.writeable
+    text = str(result)
+    fab_ad_session.initialize(num_inputs=1)
+    assert str(result) == text == "Function 0: Value: 41.0\nGradient w.r.t x = 6.0\nGradient w.r.t y = -16.0\n"
+
+    fab_ad_session.initialize(num_inputs=2)
+    x = FabTensor(value=3.0, identifier="x")
+    y = FabTensor(value=-4.0, identifier="y")
+    outputs = [x * y, x + y, x ** 2]
+    for mode in (AdMode.FORWARD, AdMode.REVERSE):
+        values, jacobian = np.empty(3), np.empty((3, 2))
+        result = auto_diff(outputs, mode=mode, out=(values, jacobian))
+        assert result.value is values and result.gradient is jacobian
+        np.testing.assert_allclose(values, [-12.0, -1.0, 9.0])
+        np.testing.assert_allclose(jacobian, [[-4.0, 3.0], [1.0, 1.0], [6.0, 0.0]])
+    values, gradient = np.empty(()), np.empty(2)
+    result = auto_diff(outputs[0], mode=AdMode.REVERSE, out=(values, gradient))
+    assert result.gradient is gradient
+    np.testing.assert_allclose(gradient, [-4.0, 3.0])
+    with pytest.raises(TypeError):
+        auto_diff(outputs, mode=AdMode.FORWARD, out=[values, jacobian])
+
+    # several outputs of a single input fill a vector of scalar rows
+    fab_ad_session.initialize(num_inputs=1)
+    x = FabTensor(value=3.0, identifier="x")
+    for mode in (AdMode.FORWARD, AdMode.REVERSE):
+        values, jacobian = np.empty(2), np.empty(2)
+        result = auto_diff([x * x, x * 2.0], mode=mode, out=(values, jacobian))
+        assert result.gradient is jacobian
+        np.testing.assert_allclose(jacobian, [6.0, 2.0])
+
+
+def test_dest_tensors_is_deprecated():
+    fab_ad_session.initialize(num_inputs=1)
+    x = FabTensor(value=2.0, identifier="x")
+    outputs = [x * x, x * 3.0]
+    for mode in (AdMode.FORWARD, AdMode.REVERSE):
+        auto_diff(outputs, mode=mode)
+        with pytest.warns(DeprecationWarning):
+            assert fab_ad_session.dest_tensors == outputs
+    auto_diff(outputs[0], mode=AdMode.FORWARD)
+    with pytest.warns(DeprecationWarning):
+        assert fab_ad_session.dest_tensors == [outputs[0]]
+    with pytest.warns(DeprecationWarning):
+        fab_ad_session.dest_tensors = []
+
+
+def test_forward_mode_folded_constant_outputs():
+    fab_ad_session.initialize(num_inputs=2)
+    x = FabTensor(value=3.0, identifier="x")
+    y = FabTensor(value=4.0, identifier="y")
+    result = auto_diff(x * 0, mode=AdMode.FORWARD)
+    np.testing.assert_array_equal(result.gradient, [0.0, 0.0])
+    result = auto_diff([x * 0, x * y], mode=AdMode.FORWARD)
+    np.testing.assert_array_equal(result.value, [0.0, 12.0])
+    np.testing.assert_array_equal(result.gradient, [[0.0, 0.0], [4.0, 3.0]])
+    values, jacobian = np.empty(2), np.empty((2, 2))
+    auto_diff([x * y, x * 0], mode=AdMode.FORWARD, out=(values, jacobian))
+    np.testing.assert_array_equal(jacobian, [[4.0, 3.0], [0.0, 0.0]])
+    w = FabTensor(value=np.array([1.0, 2.0, 3.0]), identifier="w")
+    assert auto_diff(w * 0, mode=AdMode.FORWARD).gradient.shape == (3, 3)
+
+
 if __name__ == "__main__":
     test_ad()
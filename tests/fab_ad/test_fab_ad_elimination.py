@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+import fab_ad
+from fab_ad.fab_ad_tensor import FabTensor, AdMode
+from fab_ad.fab_ad_session import fab_ad_session
+from fab_ad.fab_ad_diff import auto_diff
+from fab_ad.fab_ad_math import sin, exp, log
+from fab_ad.fab_ad_elimination import mixed_jacobian
+
+
+def build(n_inputs=6, n_outputs=6, depth=8):
+    fab_ad_session.initialize(num_inputs=n_inputs)
+    inputs = [FabTensor(value=0.1 * (idx + 1), identifier=f"x{idx}") for idx in range(n_inputs)]
+    # all inputs funnel through a narrow chain before fanning out again
+    hidden = sum(inputs[1:], inputs[0] * 1.5)
+    for _ in range(depth):
+        hidden = sin(hidden) * 0.9 + exp(hidden * 0.1)
+    outputs = [log(hidden * hidden + idx) * inputs[idx % n_inputs] for idx in range(1, n_outputs + 1)]
+    return inputs, outputs
+
+
+def reverse_jacobian(outputs):
+    return np.array(auto_diff(outputs, mode=AdMode.REVERSE).gradient)
+
+
+@pytest.mark.parametrize("order", ["markowitz", "forward", "reverse"])
+def test_mixed_jacobian_matches_reverse_mode(order):
+    inputs, outputs = build()
+    result = mixed_jacobian(outputs, order=order)
+    assert result.jacobian.shape == (6, 6)
+    np.testing.assert_allclose(result.jacobian, reverse_jacobian(outputs), rtol=1e-12)
+
+
+def test_markowitz_beats_pure_modes():
+    inputs, outputs = build()
+    result = mixed_jacobian(outputs)
+    assert result.n_eliminated > 0
+    assert result.n_multiply_adds < min(result.forward_multiply_adds, result.reverse_multiply_adds)
+    assert result.n_multiply_adds <= mixed_jacobian(outputs, order="forward").n_multiply_adds
+    assert result.n_multiply_adds <= mixed_jacobian(outputs, order="reverse").n_multiply_adds
+    assert "Multiply-adds" in str(result)
+
+
+def test_shared_outputs_and_inputs():
+    fab_ad_session.initialize(num_inputs=2)
+    x = FabTensor(value=0.5, identifier="x")
+    y = FabTensor(value=2.0, identifier="y")
+    s = x * x
+    z = s * y
+    # s feeds z, x is itself an output, z is repeated
+    result = mixed_jacobian([s, z, x, z], inputs=[x, y])
+    np.testing.assert_allclose(result.jacobian, [[1.0, 0.0], [2.0, 0.25], [1.0, 0.0], [2.0, 0.25]])
+    assert fab_ad.mixed_jacobian is mixed_jacobian
+    with pytest.raises(ValueError):
+        mixed_jacobian(z, order="random")
+    fab_ad_session.initialize(num_inputs=1)
+    with pytest.raises(ValueError):
+        mixed_jacobian(FabTensor(value=[1.0, 2.0], identifier="v") * 2.0)
@@ -0,0 +1,77 @@
+import json
+
+import pytest
+
+import fab_ad
+from fab_ad.fab_ad_tensor import FabTensor
+from fab_ad.fab_ad_session import fab_ad_session
+from fab_ad.fab_ad_math import sin
+from fab_ad.fab_ad_graph import graph_stats, topological_order, to_dot, to_json, activity
+
+
+def build():
+    fab_ad_session.initialize(num_inputs=3)
+    x = FabTensor(value=0.5, identifier="x")
+    y = FabTensor(value=2.0, identifier="y")
+    s = sin(x)
+    z = s * y + s * x
+    return x, y, s, z
+
+
+def test_topological_order():
+    x, y, s, z = build()
+    order = topological_order(z)
+    assert len(order) == 6
+    for idx, node in enumerate(order):
+        for source_tensor, _ in node.source:
+            assert order.index(source_tensor) < idx
+    assert order[-1] is z
+
+
+def test_graph_stats():
+    x, y, s, z = build()
+    stats = graph_stats(z)
+    assert stats.n_nodes == 6 and stats.n_edges == 7
+    assert stats.op_counts == {"var": 2, "sin": 1, "mul": 2, "add": 1}
+    assert stats.fan_in_histogram == {0: 2, 1: 1, 2: 3}
+    # x feeds sin and a product, s feeds both products
+    assert stats.fan_out[stats.nodes.index(s)] == 2
+    assert stats.n_shared == 1
+    assert stats.critical_path_length == 3
+    assert [node.op for node in stats.critical_path()] == ["var", "sin", "mul", "add"]
+    assert stats.level_histogram == {0: 2, 1: 1, 2: 2, 3: 1}
+    assert "Shared subexpressions: 1" in str(stats)
+    # a node used twice by a single consumer is not shared
+    square = graph_stats(s * s)
+    assert square.fan_out[square.nodes.index(s)] == 2
+    assert square.n_shared == 0
+    both = graph_stats([z, s])
+    assert both.n_nodes == 6
+    assert fab_ad.graph_stats is graph_stats
+    with pytest.raises(TypeError):
+        graph_stats([z, 1.0])
+
+
+def test_exports():
+    x, y, s, z = build()
+    dot = to_dot(z)
+    assert dot.startswith('digraph "fab_ad" {')
+    assert dot.count("->") == 7
+    assert 'label="sin"' in dot and 'label="x"' in dot and "doublecircle" in dot
+    exported = json.loads(to_json(z, indent=2))
+    assert len(exported["nodes"]) == 6
+    assert exported["outputs"] == [5]
+    assert exported["nodes"][5]["op"] == "add"
+    assert exported["stats"]["critical_path_length"] == 3
+    assert exported["stats"]["op_counts"]["mul"] == 2
+
+
+def test_activity():
+    x, y, s, z = build()
+    w = FabTensor(value=1.0, identifier="w")
+    square = w * w
+    out = z + square
+    assert activity(out, [w]) == [w, square, out]
+    # y and the branch of w are not varied by x
+    assert [node for node in topological_order(out) if node not in activity(out, [x])] == [y, w, square]
+    assert activity(z, [w]) == []
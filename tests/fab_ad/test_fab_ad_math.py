@@ -2,16 +2,14 @@
 # Created at 2:15 PM 11/22/22 by Saket Joshi
 # This test file contains all the test cases for fab_ad_tensor.py
 
-import sys
-import os
 import numpy as np
 import pytest
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src/fab_ad')))
-from fab_ad_tensor import FabTensor, AdMode
-from fab_ad_diff import auto_diff
-from fab_ad_session import fab_ad_session
-from fab_ad_math import *
-from constants import *
+from fab_ad.fab_ad_tensor import FabTensor, AdMode
+from fab_ad.fab_ad_diff import auto_diff
+from fab_ad.fab_ad_session import fab_ad_session
+from fab_ad.fab_ad_math import *
+from fab_ad.fab_ad_tensor import FabConstant, constant
+from fab_ad.constants import *
 
 
 def test_fabtensor_sqrt():
@@ -164,7 +162,7 @@ def test_fabtensor_arccos():
     x = FabTensor(value=0.5 * (3 ** 0.5), identifier='x')
     y = FabTensor(value=0.5 * (3 ** 0.5), identifier='y')
     z = arccos(x) + arccos(y)
-    assert pytest.approx(z.value, 0.01) == 1.0471975511965979 * 2
+    assert pytest.approx(z.value, 0.01) == np.pi / 6 * 2
     assert pytest.approx(z.derivative[0], 0.0001) == -2
     assert pytest.approx(z.derivative[1], 0.0001) == -2
     assert z.identifier == 'cos^-1(x) + cos^-1(y)'
@@ -208,7 +206,7 @@ def test_fabtensor_arcsec():
     x = FabTensor(value=2 / (3 ** 0.5), identifier='x')
     y = FabTensor(value=2 / (3 ** 0.5), identifier='y')
     z = arcsec(x) + arcsec(y)
-    assert pytest.approx(z.value, 0.01) == 1.0471975511965979 * 2
+    assert pytest.approx(z.value, 0.01) == np.pi / 6 * 2
     assert pytest.approx(z.derivative[0], 0.0001) == 1.5
     assert pytest.approx(z.derivative[1], 0.0001) == 1.5
     z = arcsec(2)
@@ -267,7 +265,11 @@ def test_fabtensor_tanh():
     assert pytest.approx(z.derivative[0], 0.0001) == 0.78644773
     assert z.identifier == 'tanh(x)'
     z = tanh(0)
-    assert pytest.approx(z.value, 0.00001) == 1
+    assert pytest.approx(z.value, 0.00001) == 0
+    # constant operands are folded through the numeric branch
+    assert tanh(constant(0.5)).value == pytest.approx(np.tanh(0.5))
+    assert tanh(x * 0).value == pytest.approx(0.0)
+    assert tanh(stop_gradient(x)).value == pytest.approx(np.tanh(0.5))
     with pytest.raises(TypeError):
         tanh({0.0})
 
@@ -304,8 +306,9 @@ def test_fabtensor_coth():
     assert pytest.approx(z.value, 0.01) == 2.163953413738653
     assert pytest.approx(z.derivative[0], 0.0001) == -3.68269438
     assert z.identifier == '1 / tanh(x)'
-    z = coth(0)
-    assert pytest.approx(z.value, 0.00001) == 1
+    with np.errstate(divide="ignore"):
+        z = coth(0)
+    assert np.isinf(z.value)
     with pytest.raises(TypeError):
         coth({0.0})
 
@@ -323,5 +326,126 @@ def test_fabtensor_logistic():
         logistic({0.0})
 
 
+def test_fabtensor_constants_not_recorded():
+    fab_ad_session.initialize(num_inputs=3)
+    x = FabTensor(value=3, identifier='x')
+    y = FabTensor(value=-4, identifier='y')
+    z = sin(3.0) * x + log(2) * y + cos(np.pi) + sqrt(x) * exp(2)
+    assert fab_ad_session.src_tensors == [x, y]
+    assert all(not isinstance(tensor, FabConstant) for tensor in fab_ad_session.all_tensors)
+    assert all(operand is x or operand is y or not isinstance(operand, FabTensor)
+               for tensor in fab_ad_session.all_tensors for operand, _ in tensor.source
+               if not operand.source)
+    output = auto_diff(output=z, mode=AdMode.REVERSE)
+    assert output.gradient[0] == pytest.approx(np.sin(3.0) + np.exp(2) / (2 * np.sqrt(3)))
+    assert output.gradient[1] == pytest.approx(np.log(2))
+    assert len(output.gradient) == 2
+
+
+def test_fabtensor_constant_pool_and_folding():
+    fab_ad_session.initialize(num_inputs=3)
+    assert sin(0.0) is sin(0.0)
+    assert cos(0) is cos(0.0)
+    assert constant(1.0) is constant(1.0)
+    c = sin(np.pi / 2) * 2 + 1
+    assert isinstance(c, FabConstant)
+    assert c.value == 3
+    assert isinstance(sin(c), FabConstant)
+    assert fab_ad_session.all_tensors == []
+    x = FabTensor(value=2, identifier='x')
+    z = c * x
+    assert z.source == [(x, 3.0)]
+    assert (c - x).value == 1
+    assert (c ** x).value == 9
+    assert (c / x).value == 1.5
+    assert isinstance(constant([1, 2]) + 1, FabConstant)
+    with pytest.raises(TypeError):
+        c + {1.0}
+
+
+def test_piecewise_primitives_on_batches():
+    fab_ad_session.initialize(num_inputs=1)
+    x = FabTensor(value=np.array([-2.0, -0.5, 0.0, 0.5, 2.0]), identifier="x")
+    np.testing.assert_allclose(relu(x).value, [0, 0, 0, 0.5, 2])
+    np.testing.assert_allclose(relu(x).derivative[0], [0, 0, 0, 1, 1])
+    np.testing.assert_allclose(absolute(x).derivative[0], [-1, -1, 0, 1, 1])
+    np.testing.assert_allclose(clip(x, -1, 1).value, [-1, -0.5, 0, 0.5, 1])
+    np.testing.assert_allclose(clip(x, -1, 1).derivative[0], [0, 1, 1, 1, 0])
+    # subgradients are split evenly at ties
+    np.testing.assert_allclose(maximum(x, 0.0).derivative[0], [0, 0, 0.5, 1, 1])
+    np.testing.assert_allclose(minimum(x, 0.0).derivative[0], [1, 1, 0.5, 0, 0])
+    # piecewise model over the whole batch without python branches
+    f = where(x > 0, x ** 2, sin(x))
+    np.testing.assert_allclose(f.value, np.where(x.value > 0, x.value ** 2, np.sin(x.value)))
+    np.testing.assert_allclose(f.derivative[0], np.where(x.value > 0, 2 * x.value, np.cos(x.value)))
+    assert f.source[0][0].op == "pow" and f.source[1][0].op == "sin"
+    # numpy dispatch
+    np.testing.assert_allclose(np.abs(x).value, np.abs(x.value))
+    np.testing.assert_allclose(np.maximum(x, 1.0).value, np.maximum(x.value, 1.0))
+    np.testing.assert_allclose(np.clip(x, -1, 1).value, clip(x, -1, 1).value)
+    np.testing.assert_allclose(np.where(x.value < 0, -x, x).value, np.abs(x.value))
+
+
+def test_piecewise_primitives_reverse_mode():
+    fab_ad_session.initialize(num_inputs=2)
+    x = FabTensor(value=-3.0, identifier="x")
+    y = FabTensor(value=2.0, identifier="y")
+    z = maximum(x, y) * absolute(x) + relu(y) + clip(x, -1, y)
+    assert z.value == pytest.approx(2 * 3 + 2 - 1)
+    forward = auto_diff(z, mode=AdMode.FORWARD).gradient
+    reverse = auto_diff(z, mode=AdMode.REVERSE).gradient
+    np.testing.assert_allclose(forward, [-2, 3 + 1])
+    np.testing.assert_allclose(reverse, forward)
+    assert isinstance(where(True, 1.0, 2.0), FabConstant)
+    assert relu(-1.0).value == 0
+
+    # constant first operands are not differentiated and add no edge
+    fab_ad_session.initialize(num_inputs=2)
+    x = FabTensor(value=-3.0, identifier="x")
+    y = FabTensor(value=2.0, identifier="y")
+    for z in (maximum(constant(1.0), x), np.maximum(constant(1.0), x), clip(constant(3.0), x, 5.0),
+              maximum(stop_gradient(y), x), minimum(stop_gradient(y), y * 2)):
+        assert all(source.op != "const" for source, _ in z.source)
+        np.testing.assert_allclose(auto_diff(z, mode=AdMode.REVERSE).gradient, auto_diff(z, mode=AdMode.FORWARD).gradient)
+    assert auto_diff(clip(constant(3.0), x, 5.0), mode=AdMode.REVERSE).gradient[0] == pytest.approx(0.0)
+    assert auto_diff(clip(constant(-4.0), x, 5.0), mode=AdMode.REVERSE).gradient[0] == pytest.approx(1.0)
+    # value and gradient would disagree on inverted bounds
+    with pytest.raises(ValueError):
+        clip(x, 1.0, -1.0)
+    with pytest.raises(ValueError):
+        np.clip(x, y, -5.0)
+
+
+def test_piecewise_primitives_codegen():
+    from fab_ad.fab_ad_codegen import compile_gradient
+    fab_ad_session.initialize(num_inputs=2)
+    x = FabTensor(value=0.5, identifier="x")
+    y = FabTensor(value=-1.0, identifier="y")
+    z = relu(x) * maximum(x, y) + clip(y, -0.5, 0.5) * absolute(y) + minimum(x, y)
+    fn = compile_gradient(z)
+    for point in ([0.5, -1.0], [-2.0, 0.25], [1.0, 1.0]):
+        fab_ad_session.initialize(num_inputs=2)
+        px, py = FabTensor(value=point[0], identifier="x"), FabTensor(value=point[1], identifier="y")
+        expected = relu(px) * maximum(px, py) + clip(py, -0.5, 0.5) * absolute(py) + minimum(px, py)
+        value, gradient = fn(*point)
+        assert value == pytest.approx(expected.value)
+        np.testing.assert_allclose(gradient, np.ravel(auto_diff(expected, mode=AdMode.REVERSE).gradient))
+
+
+def test_stop_gradient():
+    fab_ad_session.initialize(num_inputs=1)
+    x = FabTensor(value=2.0, identifier="x")
+    scale = stop_gradient(x * x)
+    assert scale.op == "const" and scale.value == 4.0
+    z = x * scale + sin(x.detach())
+    # x, x * x, x * 4 and the sum: nothing is recorded after the stop
+    assert len(fab_ad_session.all_tensors) == 4
+    assert auto_diff(z, mode=AdMode.FORWARD).gradient == pytest.approx(4.0)
+    assert auto_diff(z, mode=AdMode.REVERSE).gradient == pytest.approx(4.0)
+    assert stop_gradient(np.array([1.0, 2.0])).op == "const"
+    with pytest.raises(TypeError):
+        stop_gradient("x")
+
+
 if __name__ == "__main__":
     pass
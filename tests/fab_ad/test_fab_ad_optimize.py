@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+import fab_ad
+from fab_ad.fab_ad_tensor import FabTensor
+from fab_ad.fab_ad_session import fab_ad_session
+from fab_ad.fab_ad_math import exp, sin
+from fab_ad.fab_ad_optimize import minimize, gradient_descent, momentum, adam, lbfgs, RecordedObjective
+
+
+def rosenbrock(x, y):
+    return (1 - x) ** 2 + 100 * (y - x ** 2) ** 2
+
+
+def bowl(x, y):
+    return x ** 2 + y ** 4
+
+
+def test_recorded_objective_replays_without_touching_session():
+    fab_ad_session.initialize(num_inputs=3)
+    z = FabTensor(value=1.0, identifier="z")
+    objective = RecordedObjective(lambda x, y: x * sin(y) + exp(x), [0.5, 2.0])
+    assert fab_ad_session.src_tensors == [z]
+    assert fab_ad_session.all_tensors == [z]
+    value, gradient = objective(np.array([1.0, 0.3]))
+    assert value == pytest.approx(np.sin(0.3) + np.e)
+    assert np.allclose(gradient, [np.sin(0.3) + np.e, np.cos(0.3)])
+    assert objective.n_evaluations == 1
+    assert set(objective.timings) == {"record", "evaluate"}
+    with pytest.raises(TypeError):
+        RecordedObjective(lambda x: 3.0, [1.0])
+
+
+def test_lbfgs_rosenbrock():
+    result = lbfgs(rosenbrock, [-1.2, 1.0])
+    assert result.success
+    assert np.allclose(result.x, [1.0, 1.0], atol=1e-6)
+    assert result.n_iterations < 100
+    assert result.n_evaluations >= result.n_iterations
+    assert set(result.timings) == {"record", "evaluate", "update"}
+    assert "Iterations" in str(result)
+
+
+def test_first_order_methods():
+    result = gradient_descent(bowl, [1.0, 1.0], learn_rate=0.2, n_iter=5000, tolerance=1e-4)
+    assert result.success
+    assert abs(result.x[0]) < 1e-6 and abs(result.x[1]) < 0.1
+    result = momentum(lambda x, y: (x - 3) ** 2 + 2 * (y + 1) ** 2, [0.0, 0.0], learn_rate=0.05)
+    assert np.allclose(result.x, [3.0, -1.0], atol=1e-5)
+    result = adam(lambda x, y: (x - 3) ** 2 + 2 * (y + 1) ** 2, [0.0, 0.0], learn_rate=0.05, n_iter=20000)
+    assert np.allclose(result.x, [3.0, -1.0], atol=1e-3)
+
+
+def test_minimize_dispatch():
+    result = fab_ad.optimize.minimize(lambda x, y, z: (x - 1) ** 2 + (y - 2) ** 2 + (z - 3) ** 2, np.zeros(3))
+    assert np.allclose(result.x, [1.0, 2.0, 3.0])
+    assert fab_ad.minimize is minimize
+    with pytest.raises(ValueError):
+        minimize(bowl, [1.0, 1.0], method="newton")
@@ -0,0 +1,42 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+import fab_ad
+
+
+def test_import_is_lazy():
+    # a fresh interpreter must not pull in numpy or any submodule on `import fab_ad`
+    code = (
+        "import sys, fab_ad; "
+        "loaded = [m for m in sys.modules if m == 'numpy' or m.startswith('fab_ad.')]; "
+        "print(','.join(loaded))"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                            env=dict(os.environ, PYTHONPATH=os.path.dirname(fab_ad.__path__[0])))
+    assert result.stdout.strip() == ""
+
+
+def test_public_api():
+    from fab_ad.fab_ad_tensor import FabTensor
+    from fab_ad.fab_ad_diff import auto_diff
+    from fab_ad.fab_ad_math import sin
+    assert fab_ad.FabTensor is FabTensor
+    assert fab_ad.auto_diff is auto_diff
+    assert fab_ad.sin is sin
+    assert "FabTensor" in dir(fab_ad)
+    assert set(fab_ad.__all__) <= set(dir(fab_ad))
+    with pytest.raises(AttributeError):
+        fab_ad.does_not_exist
+
+
+def test_package_usage():
+    fab_ad.FabAdSession
+    from fab_ad.fab_ad_session import fab_ad_session
+    fab_ad_session.initialize(num_inputs=3)
+    x = fab_ad.FabTensor(value=3, identifier="x")
+    result = fab_ad.auto_diff(fab_ad.sin(x) * x, mode=fab_ad.AdMode.FORWARD)
+    assert result.gradient == pytest.approx(3 * np.cos(3) + np.sin(3))
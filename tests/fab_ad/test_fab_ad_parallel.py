@@ -0,0 +1,71 @@
+import os
+import time
+
+import numpy as np
+import pytest
+
+import fab_ad
+from fab_ad.fab_ad_parallel import parallel_gradient
+from fab_ad.fab_ad_stream import stream_gradient
+
+
+def shards(n_shards, shard_size, seed=0):
+    rng = np.random.default_rng(seed)
+    data = []
+    for _ in range(n_shards):
+        inputs = rng.uniform(-1, 1, shard_size)
+        data.append(np.stack([inputs, 2.0 * inputs - 0.5 + rng.normal(0, 0.1, shard_size)], axis=1))
+    return data
+
+
+def squared_error(params, shard):
+    slope, intercept = params
+    total = 0
+    for feature, target in shard:
+        total = total + (slope * feature + intercept - target) ** 2
+    return total
+
+
+def failing(params, shard):
+    raise ValueError("bad shard")
+
+
+def slow_on_first_worker(params, shard):
+    if shard[0, 0] < 0:
+        time.sleep(2.0)
+    return squared_error(params, shard)
+
+
+def dying(params, shard):
+    os._exit(3)
+
+
+@pytest.mark.parametrize("reduction, n_workers", [("ring", 3), ("tree", 4), ("ring", 1)])
+def test_parallel_gradient_matches_serial(reduction, n_workers):
+    x = np.array([1.5, 0.2])
+    data = shards(10, 8)
+    result = parallel_gradient(squared_error, x, data, n_workers=n_workers, reduction=reduction)
+    serial = stream_gradient(squared_error, x, data)
+    assert result.value == pytest.approx(serial.value)
+    assert np.allclose(result.gradient, serial.gradient)
+    assert result.n_workers == n_workers and result.n_shards == 10 and result.n_records == 80
+    assert len(result.worker_seconds) == n_workers
+    averaged = parallel_gradient(squared_error, x, data, n_workers=2, average=True)
+    assert np.allclose(averaged.gradient, serial.gradient / 80)
+    assert fab_ad.parallel_gradient is parallel_gradient
+
+
+def test_parallel_gradient_failures():
+    x = np.array([1.5, 0.2])
+    data = shards(4, 4)
+    with pytest.raises(RuntimeError, match="bad shard"):
+        parallel_gradient(failing, x, data, n_workers=2)
+    with pytest.raises(RuntimeError, match="exited with code 3"):
+        parallel_gradient(dying, x, data, n_workers=2)
+    # only worker 0 gets a shard starting with a negative feature
+    data = [np.abs(shard) for shard in data]
+    data[0][0, 0] = -1.0
+    with pytest.raises(TimeoutError):
+        parallel_gradient(slow_on_first_worker, x, data, n_workers=2, straggler_timeout=0.2)
+    with pytest.raises(ValueError):
+        parallel_gradient(squared_error, x, data, reduction="butterfly")
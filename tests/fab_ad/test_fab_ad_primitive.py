@@ -0,0 +1,111 @@
+import numpy as np
+import pytest
+
+import fab_ad
+from fab_ad.fab_ad_tensor import FabTensor, AdMode
+from fab_ad.fab_ad_session import fab_ad_session
+from fab_ad.fab_ad_diff import auto_diff
+from fab_ad.fab_ad_math import exp, log, reduce_sum
+from fab_ad.fab_ad_primitive import primitive, op_name
+from fab_ad.fab_ad_graph import graph_stats, to_json
+
+
+@primitive
+def softplus(x):
+    return np.log1p(np.exp(x))
+
+
+softplus.defjvp(lambda tangent, ans, x: tangent / (1 + np.exp(-x)))
+softplus.defvjp(lambda adjoint, ans, x: adjoint / (1 + np.exp(-x)))
+
+
+@primitive(name="weighted_norm")
+def weighted_norm(x, w):
+    return np.sqrt(np.sum(w * x * x))
+
+
+weighted_norm.defjvp(
+    lambda tangent, ans, x, w: np.sum(tangent * w * x, axis=-1) / ans,
+    lambda tangent, ans, x, w: np.sum(tangent * x * x, axis=-1) / (2 * ans),
+).defvjp(
+    lambda adjoint, ans, x, w: adjoint * w * x / ans,
+    lambda adjoint, ans, x, w: adjoint * x * x / (2 * ans),
+)
+
+
+def test_primitive_is_a_single_node():
+    fab_ad_session.initialize(num_inputs=1)
+    x = FabTensor(value=0.3, identifier="x")
+    y = softplus(x)
+    assert op_name(y.op) == "softplus" and y.identifier == "softplus(x)"
+    assert graph_stats(y).op_counts == {"var": 1, "softplus": 1}
+    assert '"op": "softplus"' in to_json(y)
+    assert len(fab_ad_session.all_tensors) == 2
+    assert y.value == pytest.approx(np.log1p(np.exp(0.3)))
+    composed = log(exp(x) + 1)
+    assert auto_diff(y, mode=AdMode.FORWARD).gradient == pytest.approx(auto_diff(composed, mode=AdMode.FORWARD).gradient)
+    assert auto_diff(y, mode=AdMode.REVERSE).gradient == pytest.approx(1 / (1 + np.exp(-0.3)))
+    assert softplus(2.0).op == "const"
+    assert fab_ad.primitive is primitive
+
+
+def test_primitive_with_array_arguments():
+    x0, w0 = np.array([1.0, 2.0, 3.0]), np.array([0.5, 1.0, 2.0])
+    fab_ad_session.initialize(num_inputs=2)
+    x = FabTensor(value=x0, identifier="x")
+    w = FabTensor(value=w0, identifier="w")
+    y = weighted_norm(x, w) * 2.0
+    auto_diff(y, mode=AdMode.REVERSE)
+    norm = np.sqrt(np.sum(w0 * x0 * x0))
+    np.testing.assert_allclose(x.gradient, 2 * w0 * x0 / norm)
+    np.testing.assert_allclose(w.gradient, x0 * x0 / norm)
+    # forward mode seeds each input with ones
+    forward = auto_diff(y, mode=AdMode.FORWARD).gradient
+    np.testing.assert_allclose(forward, [np.sum(x.gradient), np.sum(w.gradient)])
+    # constant arguments are not differentiated
+    assert weighted_norm(x, w0).source[0][0] is x
+
+
+def test_primitive_names_do_not_collide():
+    @primitive(name="add")
+    def shift(x, c):
+        return x + 2 * c
+
+    shift.defjvp(lambda tangent, ans, x, c: tangent)
+
+    @primitive(name="pow")
+    def scale(x, k):
+        return x * k
+
+    scale.defjvp(lambda tangent, ans, x, k: tangent * k)
+    fab_ad_session.initialize(num_inputs=1)
+    x = FabTensor(value=1.0, identifier="x")
+    # not folded into x + 2 nor annihilated like x ** 0
+    assert shift(shift(x, 1.0), 1.0).value == 5.0
+    assert scale(x, 0).value == 0.0
+
+    def multiply_by(factor):
+        by_factor = primitive(lambda x: x * factor, name="multiply")
+        return by_factor.defjvp(lambda tangent, ans, x: tangent * factor)
+
+    fab_ad_session.cse = True
+    try:
+        f2, f3 = multiply_by(2.0), multiply_by(3.0)
+        assert f2(x).value == 2.0
+        assert f3(x).value == 3.0
+        assert f2(x) is f2(x)
+    finally:
+        fab_ad_session.cse = False
+
+
+def test_missing_rules():
+    no_rules = primitive(lambda x, y: x * y, name="product")
+    fab_ad_session.initialize(num_inputs=1)
+    x = FabTensor(value=2.0, identifier="x")
+    with pytest.raises(NotImplementedError):
+        no_rules(x, 3.0)
+    no_rules.defjvp(lambda tangent, ans, x, y: tangent * y)
+    z = no_rules(x, 3.0)
+    assert auto_diff(z, mode=AdMode.FORWARD).gradient == pytest.approx(3.0)
+    with pytest.raises(NotImplementedError):
+        auto_diff(reduce_sum(z), mode=AdMode.REVERSE)
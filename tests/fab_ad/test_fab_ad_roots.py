@@ -0,0 +1,116 @@
+import numpy as np
+import pytest
+
+import fab_ad
+from fab_ad.fab_ad_tensor import FabTensor
+from fab_ad.fab_ad_session import fab_ad_session
+from fab_ad.fab_ad_math import exp, sin
+from fab_ad.fab_ad_tensor import AdMode
+from fab_ad.fab_ad_diff import auto_diff
+from fab_ad.fab_ad_math import reduce_sum
+from fab_ad.fab_ad_roots import value_and_jacobian, evaluate, newton, broyden, find_root, implicit_root
+
+
+def cubic(x):
+    return x * x * x - x * x + 2
+
+
+def circle_exp(x, y):
+    return [x * x + y * y - 4, exp(x) + y - 1]
+
+
+STARTS = np.array([[1.0, -1.7], [-1.8, 0.8], [0.5, -2.0]])
+ROOTS = np.array([[1.00416874, -1.72963729], [-1.81626407, 0.8373678], [1.00416874, -1.72963729]])
+
+
+def test_value_and_jacobian_single_pass():
+    fab_ad_session.initialize(num_inputs=2)
+    z = FabTensor(value=1.0, identifier="z")
+    points = np.array([[1.0, 1.0], [2.0, 0.5]])
+    values, jacobian = value_and_jacobian(circle_exp, points)
+    assert fab_ad_session.src_tensors == [z]
+    assert np.allclose(values, [[-2.0, np.e], [0.25, np.exp(2) - 0.5]])
+    assert np.allclose(jacobian, [[[2.0, 2.0], [np.e, 1.0]], [[4.0, 1.0], [np.exp(2), 1.0]]])
+    assert np.allclose(evaluate(circle_exp, points), values)
+    # no graph is recorded for a values only evaluation
+    assert fab_ad_session.all_tensors == [z]
+
+
+def test_newton_scalar():
+    result = newton(cubic, -20.0)
+    assert result.success
+    assert result.x == pytest.approx(-1.0)
+    assert np.ndim(result.x) == 0
+    assert result.n_jacobians == result.n_evaluations
+
+
+def test_newton_batch():
+    result = newton(circle_exp, STARTS)
+    assert result.success
+    assert result.converged.shape == (3,)
+    assert np.allclose(result.x, ROOTS)
+    assert np.max(np.abs(result.fun)) < 1e-10
+
+
+def test_jacobian_reuse_and_broyden():
+    chord = newton(circle_exp, STARTS[0], jacobian_every=3)
+    assert chord.success
+    assert np.allclose(chord.x, ROOTS[0])
+    assert chord.n_jacobians < chord.n_evaluations
+    result = broyden(circle_exp, STARTS)
+    assert result.success
+    assert result.n_jacobians == 1
+    assert np.allclose(result.x, ROOTS)
+    assert np.allclose(result.jac[0], [[2 * ROOTS[0, 0], 2 * ROOTS[0, 1]], [np.exp(ROOTS[0, 0]), 1.0]], atol=0.1)
+
+
+def test_find_root_dispatch():
+    result = fab_ad.roots.find_root(lambda x, y: [sin(x) - 0.5 * y, y - 1], [0.4, 0.0], method="broyden")
+    assert np.allclose(result.x, [np.arcsin(0.5), 1.0])
+    assert fab_ad.find_root is find_root
+    with pytest.raises(ValueError):
+        find_root(cubic, 1.0, method="bisect")
+    with pytest.raises(ValueError):
+        find_root(lambda x, y, z: circle_exp(x, y), [1.0, 1.0, 1.0])
+    with pytest.raises(ValueError):
+        newton(cubic, 1.0, jacobian_every=0)
+
+
+def shifted_circle_exp(x, y, a, w):
+    return [x * x + y * y - a, exp(x) + y - reduce_sum(w * w)]
+
+
+def test_implicit_root_scalar():
+    fab_ad_session.initialize(num_inputs=1)
+    a = FabTensor(value=2.0, identifier="a")
+    root = implicit_root(lambda x, a: x * x - a, find_root(lambda x: x * x - 2.0, 1.0), a)
+    assert root.op == "implicit_root" and root.value == pytest.approx(np.sqrt(2.0))
+    assert auto_diff(root, mode=AdMode.FORWARD).gradient == pytest.approx(0.5 / np.sqrt(2.0))
+    assert auto_diff(root, mode=AdMode.REVERSE).gradient == pytest.approx(0.5 / np.sqrt(2.0))
+    # only the parameter and the root are recorded, not the solver's iterations
+    assert fab_ad_session.all_tensors == [a, root]
+    assert implicit_root(lambda x, a: x * x - a, np.sqrt(2.0), 2.0).op == "const"
+
+
+def test_implicit_root_matches_finite_differences():
+    w0 = np.array([0.6, 0.8])
+
+    def solve(a, w):
+        return find_root(lambda x, y: [x * x + y * y - a, exp(x) + y - np.sum(w * w)], STARTS[0]).x
+
+    fab_ad_session.initialize(num_inputs=2)
+    a = FabTensor(value=4.0, identifier="a")
+    w = FabTensor(value=w0, identifier="w")
+    root = implicit_root(shifted_circle_exp, solve(4.0, w0), a, w)
+    assert np.allclose(root.value, ROOTS[0])
+    auto_diff(reduce_sum(root * np.array([1.0, 2.0])), mode=AdMode.REVERSE)
+    eps = 1e-6
+    loss = lambda a, w: solve(a, w) @ [1.0, 2.0]
+    assert a.gradient == pytest.approx((loss(4.0 + eps, w0) - loss(4.0 - eps, w0)) / (2 * eps), rel=1e-5)
+    w_gradient = [(loss(4.0, w0 + step) - loss(4.0, w0 - step)) / (2 * eps) for step in np.eye(2) * eps]
+    assert np.allclose(w.gradient, w_gradient, rtol=1e-5)
+    # forward mode seeds w with ones, so its tangent is the sum of the reverse gradients
+    forward = auto_diff(root, mode=AdMode.FORWARD).gradient
+    assert np.allclose(forward[:, 0] + 2 * forward[:, 1], [a.gradient, np.sum(w.gradient)])
+    with pytest.raises(ValueError):
+        implicit_root(shifted_circle_exp, ROOTS, a, w)
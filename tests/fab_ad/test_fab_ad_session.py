@@ -0,0 +1,225 @@
+import threading
+
+import numpy as np
+import pytest
+
+from fab_ad.fab_ad_tensor import FabTensor, AdMode
+from fab_ad.fab_ad_session import fab_ad_session, AdjointStore, FabAdSession
+from fab_ad.fab_ad_diff import auto_diff
+from fab_ad.fab_ad_math import sin
+
+
+def test_tape_ids_and_adjoint_rows():
+    fab_ad_session.initialize(num_inputs=3)
+    x = FabTensor(value=3.0, identifier="x")
+    v = FabTensor(value=[1.0, 2.0], identifier="v")
+    z = x * x
+    w = v * 2
+    assert [tensor.tape_id for tensor in (x, v, z, w)] == [0, 1, 2, 3]
+    assert fab_ad_session.all_tensors[z.tape_id] is z
+    assert x.adjoint_slot[1:] == ((), 0)
+    assert z.adjoint_slot[1:] == ((), 1)
+    assert w.adjoint_slot[1:] == ((2,), 1)
+    assert set(fab_ad_session.adjoints.buffers) == {(), (2,)}
+
+
+def test_adjoint_store_grows_and_fills():
+    store = AdjointStore(capacity=2)
+    rows = [store.allocate(()) for _ in range(5)]
+    assert rows == [0, 1, 2, 3, 4]
+    assert len(store.buffers[()]) == 8
+    store.set((), 3, 2.0)
+    store.accumulate((), 3, 1.5)
+    assert store.get((), 3) == 3.5
+    row = store.allocate((3,))
+    store.accumulate((3,), row, np.ones((2, 3)))
+    assert all(store.get((3,), row) == 2)
+    store.fill(0)
+    assert not store.buffers[()].any() and not store.buffers[(3,)].any()
+
+
+def test_repeated_backward_passes_reuse_buffers():
+    fab_ad_session.initialize(num_inputs=3)
+    x = FabTensor(value=3.0, identifier="x")
+    y = FabTensor(value=-4.0, identifier="y")
+    z = x * x * y + sin(x * y)
+    buffers = dict(fab_ad_session.adjoints.buffers)
+    first = auto_diff(z, mode=AdMode.REVERSE).gradient
+    second = auto_diff(z, mode=AdMode.REVERSE).gradient
+    assert all(first == second)
+    assert first[0] == pytest.approx(2 * 3 * -4 + np.cos(-12) * -4)
+    assert all(buffers[shape] is fab_ad_session.adjoints.buffers[shape] for shape in buffers)
+    fab_ad_session.zero_grad()
+    assert x.gradient == 0 and z.gradient == 0
+
+
+def test_reverse_mode_shared_subexpressions_and_multiple_outputs():
+    fab_ad_session.initialize(num_inputs=3)
+    x = FabTensor(value=1.1, identifier="x")
+    z = x
+    for _ in range(16):
+        # path enumeration would visit 2 ** 16 paths here, the tape sweep 3 nodes per level
+        z = z * 0.5 + z * 0.5
+    result = auto_diff(z, mode=AdMode.REVERSE)
+    assert result.gradient == pytest.approx(1.0)
+    y = FabTensor(value=2.0, identifier="y")
+    result = auto_diff([x * y, x + y], mode=AdMode.REVERSE)
+    assert all(result.gradient[0] == [2.0, 1.1])
+    assert all(result.gradient[1] == [1.0, 1.0])
+
+
+def test_session_is_thread_local():
+    fab_ad_session.initialize(num_inputs=3)
+    x = FabTensor(value=1.0, identifier="x")
+    seen = []
+
+    def worker():
+        seen.append(list(fab_ad_session.all_tensors))
+        FabTensor(value=2.0, identifier="y")
+        seen.append(len(fab_ad_session.all_tensors))
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    thread.join()
+    assert seen == [[], 1]
+    assert fab_ad_session.all_tensors == [x]
+
+
+def test_session_dtype_policy():
+    fab_ad_session.initialize(num_inputs=2)
+    fab_ad_session.dtype = np.float32
+    try:
+        x = FabTensor(value=[0.5, 1.5], identifier="x")
+        y = FabTensor(value=[2.0, 4.0], identifier="y")
+        z = sin(x * 3.0) * 2.5 + x ** 2
+        w = y * 0.1 + 1
+        for tensor in (x, y, z, w):
+            assert np.asarray(tensor.value).dtype == np.float32
+            assert tensor.derivative.dtype == np.float32
+        assert fab_ad_session.adjoints.dtype == np.float32
+        output = auto_diff(z, mode=AdMode.REVERSE)
+        assert x.gradient.dtype == np.float32
+        assert np.allclose(output.gradient[0], 7.5 * np.cos(np.array([1.5, 4.5])) + 2 * np.array([0.5, 1.5]), atol=1e-5)
+        assert z.derivative.nbytes == 2 * 2 * 4
+        with pytest.raises(ValueError):
+            fab_ad_session.dtype = np.float64
+        fab_ad_session.initialize(num_inputs=2)
+        assert fab_ad_session.dtype == np.float32
+        with pytest.raises(ValueError):
+            fab_ad_session.dtype = np.int32
+    finally:
+        fab_ad_session.initialize(num_inputs=2)
+        fab_ad_session.dtype = None
+    assert FabTensor(value=3, identifier="x").value == 3
+    assert FabAdSession(dtype="float64").dtype == np.float64
+
+
+def test_memory_accounting():
+    fab_ad_session.initialize(num_inputs=2)
+    x = FabTensor(value=2.0, identifier="x")
+    v = FabTensor(value=[1.0, 2.0, 3.0], identifier="v")
+    z = x * x
+    memory = fab_ad_session.memory
+    assert memory.n_nodes == 3 and memory.n_edges == 2
+    assert memory.value_bytes == 8 + 24 + 8
+    assert memory.derivative_bytes == x.derivative.nbytes + v.derivative.nbytes + z.derivative.nbytes
+    assert memory.identifier_bytes == len("x") + len("v") + len(z.identifier)
+    assert fab_ad_session.memory_bytes == memory.total_bytes + fab_ad_session.adjoints.nbytes
+    assert memory.as_dict()["total_bytes"] == memory.total_bytes
+    assert "3 nodes" in str(memory)
+    fab_ad_session.initialize(num_inputs=2)
+    assert fab_ad_session.memory.n_nodes == 0
+
+
+def test_memory_budget_actions():
+    fab_ad_session.initialize(num_inputs=2)
+    fab_ad_session.memory_budget = 20000
+    try:
+        x = FabTensor(value=0.5, identifier="x")
+        with pytest.raises(MemoryError, match="budget"):
+            for _ in range(1000):
+                x = sin(x) * 1.5
+        # the tensor that crossed the budget is not left on the tape
+        assert all(hasattr(tensor, "op") for tensor in fab_ad_session.all_tensors)
+        assert fab_ad_session.all_tensors[-1].tape_id == len(fab_ad_session.all_tensors) - 1
+        assert fab_ad_session.memory.n_nodes == len(fab_ad_session.all_tensors)
+        assert fab_ad_session.adjoints.sizes[()] == len(fab_ad_session.all_tensors)
+
+        # spilling identifiers keeps a graph with exponentially growing expressions within budget
+        fab_ad_session.initialize(num_inputs=2)
+        fab_ad_session.on_budget_exceeded = "spill"
+        x = FabTensor(value=0.5, identifier="x")
+        z = x
+        for _ in range(12):
+            z = z * z + z
+        assert fab_ad_session.compact_identifiers
+        assert z.identifier == f"t{z.tape_id}"
+        assert fab_ad_session.memory_bytes <= 20000
+
+        calls = []
+        fab_ad_session.initialize(num_inputs=2)
+        fab_ad_session.on_budget_exceeded = calls.append
+        x = FabTensor(value=0.5, identifier="x")
+        for _ in range(1000):
+            x = sin(x) * 1.5
+        assert calls == [fab_ad_session]
+
+        # a callback raising the budget is notified again on the next crossing
+        def raise_budget(session):
+            calls.append(session.memory_budget)
+            session.memory_budget *= 2
+
+        fab_ad_session.initialize(num_inputs=2)
+        fab_ad_session.memory_budget = 20000
+        fab_ad_session.on_budget_exceeded = raise_budget
+        calls.clear()
+        x = FabTensor(value=0.5, identifier="x")
+        for _ in range(1000):
+            x = sin(x) * 1.5
+        assert calls[:2] == [20000, 40000]
+    finally:
+        fab_ad_session.memory_budget = None
+        fab_ad_session.on_budget_exceeded = "raise"
+
+
+def test_seed_vectors_grow_on_demand():
+    fab_ad_session.initialize(num_inputs=1)
+    x = FabTensor(value=2.0, identifier="x")
+    y = x * x
+    inputs = [FabTensor(value=float(idx), identifier=f"x{idx}") for idx in range(1, 5)]
+    # amortized doubling: 1 -> 2 -> 4 -> 8
+    assert fab_ad_session.max_num_independent_tensors == 8
+    assert len(y._derivative) == 1
+    z = y * inputs[-1] + inputs[0]
+    assert np.allclose(auto_diff(z, mode=AdMode.FORWARD).gradient, [16.0, 1.0, 0.0, 0.0, 4.0])
+    assert len(y.derivative) == 8
+    # a tensor keeps the width of its own session once another one is current
+    with fab_ad_session.isolated(num_inputs=1):
+        w = FabTensor(value=1.0, identifier="w") * 3.0
+    assert len(w.derivative) == 1
+
+
+def test_session_settings_are_thread_local():
+    fab_ad_session.initialize(num_inputs=2)
+    fab_ad_session.cse = True
+    fab_ad_session.memory_budget = 10 ** 6
+    seen = {}
+
+    def trace():
+        seen["default"] = fab_ad_session.settings()
+        with fab_ad_session.isolated(num_inputs=1, settings=settings):
+            seen["copied"] = fab_ad_session.settings()
+        seen["restored"] = fab_ad_session.settings()
+
+    try:
+        settings = fab_ad_session.settings()
+        worker = threading.Thread(target=trace)
+        worker.start()
+        worker.join()
+    finally:
+        fab_ad_session.cse = False
+        fab_ad_session.memory_budget = None
+    # another thread starts from the constructor arguments, not from this thread's changes
+    assert seen["default"]["cse"] is False and seen["default"]["memory_budget"] is None
+    assert seen["copied"] == settings
+    assert seen["restored"] == seen["default"]
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+import fab_ad
+from fab_ad.fab_ad_tensor import FabTensor, AdMode
+from fab_ad.fab_ad_session import fab_ad_session
+from fab_ad.fab_ad_stream import stream_gradient
+
+
+def dataset(n_chunks, chunk_size, seed=0):
+    rng = np.random.default_rng(seed)
+    for _ in range(n_chunks):
+        inputs = rng.uniform(-1, 1, chunk_size)
+        yield np.stack([inputs, 2.0 * inputs - 0.5 + rng.normal(0, 0.1, chunk_size)], axis=1)
+
+
+def squared_error(params, chunk):
+    slope, intercept = params
+    total = 0
+    for feature, target in chunk:
+        total = total + (slope * feature + intercept - target) ** 2
+    return total
+
+
+def expected(x, chunks):
+    data = np.concatenate(list(chunks))
+    residual = x[0] * data[:, 0] + x[1] - data[:, 1]
+    return np.sum(residual ** 2), np.array([np.sum(2 * residual * data[:, 0]), np.sum(2 * residual)])
+
+
+@pytest.mark.parametrize("prefetch", [False, True])
+def test_stream_gradient_matches_full_batch(prefetch):
+    fab_ad_session.initialize(num_inputs=3)
+    z = FabTensor(value=1.0, identifier="z")
+    x = np.array([1.5, 0.2])
+    result = stream_gradient(squared_error, x, dataset(20, 16), prefetch=prefetch)
+    value, gradient = expected(x, dataset(20, 16))
+    assert result.value == pytest.approx(value)
+    assert np.allclose(result.gradient, gradient)
+    assert result.n_chunks == 20 and result.n_records == 320
+    # the caller's session is untouched
+    assert fab_ad_session.all_tensors == [z]
+
+
+def test_stream_gradient_bounded_graph_and_options():
+    short = stream_gradient(squared_error, [1.0, 0.0], dataset(2, 8))
+    long = stream_gradient(squared_error, [1.0, 0.0], dataset(50, 8))
+    assert short.max_tensors == long.max_tensors
+    reverse = stream_gradient(squared_error, [1.0, 0.0], dataset(50, 8), mode=AdMode.REVERSE, average=True)
+    assert reverse.value == pytest.approx(long.value / 400)
+    assert np.allclose(reverse.gradient, long.gradient / 400)
+    assert fab_ad.stream_gradient is stream_gradient
+
+
+def test_stream_gradient_errors():
+    def failing():
+        yield from dataset(2, 4)
+        raise RuntimeError("corrupt record")
+
+    with pytest.raises(RuntimeError, match="corrupt record"):
+        stream_gradient(squared_error, [1.0, 0.0], failing(), prefetch=True)
+    with pytest.raises(TypeError):
+        stream_gradient(lambda params, chunk: 1.0, [1.0, 0.0], dataset(1, 4))
@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+
+from fab_ad.fab_ad_tensor import FabTensor, AdMode
+from fab_ad.fab_ad_session import fab_ad_session, FabAdSession
+from fab_ad.fab_ad_tape import StructTape
+from fab_ad.fab_ad_diff import auto_diff
+from fab_ad.fab_ad_math import sin, exp
+
+
+def deep_graph(x, y, w):
+    z = x
+    for _ in range(50):
+        z = sin(z) * y + w
+    return z
+
+
+def wide_graph(x, y, w):
+    # balanced sum so that every level holds many edges
+    terms = [sin(x * k) * y + exp(w * 0.01 * k) * x for k in range(256)]
+    while len(terms) > 1:
+        terms = [terms[idx] + terms[idx + 1] for idx in range(0, len(terms), 2)]
+    return terms[0]
+
+
+def gradients(graph, struct_tape):
+    fab_ad_session.initialize(num_inputs=3)
+    fab_ad_session.struct_tape = StructTape() if struct_tape else None
+    try:
+        x = FabTensor(value=0.3, identifier="x")
+        y = FabTensor(value=0.9, identifier="y")
+        w = FabTensor(value=-0.5, identifier="w")
+        z = graph(x, y, w)
+        tape = fab_ad_session.struct_tape
+        return auto_diff(z, mode=AdMode.REVERSE).gradient, z.derivative[:3], tape
+    finally:
+        fab_ad_session.struct_tape = None
+
+
+@pytest.mark.parametrize("graph", [deep_graph, wide_graph])
+def test_struct_tape_matches_object_sweep(graph):
+    expected, forward, _ = gradients(graph, struct_tape=False)
+    gradient, _, tape = gradients(graph, struct_tape=True)
+    assert tape.valid
+    assert np.allclose(gradient, expected)
+    assert np.allclose(gradient, forward)
+
+
+def test_struct_tape_arrays():
+    tape = StructTape(capacity=2)
+    a = tape.append(2.0, [])
+    b = tape.append(3.0, [])
+    c = tape.append(6.0, [(a, 3.0), (b, 2.0)])
+    d = tape.append(12.0, [(c, 2.0)])
+    assert tape.n_nodes == 4 and tape.n_edges == 3
+    assert list(tape.levels[:4]) == [0, 0, 1, 2]
+    assert list(tape.edge_parents[:3]) == [0, 1, 2]
+    adjoints = tape.backward(d, 1.0, np.zeros(4))
+    assert list(adjoints) == [6.0, 4.0, 2.0, 1.0]
+    tape.append(np.ones(2), [])
+    assert not tape.valid
+
+
+def test_struct_tape_session():
+    assert isinstance(FabAdSession(struct_tape=True).struct_tape, StructTape)
+    assert FabAdSession().struct_tape is None
+    fab_ad_session.initialize(num_inputs=3)
+    fab_ad_session.struct_tape = StructTape()
+    try:
+        x = FabTensor(value=2.0, identifier="x")
+        z = x * x + 1
+        assert fab_ad_session.struct_tape.n_nodes == 3
+        assert auto_diff(z, mode=AdMode.REVERSE).gradient == 4.0
+        assert x.gradient == 4.0
+        fab_ad_session.initialize(num_inputs=3)
+        assert fab_ad_session.struct_tape.n_nodes == 0
+        # array valued tensors fall back to the object sweep
+        v = FabTensor(value=[1.0, 2.0], identifier="v")
+        assert not fab_ad_session.struct_tape.valid
+        assert np.allclose(auto_diff(v * v, mode=AdMode.REVERSE).gradient, [2.0, 4.0])
+    finally:
+        fab_ad_session.struct_tape = None
@@ -1,11 +1,8 @@
 import numpy as np
-import sys
-import os
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src/fab_ad')))
-from fab_ad_tensor import FabTensor, AdMode
-from fab_ad_session import fab_ad_session
-from fab_ad_diff import auto_diff
-from constants import *
+from fab_ad.fab_ad_tensor import FabTensor, AdMode
+from fab_ad.fab_ad_session import fab_ad_session
+from fab_ad.fab_ad_diff import auto_diff
+from fab_ad.constants import *
 
 
 def func(x):